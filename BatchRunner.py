@@ -0,0 +1,285 @@
+"""
+Headless batch runner: evaluates :class:`House` for a list of addresses
+without opening the ParaPy GUI and writes one result row per house.
+
+Usage::
+
+    python BatchRunner.py houses.csv results.jsonl --workers 4 --timeout 600
+
+The job file is CSV or JSONL (chosen by extension) with the columns /
+keys ``address``, ``floors`` and ``budget`` and optionally ``id``,
+``selected_building_index`` and ``gable_roof_indices`` (a JSON list such
+as ``[[1, 2, 3, 4]]``).  Jobs without an ``id`` are numbered by their
+position in the file.
+
+* Every job runs in one of ``--workers`` worker processes.  A job that
+  takes longer than ``--timeout`` seconds is killed together with its
+  worker, reported as ``timeout`` and a fresh worker takes over.
+* Finished job ids are appended to a checkpoint file
+  (``<output>.checkpoint`` by default).  Restarting the same command skips
+  them, so an interrupted overnight run just continues;
+  ``--retry-failed`` runs failed and timed-out jobs again.
+* Results are written as JSONL (all roof face details nested) or CSV (one
+  flat row per house, face details as a JSON column).
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+
+FIELDS = ['id', 'address', 'floors', 'budget', 'selected_building_index', 'gable_roof_indices',
+          'status', 'total_cost', 'usable_energy_kwh', 'money_saved_eur', 'panel_counts',
+          'solar_panel_details', 'seconds', 'error']
+
+
+def _parse_json_field(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def read_jobs(path):
+    """Read the job file into a list of job dicts (CSV or JSONL)."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    jobs = []
+    for n, row in enumerate(rows):
+        jobs.append({
+            'id': str(row.get('id') or n),
+            'address': row['address'],
+            'floors': int(row['floors']),
+            'budget': float(row['budget']),
+            'selected_building_index': int(_parse_json_field(row.get('selected_building_index'), 0)),
+            'gable_roof_indices': _parse_json_field(row.get('gable_roof_indices'), []),
+        })
+    return jobs
+
+
+def read_checkpoint(path, retry_failed=False):
+    """Ids of the jobs that do not have to run again."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            job_id, _, status = line.rstrip('\n').partition('\t')
+            if status == 'ok' or not retry_failed:
+                done.add(job_id)
+            else:
+                done.discard(job_id)
+    return done
+
+
+def run_job(job, options):
+    """Build the :class:`House` of one job and evaluate it to a result row."""
+    from House import House  # imported in the worker, keeps the parent light
+
+    obj = House(address=job['address'], floors=job['floors'], budget=job['budget'], **options)
+    obj.map.selected_building_index = job['selected_building_index']
+    obj.roof.gable_roof_indices = job['gable_roof_indices']
+
+    total_cost, usable_energy, money_saved = obj.summary_info
+    details = obj.solar_panel_details
+    panel_counts = {}
+    for detail in details:
+        for kind, count in detail['panel_counts'].items():
+            panel_counts[kind] = panel_counts.get(kind, 0) + count
+
+    return {
+        'total_cost': total_cost,
+        'usable_energy_kwh': usable_energy,
+        'money_saved_eur': money_saved,
+        'panel_counts': panel_counts,
+        'solar_panel_details': details,
+    }
+
+
+# Worker process: takes jobs until it receives None
+def _worker_loop(worker_id, tasks, results, options):
+    while True:
+        job = tasks.get()
+        if job is None:
+            return
+        start = time.time()
+        try:
+            row = dict(run_job(job, options), status='ok')
+        except Exception as e:
+            row = {'status': 'error', 'error': f"{type(e).__name__}: {e}",
+                   'traceback': traceback.format_exc()}
+        row['seconds'] = time.time() - start
+        results.put((worker_id, job['id'], row))
+
+
+class _Worker:
+    def __init__(self, ctx, worker_id, results, options):
+        self.tasks = ctx.Queue()
+        self.process = ctx.Process(target=_worker_loop, args=(worker_id, self.tasks, results, options),
+                                   daemon=True)
+        self.process.start()
+        self.job = None
+        self.started = None
+
+    def submit(self, job):
+        self.job = job
+        self.started = time.time()
+        self.tasks.put(job)
+
+    def stop(self):
+        if self.process.is_alive():
+            self.tasks.put(None)
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(5)
+
+
+class ResultWriter:
+    """Appends result rows to a JSONL or CSV file and the checkpoint."""
+
+    def __init__(self, path, checkpoint):
+        self.path = path
+        self.checkpoint = checkpoint
+        self.is_csv = path.lower().endswith('.csv')
+        new_csv = self.is_csv and (not os.path.exists(path) or os.path.getsize(path) == 0)
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self._out = open(path, 'a', newline='', encoding='utf-8')
+        self._checkpoint = open(checkpoint, 'a', encoding='utf-8')
+        if self.is_csv:
+            self._csv = csv.DictWriter(self._out, fieldnames=FIELDS, extrasaction='ignore')
+            if new_csv:
+                self._csv.writeheader()
+
+    def write(self, job, row):
+        row = dict(job, **row)
+        if self.is_csv:
+            for key in ('gable_roof_indices', 'panel_counts', 'solar_panel_details'):
+                if key in row:
+                    row[key] = json.dumps(row[key], default=float)
+            self._csv.writerow(row)
+        else:
+            row.pop('traceback', None)
+            self._out.write(json.dumps(row, default=float) + '\n')
+        self._out.flush()
+        # The checkpoint is only written once the row itself is on disk
+        self._checkpoint.write(f"{job['id']}\t{row['status']}\n")
+        self._checkpoint.flush()
+
+    def close(self):
+        self._out.close()
+        self._checkpoint.close()
+
+
+def run_batch(jobs, output, checkpoint=None, workers=1, timeout=600.0, options=None, retry_failed=False):
+    """
+    Run all ``jobs`` that are not in the checkpoint yet and append their
+    result rows to ``output``.  Returns a dict with the number of jobs per
+    status.
+    """
+    checkpoint = checkpoint or output + '.checkpoint'
+    options = options or {}
+    done = read_checkpoint(checkpoint, retry_failed)
+    pending = [job for job in jobs if job['id'] not in done]
+    counts = {'skipped': len(jobs) - len(pending)}
+    print(f"BatchRunner: {len(pending)} jobs to run, {counts['skipped']} already done.")
+    if not pending:
+        return counts
+
+    ctx = multiprocessing.get_context('spawn')  # same behaviour on Windows and Linux
+    results = ctx.Queue()
+    writer = ResultWriter(output, checkpoint)
+    pool = [_Worker(ctx, i, results, options) for i in range(min(workers, len(pending)))]
+    todo = list(reversed(pending))
+    running = 0
+
+    def finish(worker, row):
+        nonlocal running
+        writer.write(worker.job, row)
+        counts[row['status']] = counts.get(row['status'], 0) + 1
+        print(f"BatchRunner: job {worker.job['id']} ({worker.job['address']}) {row['status']}"
+              f" after {row.get('seconds', 0):.1f} s")
+        worker.job = None
+        running -= 1
+
+    try:
+        while todo or running:
+            for worker in pool:
+                if worker.job is None and todo:
+                    worker.submit(todo.pop())
+                    running += 1
+
+            try:
+                worker_id, job_id, row = results.get(timeout=0.5)
+            except queue.Empty:
+                pass
+            else:
+                worker = pool[worker_id]
+                if worker.job is not None and worker.job['id'] == job_id:
+                    finish(worker, row)
+
+            # Kill workers that are stuck or crashed and replace them
+            now = time.time()
+            for i, worker in enumerate(pool):
+                if worker.job is None:
+                    continue
+                if now - worker.started > timeout:
+                    row = {'status': 'timeout', 'seconds': now - worker.started,
+                           'error': f"no result after {timeout:.0f} s"}
+                elif not worker.process.is_alive():
+                    row = {'status': 'error', 'seconds': now - worker.started,
+                           'error': f"worker exited with code {worker.process.exitcode}"}
+                else:
+                    continue
+                worker.kill()
+                finish(worker, row)
+                pool[i] = _Worker(ctx, i, results, options)
+    finally:
+        for worker in pool:
+            worker.stop()
+        for worker in pool:
+            worker.process.join(5)
+            if worker.process.is_alive():
+                worker.kill()
+        writer.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the solar panel app for many addresses without the GUI.")
+    parser.add_argument('jobs', help="CSV or JSONL file with address, floors, budget, [id, "
+                                     "selected_building_index, gable_roof_indices]")
+    parser.add_argument('output', help="result file, .jsonl or .csv")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--timeout', type=float, default=600.0, help="seconds per house")
+    parser.add_argument('--checkpoint', help="default: <output>.checkpoint")
+    parser.add_argument('--retry-failed', action='store_true', help="run failed / timed-out jobs again")
+    parser.add_argument('--irradiance-backend', choices=('pvgis', 'local'), default='pvgis')
+    parser.add_argument('--radiation-lookup', action='store_true')
+    parser.add_argument('--loss', type=float, default=18)
+    parser.add_argument('--osm-source', help="local .gpkg / .osm.pbf extract instead of live OSM queries")
+    parser.add_argument('--address-table', help="CSV with address, lat, lon for offline geocoding")
+    args = parser.parse_args(argv)
+
+    options = {'irradiance_backend': args.irradiance_backend,
+               'radiation_lookup': args.radiation_lookup,
+               'loss': args.loss,
+               'osm_source': args.osm_source,
+               'address_table': args.address_table}
+    counts = run_batch(read_jobs(args.jobs), args.output, checkpoint=args.checkpoint, workers=args.workers,
+                       timeout=args.timeout, options=options, retry_failed=args.retry_failed)
+    print("BatchRunner: " + ", ".join(f"{status}: {n}" for status, n in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
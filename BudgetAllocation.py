@@ -0,0 +1,54 @@
+import heapq
+
+
+def allocate_budget(curves, budget):
+    """
+    Divide one budget over all roof faces by marginal yield.
+
+    Every face offers its panels as a *yield curve*: ``(cost, kWh/year)``
+    pairs in the order the placement engine places them.  The allocator
+    repeatedly looks at the next panel with the highest kWh per EUR over
+    all faces and buys it when it fits in the remaining budget.  A panel
+    that does not fit is skipped, but its face stays open, so its later
+    (cheaper) panels can still be bought.  This is the same rule the
+    engine uses under a budget (an unaffordable panel is skipped, see
+    :func:`PlacementEngine.truncate`).
+
+    Parameters
+    ----------
+    curves : list[list[tuple(float, float)]]
+        One yield curve per roof face (see :pyattr:`OptimizedPlacement.yield_curve`).
+    budget : float
+        Total budget (EUR).
+
+    Returns
+    -------
+    spent : list[float]
+        Cost of the panels chosen on every face.  Summed in placement
+        order; every skipped panel costs more than all panels bought after
+        it on that face, so with this face budget the engine picks exactly
+        these panels.
+    counts : list[int]
+        Number of panels taken from every curve.
+    """
+    spent = [0.0] * len(curves)
+    counts = [0] * len(curves)
+    steps = [0] * len(curves)  # next position on every curve, bought or skipped
+    total = 0.0
+
+    heap = [(-kwh / cost, face) for face, curve in enumerate(curves) if curve
+            for cost, kwh in curve[:1]]
+    heapq.heapify(heap)
+    while heap:
+        _, face = heapq.heappop(heap)
+        cost, _ = curves[face][steps[face]]
+        if total + cost <= budget:
+            spent[face] += cost
+            total += cost
+            counts[face] += 1
+        # else: skip this panel, later ones of the face may be cheaper
+        steps[face] += 1
+        if steps[face] < len(curves[face]):
+            next_cost, next_kwh = curves[face][steps[face]]
+            heapq.heappush(heap, (-next_kwh / next_cost, face))
+    return spent, counts
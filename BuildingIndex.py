@@ -0,0 +1,134 @@
+import csv
+import os
+import re
+import numpy as np
+import geopandas as gpd
+import shapely
+from pyproj import Transformer
+from shapely import STRtree, box
+from Profiler import profiler
+
+
+def normalize_address(address):
+    """Lower case, no punctuation, single spaces: ``'Slangenstraat 48'`` style keys."""
+    return re.sub(r"\s+", " ", re.sub(r"[,.;]", " ", str(address).lower())).strip()
+
+
+class BuildingIndex:
+    """
+    In-memory index of all building footprints of a local OSM extract, so
+    :class:`Map` can answer "buildings within *range* m of an address"
+    without any Overpass / Nominatim request.
+
+    The extract is read once into a GeoDataFrame, projected to its UTM zone
+    and stored in a :class:`shapely.STRtree`.  Every query is then a
+    geocode lookup in a dict plus an STRtree window query.
+
+    Parameters
+    ----------
+    source : str
+        Path of the extract.  ``.osm.pbf`` files are read with the optional
+        **pyrosm** package, anything else (GeoPackage, GeoJSON, shapefile)
+        with :func:`geopandas.read_file`.
+    address_table : str, optional
+        CSV file with the columns ``address``, ``lat`` and ``lon`` used for
+        geocoding.  Addresses found in the extract itself
+        (``addr:street`` + ``addr:housenumber`` [+ ``addr:city``] tags) are
+        added automatically.
+
+    Notes
+    -----
+    * Queries use the same square window as ``ox.features_from_address``
+      (half side ``dist``), but the result is ordered by distance to the
+      address, so index 0 is the building at the address itself.
+    * Addresses missing from the table fall back to the osmnx geocoder.
+    """
+
+    def __init__(self, source, address_table=None):
+        self.source = source
+        gdf = self._read(source)
+        gdf = gdf[gdf.geometry.type.isin(['Polygon', 'MultiPolygon'])]
+        if gdf.crs is None:
+            gdf = gdf.set_crs(epsg=4326)
+        self.buildings = gdf.to_crs(epsg=4326).reset_index(drop=True)
+
+        self.crs = self.buildings.estimate_utm_crs()
+        self.projected = np.asarray(self.buildings.geometry.to_crs(self.crs).values, dtype=object)
+        self.tree = STRtree(self.projected)
+        self._to_utm = Transformer.from_crs("EPSG:4326", self.crs, always_xy=True)
+
+        self.addresses = self._extract_addresses()
+        if address_table is not None:
+            self.addresses.update(self._read_address_table(address_table))
+        print(f"BuildingIndex: {len(self.buildings)} buildings and {len(self.addresses)} addresses "
+              f"loaded from {os.path.basename(source)}")
+
+    @staticmethod
+    def _read(source):
+        if source.lower().endswith('.pbf'):
+            try:
+                from pyrosm import OSM
+            except ImportError:
+                raise ImportError("Reading .osm.pbf extracts needs the optional 'pyrosm' package, "
+                                  "or convert the extract to a GeoPackage first.")
+            return OSM(source).get_buildings()
+        return gpd.read_file(source)
+
+    # Addresses tagged on the buildings themselves, located at their centroid
+    def _extract_addresses(self):
+        columns = self.buildings.columns
+        if 'addr:street' not in columns or 'addr:housenumber' not in columns:
+            return {}
+        centroids = self.buildings.geometry.representative_point()
+        cities = self.buildings['addr:city'] if 'addr:city' in columns else [None] * len(self.buildings)
+        addresses = {}
+        for street, number, city, point in zip(self.buildings['addr:street'], self.buildings['addr:housenumber'],
+                                               cities, centroids):
+            if not isinstance(street, str) or not isinstance(number, str):
+                continue
+            latlon = (point.y, point.x)
+            addresses.setdefault(normalize_address(f"{street} {number}"), latlon)
+            if isinstance(city, str):
+                addresses[normalize_address(f"{street} {number} {city}")] = latlon
+        return addresses
+
+    @staticmethod
+    def _read_address_table(path):
+        with open(path, newline='', encoding='utf-8') as f:
+            return {normalize_address(row['address']): (float(row['lat']), float(row['lon']))
+                    for row in csv.DictReader(f)}
+
+    def geocode(self, address):
+        """``(lat, lon)`` of ``address``, from the local table if possible."""
+        latlon = self.addresses.get(normalize_address(address))
+        if latlon is not None:
+            return latlon
+        import osmnx as ox
+        print(f"BuildingIndex: '{address}' not in the local address table, using the osmnx geocoder")
+        with profiler.span("network:OSM geocode"):
+            return ox.geocode(address)
+
+    def buildings_near(self, lat, lon, dist):
+        """Buildings intersecting the square of half side ``dist`` m around a point, nearest first."""
+        x, y = self._to_utm.transform(lon, lat)
+        hits = self.tree.query(box(x - dist, y - dist, x + dist, y + dist), predicate='intersects')
+        distances = shapely.distance(self.projected[hits], shapely.points(x, y))
+        order = hits[np.argsort(distances, kind='stable')]
+        return self.buildings.iloc[order]
+
+    def features_from_address(self, address, dist):
+        """Drop-in for ``ox.features_from_address(address, tags={'building': True}, dist=dist)``."""
+        lat, lon = self.geocode(address)
+        return self.buildings_near(lat, lon, dist)
+
+
+_indexes = {}
+
+
+# One index per extract (and address table) for the whole session
+def building_index(source, address_table=None):
+    key = (os.path.abspath(source), address_table and os.path.abspath(address_table))
+    if key not in _indexes:
+        with profiler.span("BuildingIndex.build"):
+            _indexes[key] = BuildingIndex(source, address_table)
+    return _indexes[key]
@@ -0,0 +1,213 @@
+"""
+Bounded-optimal panel placement on a single roof face with an integer
+program, the slow counterpart of the :class:`PlacementEngine` heuristics
+for high-value roofs.
+
+Needs the optional **ortools** package (CP-SAT solver).
+"""
+
+import math
+import time
+
+import numpy as np
+from shapely.geometry import box
+
+from PlacementEngine import RASTER_CELL, panel_placement, rasterize
+from Profiler import profiler
+
+EXACT_GRID = 0.25  # Spacing (m) of the candidate positions
+EXACT_TIME_LIMIT = 30.0  # Seconds the solver may spend per roof face
+MAX_CANDIDATES = 200_000  # Candidate positions above which the grid is coarsened
+OBJECTIVES = ('yield', 'count')
+
+
+def candidate_positions(region, panels, grid, cell=RASTER_CELL):
+    """
+    Lower-left corners ``(type index, x, y)`` of every panel footprint
+    (``eff_len`` x ``eff_wid``) that lies inside ``region``, on a grid with
+    spacing ``grid`` (rounded to whole raster cells).
+
+    The region is rasterized once (:func:`rasterize`) and every candidate
+    is tested with a summed-area table of the blocked cells.
+    """
+    raster = rasterize(region, cell)
+    if raster is None:
+        return []
+    free, x0, y0 = raster
+    ny, nx = free.shape
+    sat = np.zeros((ny + 1, nx + 1), dtype=np.int32)
+    np.cumsum(np.cumsum(~free, axis=0, dtype=np.int32), axis=1, out=sat[1:, 1:])
+
+    step = max(1, int(round(grid / cell)))
+    candidates = []
+    for t, panel in enumerate(panels):
+        w = int(math.ceil(panel['eff_len'] / cell - 1e-9))
+        h = int(math.ceil(panel['eff_wid'] / cell - 1e-9))
+        if w > nx or h > ny:
+            continue
+        i = np.arange(0, nx - w + 1, step)
+        j = np.arange(0, ny - h + 1, step)[:, np.newaxis]
+        blocked = sat[j + h, i + w] - sat[j, i + w] - sat[j + h, i] + sat[j, i]
+        jj, ii = np.nonzero(blocked == 0)
+        xs = (x0 + i[ii] * cell).tolist()
+        ys = (y0 + j[jj, 0] * cell).tolist()
+        candidates.extend(zip([t] * len(xs), xs, ys))
+    return candidates
+
+
+def conflict_points(candidates, panels):
+    """
+    Sets of candidates whose (half-open) footprints share a point, one
+    set per point, so "at most one per set" forbids every overlap.
+
+    Two overlapping footprints share the corner ``(max x, max y)`` of
+    their starts, so the lattice of all start coordinates covers every
+    conflict (grid candidates and the off-grid panels of the hint alike).
+    Each candidate covers a block of lattice points; the blocks are
+    expanded and grouped by point in a few vectorised passes.  Sets with a
+    single candidate are dropped.
+    """
+    t, x, y = (np.array(column) for column in zip(*candidates))
+    length = np.array([panel['eff_len'] for panel in panels])[t]
+    width = np.array([panel['eff_wid'] for panel in panels])[t]
+    xs = np.unique(x)
+    ys = np.unique(y)
+
+    # Lattice block of every candidate: nx columns from ix0, ny rows from iy0
+    ix0 = np.searchsorted(xs, x)
+    nx = np.searchsorted(xs, x + length - 1e-9) - ix0
+    iy0 = np.searchsorted(ys, y - 1e-9)
+    ny = np.searchsorted(ys, y + width - 1e-9) - iy0
+    size = nx * ny
+
+    owner = np.repeat(np.arange(len(candidates)), size)
+    k = np.arange(len(owner)) - np.repeat(np.cumsum(size) - size, size)
+    point = (iy0[owner] + k // nx[owner]) * len(xs) + ix0[owner] + k % nx[owner]
+
+    order = np.argsort(point)
+    point, owner = point[order], owner[order]
+    starts = np.flatnonzero(np.diff(point, prepend=-1))
+    counts = np.diff(starts, append=len(point))
+    return [owner[a:a + n].tolist() for a, n in zip(starts.tolist(), counts.tolist()) if n > 1]
+
+
+def solve_exact(engine, hint, budget, grid=EXACT_GRID, time_limit=EXACT_TIME_LIMIT, objective='yield',
+                name='Exact (ILP)'):
+    """
+    Places panels of ``engine.panels`` on the roof of ``engine`` at the
+    azimuth of ``hint`` with CP-SAT, maximising the panel area (all panels
+    of a face receive the same radiation, so area is proportional to the
+    yield) or the panel count under ``budget``.
+
+    Every candidate position (:func:`candidate_positions` plus the panels
+    of ``hint``) is a boolean variable; at most one footprint may cover
+    each point of :func:`conflict_points` (set packing) and one linear
+    constraint keeps the cost within the budget.  The heuristic result
+    ``hint`` is the warm start of the solver and is returned when the
+    solver does not beat it.  The whole face is one section, with the same
+    margins as :func:`place_section`.  Portrait panels in ``engine.panels``
+    are candidates as well, so the solver may mix orientations.
+
+    Parameters
+    ----------
+    engine : PlacementEngine
+        Engine of the roof face, provides the rotated layout and panels.
+    hint : list
+        Heuristic result ``[placements, proj_area, azimuth, rotation_angle,
+        name, total_cost]`` (e.g. the best of the strategies).
+    budget : float
+        Maximum cost (EUR), may be ``inf``.
+    grid : float
+        Spacing (m) of the candidate positions.  Coarsened automatically
+        when it would create more than ``MAX_CANDIDATES`` candidates.
+    time_limit : float
+        Time limit in seconds for the whole face: building the candidates
+        and the model counts against it and the solver gets the rest; the
+        best solution found is returned.
+    objective : {'yield', 'count'}
+        Maximise the panel area or the number of panels.
+    name : str
+        Method name of the result.
+
+    Returns
+    -------
+    list
+        ``[placements, proj_area, azimuth, rotation_angle, name, total_cost]``
+        like :meth:`PlacementEngine.run`.
+    """
+    try:
+        from ortools.sat.python import cp_model
+    except ImportError:
+        raise ImportError("placement_mode='exact' needs the optional 'ortools' package "
+                          "(pip install ortools).")
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {', '.join(OBJECTIVES)}, got {objective!r}.")
+    deadline = time.perf_counter() + time_limit
+
+    azimuth, rotation_angle = hint[2], hint[3]
+    rotated, inset = engine.layout(azimuth)
+    minx, miny, maxx, maxy = rotated.bounds
+    region = inset.intersection(box(minx + 0.05, miny + 0.25, maxx - 0.05, maxy - 0.25))
+    panels = engine.panels
+    index = {(panel['type'], panel.get('rotated', False)): t for t, panel in enumerate(panels)}
+
+    candidates = candidate_positions(region, panels, grid)
+    while len(candidates) > MAX_CANDIDATES:
+        grid *= 2
+        print(f"Exact placement: too many candidates, grid coarsened to {grid:.2f} m")
+        candidates = candidate_positions(region, panels, grid)
+    hinted = [(index[p['type'], p['rotated']], p['x'], p['y']) for p in hint[0]]
+    candidates = hinted + candidates
+    chosen_by_point = conflict_points(candidates, panels)
+    if time.perf_counter() >= deadline:
+        print(f"Exact placement: building the model took the whole {time_limit} s, keeping {hint[4]}")
+        return list(hint)
+
+    model = cp_model.CpModel()
+    chosen = [model.NewBoolVar(f'c{k}') for k in range(len(candidates))]
+    for k, b in enumerate(chosen):
+        model.AddHint(b, k < len(hinted))
+    for covering in chosen_by_point:
+        model.AddAtMostOne(chosen[k] for k in covering)
+
+    costs = [round(panels[t]['cost'] * 100) for t, _, _ in candidates]
+    if math.isfinite(budget):
+        model.Add(sum(c * b for c, b in zip(costs, chosen)) <= int(math.floor(budget * 100)))
+    if objective == 'count':
+        model.Maximize(sum(chosen))
+    else:
+        areas = [round(panels[t]['proj_len'] * panels[t]['proj_wid'] * 1e4) for t, _, _ in candidates]
+        model.Maximize(sum(a * b for a, b in zip(areas, chosen)))
+
+    solver = cp_model.CpSolver()
+    remaining = deadline - time.perf_counter()
+    if remaining <= 0:
+        print(f"Exact placement: building the model took the whole {time_limit} s, keeping {hint[4]}")
+        return list(hint)
+    solver.parameters.max_time_in_seconds = remaining
+    with profiler.span('ExactPlacement.solve'):
+        status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        print(f"Exact placement: no solution within {time_limit} s, keeping {hint[4]}")
+        return list(hint)
+    print(f"Exact placement: {solver.StatusName(status)} with {len(candidates)} candidates "
+          f"in {solver.WallTime():.1f} s")
+
+    picked = [c for c, b in zip(candidates, chosen) if solver.Value(b)]
+    score = len(picked) if objective == 'count' else sum(
+        panels[t]['proj_len'] * panels[t]['proj_wid'] for t, _, _ in picked)
+    if score <= (len(hint[0]) if objective == 'count' else hint[1]) + 1e-9:
+        print(f"Exact placement: no improvement on {hint[4]}")
+        return list(hint)
+
+    placements = []
+    total_area = 0
+    total_cost = 0
+    for t, x, y in sorted(picked, key=lambda c: (c[2], c[1])):
+        panel = panels[t]
+        placement = panel_placement(panel, float(x), float(y))
+        placement['cost'] = panel['cost']
+        placements.append(placement)
+        total_area += panel['proj_len'] * panel['proj_wid']
+        total_cost += panel['cost']
+    return [placements, total_area, azimuth, rotation_angle, name, total_cost]
@@ -0,0 +1,107 @@
+"""
+Plain NumPy geometry helpers for building footprints and roof planes, kept
+so they can be benchmarked and reused headlessly.
+"""
+
+import numpy as np
+
+SNAP = 0.05  # Grid (m) all footprint points are snapped to
+BLOCK_PAIRS = 250_000  # Edge pairs evaluated per vectorised block
+
+
+def snap(val, res=SNAP):
+    return round(val / res) * res
+
+
+def extended_intersections(xy, res=SNAP, tol=1e-6):
+    """
+    Intersections of the (infinitely extended) lines through every pair of
+    footprint edges, used as extra vertexes for gable roofs.
+
+    Parameters
+    ----------
+    xy : sequence of (x, y)
+        Closed footprint ring (first point repeated at the end).
+    res : float
+        Snapping grid of the intersection points.
+    tol : float
+        Parallel-line threshold and on-segment tolerance.
+
+    Returns
+    -------
+    list[tuple(float, float)]
+        Snapped intersection points that lie on at least one of the two
+        edges and do not coincide with a footprint vertex, ordered by edge
+        pair ``(i, j)``, ``i < j``.  Same points and order as the former
+        double loop in :class:`House`, but all pairs of a block are
+        evaluated at once.
+    """
+    pts = np.asarray(xy, dtype=float).reshape(-1, 2)
+    n = len(pts) - 1  # number of edges
+    if n < 2:
+        return []
+    base_xy = {(round(x, 6), round(y, 6)) for x, y in pts.tolist()}
+    # Grid cell of every vertex: a snapped point can only coincide with a
+    # vertex that rounds to the same cell, all others skip the exact check
+    base_cells = _cells(np.round(pts[:, 0] / res), np.round(pts[:, 1] / res))
+    # Footprints snapped to the same grid (House.base_pts): same cell means same point
+    on_grid = np.array_equal(np.round(pts / res) * res, pts)
+
+    x1, y1 = pts[:-1, 0], pts[:-1, 1]
+    x2, y2 = pts[1:, 0], pts[1:, 1]
+    cross = x1 * y2 - y1 * x2
+    min_x, max_x = np.minimum(x1, x2) - tol, np.maximum(x1, x2) + tol
+    min_y, max_y = np.minimum(y1, y2) - tol, np.maximum(y1, y2) + tol
+
+    result = []
+    rows_per_block = max(1, BLOCK_PAIRS // n)
+    for start in range(0, n - 1, rows_per_block):
+        # All pairs (i, j > i) of the rows in this block, in loop order
+        rows = np.arange(start, min(start + rows_per_block, n - 1))
+        counts = n - 1 - rows
+        i = np.repeat(rows, counts)
+        j = i + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        dxa, dya = x1[i] - x2[i], y1[i] - y2[i]
+        dxb, dyb = x1[j] - x2[j], y1[j] - y2[j]
+        denom = dxa * dyb - dya * dxb
+        keep = np.abs(denom) > tol
+        i, j, dxa, dya, dxb, dyb, denom = i[keep], j[keep], dxa[keep], dya[keep], dxb[keep], dyb[keep], denom[keep]
+
+        px = (cross[i] * dxb - dxa * cross[j]) / denom
+        py = (cross[i] * dyb - dya * cross[j]) / denom
+        kx, ky = np.round(px / res), np.round(py / res)
+        px, py = kx * res, ky * res
+
+        on_a = (min_x[i] <= px) & (px <= max_x[i]) & (min_y[i] <= py) & (py <= max_y[i])
+        on_b = (min_x[j] <= px) & (px <= max_x[j]) & (min_y[j] <= py) & (py <= max_y[j])
+        hit = on_a | on_b
+        px, py = px[hit], py[hit]
+        maybe_base = np.isin(_cells(kx[hit], ky[hit]), base_cells)
+        if on_grid:
+            result.extend(zip(px[~maybe_base].tolist(), py[~maybe_base].tolist()))
+            continue
+
+        for x, y, check in zip(px.tolist(), py.tolist(), maybe_base.tolist()):
+            if not check or (round(x, 6), round(y, 6)) not in base_xy:
+                result.append((x, y))
+    return result
+
+
+def fit_plane(points):
+    """
+    Least-squares plane through 3D ``points`` (SVD of the centred
+    coordinates).  Returns ``(centroid, normal)`` as arrays, with the
+    normal pointing upwards (z >= 0).
+    """
+    arr = np.asarray(points, dtype=float)
+    centroid = np.mean(arr, axis=0)
+    _, _, vh = np.linalg.svd(arr - centroid)
+    normal = vh[-1]
+    if normal[2] < 0:
+        normal = -normal
+    return centroid, normal
+
+
+def _cells(kx, ky):
+    return kx.astype(np.int64) * (1 << 32) + ky.astype(np.int64)
@@ -1,8 +1,10 @@
 from parapy.core import Attribute, Part, Input
 from parapy.geom import GeomBase, Point, LineSegment, Wire, Plane, Face, LoftedSolid, Vector
-import numpy as np
+from FootprintGeometry import fit_plane
+from Profiler import profile_attributes, profiled
 
 
+@profile_attributes
 class GableRoof(GeomBase):
     """
     Builds a single symmetric gable roof from four base vertices.
@@ -49,6 +51,7 @@ class GableRoof(GeomBase):
 
     # Calculate ridge end and start points based on the four input vertexes.
     @Attribute
+    @profiled
     def roof_pts(self):
         p0, p1, p2, p3 = self.gable_roof_vertexes
         ridge_start = Point((p0.x + p1.x) / 2, (p0.y + p1.y) / 2, self.base_height + self.slope_height)
@@ -63,6 +66,7 @@ class GableRoof(GeomBase):
     # Wire of the flat part of the roof
     # Only used for the solid representation
     @Attribute(in_tree=True)
+    @profiled
     def roof_wire_0(self):
         return Wire([LineSegment(self.roof_pts[0], self.roof_pts[1]),
                      LineSegment(self.roof_pts[1], self.roof_pts[4]),
@@ -72,21 +76,15 @@ class GableRoof(GeomBase):
     # Plane of first sloped roof face
     # Used to project wire onto
     @Attribute()
+    @profiled
     def roof_plane_1(self):
         pts = [self.roof_pts[1], self.roof_pts[2], self.roof_pts[3], self.roof_pts[4]]
-        arr = np.array([[pt.x, pt.y, pt.z] for pt in pts])
-        centroid = np.mean(arr, axis=0)
-        shifted = arr - centroid
-        _, _, vh = np.linalg.svd(shifted)
-        normal = vh[-1]
-        normal = Vector(*normal)
-        # This makes sure the nromal points upwards
-        if normal.z < 0:
-            normal = Vector(-normal.x, -normal.y, -normal.z)
-        origin = Point(*centroid)
-        return Plane(reference=origin, normal=Vector(*normal))
+        # Best-fit plane, normal pointing upwards
+        centroid, normal = fit_plane([[pt.x, pt.y, pt.z] for pt in pts])
+        return Plane(reference=Point(*centroid), normal=Vector(*normal))
 
     @Attribute(in_tree=True)
+    @profiled
     def roof_wire_1(self):
         pts = self.roof_pts
         projected_pts = [
@@ -112,21 +110,15 @@ class GableRoof(GeomBase):
                      LineSegment(projected_pts[3], projected_pts[0])])
 
     @Attribute()
+    @profiled
     def roof_plane_2(self):
         pts = [self.roof_pts[0], self.roof_pts[2], self.roof_pts[3], self.roof_pts[5]]
-        arr = np.array([[pt.x, pt.y, pt.z] for pt in pts])
-        centroid = np.mean(arr, axis=0)
-        shifted = arr - centroid
-        _, _, vh = np.linalg.svd(shifted)
-        normal = vh[-1]
-        normal = Vector(*normal)
-        # This makes sure the nromal points upwards
-        if normal.z < 0:
-            normal = Vector(-normal.x, -normal.y, -normal.z)
-        origin = Point(*centroid)
-        return Plane(reference=origin, normal=Vector(*normal))
+        # Best-fit plane, normal pointing upwards
+        centroid, normal = fit_plane([[pt.x, pt.y, pt.z] for pt in pts])
+        return Plane(reference=Point(*centroid), normal=Vector(*normal))
 
     @Attribute(in_tree=True)
+    @profiled
     def roof_wire_2(self):
         pts = self.roof_pts
         projected_pts = [
@@ -152,6 +144,7 @@ class GableRoof(GeomBase):
                      LineSegment(projected_pts[1], projected_pts[0])])
 
     @Attribute(in_tree=True)
+    @profiled
     def roof_wire_2_solid(self):
         pts = self.roof_pts
         projected_pts = [
@@ -177,6 +170,7 @@ class GableRoof(GeomBase):
                      LineSegment(projected_pts[3], projected_pts[0])])
 
     @Attribute
+    @profiled
     def roof_faces(self):
         return [Face(self.roof_wire_1), Face(self.roof_wire_2)]
 
@@ -7,10 +7,18 @@ from SolarPanelArray import SolarPanelArray
 from parapy.exchange.step import STEPWriter
 from Summary import Summary
 from TextWriter import TextWriter
+import Irradiance as irradiance
+from IrradianceGrid import irradiance_grid
+from PlacementEngine import DEFAULT_STRATEGIES, RASTER_CELL, SEARCH_TIME
+from ExactPlacement import EXACT_GRID, EXACT_TIME_LIMIT
+from FootprintGeometry import extended_intersections
+from BudgetAllocation import allocate_budget
+from Profiler import profile_attributes, profiled
 
 
 
 
+@profile_attributes
 class House(Base):
     """
     High-level class that ties the whole program together.
@@ -36,8 +44,58 @@ class House(Base):
     budget : float
         Maximum amount (EUR) available for PV installation. This si a first estimate, will
         deviate from the final cost.
+    budget_allocation : {'greedy', 'global'}, default 'greedy'
+        How the budget is divided over the roof faces.  ``'greedy'`` fills
+        the faces in order using a rough area estimate; ``'global'`` buys
+        panels on all faces by highest kWh per EUR (see
+        :func:`allocate_budget`).
     electrical_efficiency : float
         Static, user-tunable DC/AC efficiency factor (η\_AC).
+    loss : float, default 18 %
+        Loss factor of the solar panels, passed to every roof face.
+    irradiance_backend : {'pvgis', 'local'}, default 'pvgis'
+        Radiation source for all roof faces: the PVGIS web API or the
+        offline :class:`LocalIrradiance` model.
+    radiation_lookup : bool, default False
+        Build one tilt/azimuth radiation table per location and interpolate
+        every roof face / heuristic from it instead of separate queries.
+    strategies : list[dict], default ``DEFAULT_STRATEGIES``
+        Placement heuristics evaluated on every roof face, e.g. add
+        ``{'name': 'Wall +15', 'align': 'wall', 'sections': 2, 'offset': 15}``.
+        ``DEFAULT_STRATEGIES + LAYOUT_STRATEGIES`` also tries staggered rows
+        and portrait or mixed panel orientation.
+    execution : {'serial', 'process'}, default 'serial'
+        ``'process'`` evaluates the placement heuristics of every roof face
+        in parallel worker processes (one per CPU core).
+    packer : {'shapely', 'raster', 'rows'}, default 'shapely'
+        Fit tests of the placement engine: exact Shapely containment, a
+        rasterized occupancy grid of every roof face (x at cell
+        resolution), or the best panel mix per row by dynamic programming.
+    raster_cell : float, default 0.05
+        Cell size (m) of the ``'raster'`` packer.
+    refine_budget : bool, default False
+        Place strategies again under the face budget instead of only
+        trimming their unlimited placement.
+    placement_mode : {'heuristic', 'exact'}, default 'heuristic'
+        ``'exact'`` also solves the panel placement of every roof face as
+        an integer program (needs the optional ``ortools`` package).
+    exact_objective : {'yield', 'count'}, default 'yield'
+        Maximise the panel area or panel count in ``'exact'`` mode.
+    exact_time_limit : float, default 30
+        Time limit (s) per roof face in ``'exact'`` mode, model building
+        included.
+    exact_grid : float, default 0.25
+        Spacing (m) of the candidate panel positions in ``'exact'`` mode.
+    phase_search : bool, default False
+        Let every placement strategy also try shifted panel grids and
+        slightly rotated azimuths and keep the best one.
+    search_time : float, default 2
+        Time budget (s) of the phase search per roof face.
+    osm_source : str, optional
+        Local OSM extract (``.gpkg`` / ``.osm.pbf``) used by :class:`Map`
+        instead of live OSM queries.
+    address_table : str, optional
+        CSV (``address, lat, lon``) for offline geocoding with *osm_source*.
     base_height : float
         Total extrusion height (= ``floors * floor_height``).
 
@@ -47,6 +105,13 @@ class House(Base):
         Footprint vertices expressed in a local XY frame (z = 0).
     extended_pts : list[parapy.geom.Point]
         Extra point used to construct gable roof.
+    optimal_angles : list[float]
+        ``[azimuth, tilt]`` for the house location, requested once and shared
+        by all roof faces (and persisted in the cache).
+    radiation_prefetch : dict
+        Distinct radiation queries of all roof faces, fetched concurrently
+        into the cache before the placement is evaluated
+        (:func:`Irradiance.prefetch_series`); failed queries map to None.
     summary_info : list[int, float, int]
         List of the total solar panel cost, usable power generated and yearly money saved.
     Parts
@@ -75,15 +140,34 @@ class House(Base):
     address = Input()
     floors = Input() # nr of storeys, not including the roof
     budget = Input() # EUR, budget for solar panel installation
+    budget_allocation = Input('greedy') # 'greedy' (per face in order) or 'global' (by marginal yield)
     electrical_efficiency = Input(0.98)
     floor_height = Input(2.0)
+    loss = Input(18) # Loss factor of the solar panels, passed to PVGIS
+    irradiance_backend = Input('pvgis') # 'pvgis' (web API) or 'local' (offline model)
+    radiation_lookup = Input(False) # Interpolate radiation from a per-location table
+    strategies = Input(DEFAULT_STRATEGIES) # Placement heuristics evaluated on every roof face
+    execution = Input('serial') # 'serial' or 'process' (heuristics in worker processes)
+    packer = Input('shapely') # 'shapely', 'raster' or 'rows' packer of the placement engine
+    raster_cell = Input(RASTER_CELL) # Cell size (m) of the raster packer
+    refine_budget = Input(False) # Place strategies again under the budget instead of only trimming them
+    placement_mode = Input('heuristic') # 'heuristic' or 'exact' (integer program, needs ortools)
+    exact_objective = Input('yield') # 'yield' (panel area) or 'count', exact mode only
+    exact_time_limit = Input(EXACT_TIME_LIMIT) # Solver time limit (s) per face, exact mode only
+    exact_grid = Input(EXACT_GRID) # Spacing (m) of candidate positions, exact mode only
+    phase_search = Input(False) # Search grid offsets and azimuth jitter per strategy
+    search_time = Input(SEARCH_TIME) # Time budget (s) of the phase search per face
+    osm_source = Input(None) # Local OSM extract instead of the osmnx API
+    address_table = Input(None) # Local geocoding table for osm_source
 
     @Attribute
+    @profiled
     def base_height(self):
         return self.floors * self.floor_height
 
 
     @Attribute
+    @profiled
     def base_pts(self):
         # list of tuples (x, y) defining the footprint of house polygon
         coords = list(self.map.footprint.exterior.coords)
@@ -98,37 +182,14 @@ class House(Base):
 
     # Extended points are used to construct gable roofs
     # These points are teh intersections of the base polygon edges
+    # (evaluated for all edge pairs at once, see FootprintGeometry)
     @Attribute
+    @profiled
     def extended_intersections(self):
-        intersections = []
-        base_xy = {(round(p.x, 6), round(p.y, 6)) for p in self.base_pts}
-
-        for i in range(len(self.base_pts) - 1):
-            for j in range(i + 1, len(self.base_pts) - 1):
-                a1, a2 = self.base_pts[i], self.base_pts[i + 1]
-                b1, b2 = self.base_pts[j], self.base_pts[j + 1]
-                denom = (a1.x - a2.x) * (b1.y - b2.y) - (a1.y - a2.y) * (b1.x - b2.x)
-                if abs(denom) > 1e-6:
-                    px = ((a1.x * a2.y - a1.y * a2.x) * (b1.x - b2.x) - (a1.x - a2.x) * (
-                                b1.x * b2.y - b1.y * b2.x)) / denom
-                    py = ((a1.x * a2.y - a1.y * a2.x) * (b1.y - b2.y) - (a1.y - a2.y) * (
-                                b1.x * b2.y - b1.y * b2.x)) / denom
-
-                    def on_segment(p, q1, q2):
-                        min_x, max_x = min(q1.x, q2.x), max(q1.x, q2.x)
-                        min_y, max_y = min(q1.y, q2.y), max(q1.y, q2.y)
-                        return min_x - 1e-6 <= p.x <= max_x + 1e-6 and min_y - 1e-6 <= p.y <= max_y + 1e-6
-
-                    def snap(val, res=0.05):
-                        return round(val / res) * res
-
-                    p = Point(snap(px), snap(py), 0)
-                    key = (round(p.x, 6), round(p.y, 6))
-                    if key not in base_xy and (on_segment(p, a1, a2) or on_segment(p, b1, b2)):
-                        intersections.append(p)
-        return intersections
+        return [Point(x, y, 0) for x, y in extended_intersections([(p.x, p.y) for p in self.base_pts])]
 
     @Attribute
+    @profiled
     def combined_points(self):
         return self.base_pts[:-1] + self.extended_intersections
 
@@ -136,6 +197,7 @@ class House(Base):
     # It is used to extrude the base solid
     # And consists of line segments connecting the base points
     @Attribute
+    @profiled
     def base_wire(self):
         segments = [LineSegment(start=self.base_pts[i], end=self.base_pts[i + 1])
                     for i in range(len(self.base_pts) - 1)]
@@ -145,9 +207,19 @@ class House(Base):
     # The face budgets are estimations based on the roof faces
     # and the budget available for solar panel installation.
     @Attribute
+    @profiled
     def face_budgets(self):
+        return self.split_budget(self.budget)
+
+    # Budget per face for any total budget, see budget_allocation
+    def split_budget(self, budget):
+        if self.budget_allocation == 'global':
+            return self.global_face_budgets(budget)
+        if self.budget_allocation != 'greedy':
+            raise ValueError(f"budget_allocation must be 'greedy' or 'global', got {self.budget_allocation!r}.")
+
         budgets = []
-        remaining = self.budget
+        remaining = budget
 
         for face in self.roof.roof_faces:
             n = face.plane_normal.normalized
@@ -172,7 +244,43 @@ class House(Base):
             budgets.append(0)
         return budgets
 
+    # Budget per face from the yield curves of all faces at once. Each face
+    # gets exactly the cost of the panels chosen for it, so its placement
+    # reproduces them; the curves themselves do not depend on the budget.
+    def global_face_budgets(self, budget):
+        curves = [array.solution.yield_curve for array in self.solar_panel_arrays]
+        spent, counts = allocate_budget(curves, budget)
+        for i, (cost, count) in enumerate(zip(spent, counts)):
+            print(f"Face {i + 1}: {count} of {len(curves[i])} panels, budget {cost:.2f}")
+        return spent
+
+    # Optimal angles only depend on the location (and loss), so they are
+    # requested once per house and injected into every roof face
+    @Attribute
+    @profiled
+    def optimal_angles(self):
+        return irradiance.optimal_angles(self.map.coords, self.loss, backend=self.irradiance_backend)
+
+    # Fetch the radiation of every roof face concurrently before any face
+    # starts ranking its heuristics (each face would otherwise block on its
+    # own PVGIS calls one after the other).
     @Attribute
+    @profiled
+    def radiation_prefetch(self):
+        if len(self.solar_panel_arrays) == 0:
+            return {}
+        if self.radiation_lookup:
+            # All faces are interpolated from one table, build that instead
+            irradiance_grid(self.map.coords, self.loss, backend=self.irradiance_backend)
+            return {}
+        queries = []
+        for array in self.solar_panel_arrays:
+            for tilt, azimuth in array.solution.radiation_queries:
+                queries.append((array.solution.coords, tilt, azimuth, array.solution.loss))
+        return irradiance.prefetch_series(queries, backend=self.irradiance_backend)
+
+    @Attribute
+    @profiled
     def summary_info(self):
         # Total cost of all solar panel arrays
         total_cost = 0
@@ -181,14 +289,42 @@ class House(Base):
             total_cost += array.solution.best_result[0][5]
             # Total annual solar radiation
             total_radiation += array.solution.annual_solar_radiation
-        usable_energy = self.solar_panel_arrays[0].loss/100 * self.electrical_efficiency * total_radiation
+        return self.summarize(total_cost, total_radiation)
+
+    # (total_cost, usable_energy, money_saved) from cost and annual radiation
+    def summarize(self, total_cost, total_radiation):
+        usable_energy = self.loss/100 * self.electrical_efficiency * total_radiation
         # Money saved per year from solar panels assuming cost of kwh is 0.3 EUR
         money_saved = usable_energy * 0.3
 
         return total_cost, usable_energy, money_saved
 
+    def budget_sweep(self, budgets):
+        """
+        :pyattr:`summary_info` for every budget in ``budgets``, without
+        changing :pyattr:`budget`.  All budgets share the placement sequences
+        and one set of radiation lookups: per face and budget, every
+        sequence is only trimmed to the budget in O(n)
+        (:meth:`PlacementEngine.budgeted`), no panels are placed again.
+
+        Returns a list of dicts with ``budget``, ``total_cost``,
+        ``usable_energy`` (kWh/year) and ``money_saved`` (EUR/year).
+        """
+        sweep = []
+        for budget in budgets:
+            total_cost = 0
+            total_radiation = 0
+            for array, face_budget in zip(self.solar_panel_arrays, self.split_budget(budget)):
+                cost, radiation = array.solution.evaluate_budget(face_budget)
+                total_cost += cost
+                total_radiation += radiation
+            total_cost, usable_energy, money_saved = self.summarize(total_cost, total_radiation)
+            sweep.append({'budget': budget, 'total_cost': total_cost,
+                          'usable_energy': usable_energy, 'money_saved': money_saved})
+        return sweep
 
     @Attribute
+    @profiled
     def solar_panel_details(self):
         details = []
         for array in self.solar_panel_arrays:
@@ -212,7 +348,7 @@ class House(Base):
 
     @Part
     def map(self):
-        return Map(address=self.address)
+        return Map(address=self.address, osm_source=self.osm_source, address_table=self.address_table)
 
     # Mark the roof vertexes in the GUI, user can use these for refrence
     # When generating a gable roof
@@ -232,7 +368,23 @@ class House(Base):
             quantify=len(self.roof.roof_faces),
             roof_face=self.roof.roof_faces[child.index],
             coords=self.map.coords,
-            budget=self.face_budgets[child.index])
+            budget=self.face_budgets[child.index],
+            irradiance_backend=self.irradiance_backend,
+            radiation_lookup=self.radiation_lookup,
+            loss=self.loss,
+            optimal_angles=self.optimal_angles,
+            radiation_prefetch=self.radiation_prefetch,
+            strategies=self.strategies,
+            execution=self.execution,
+            packer=self.packer,
+            raster_cell=self.raster_cell,
+            refine_budget=self.refine_budget,
+            placement_mode=self.placement_mode,
+            exact_objective=self.exact_objective,
+            exact_time_limit=self.exact_time_limit,
+            exact_grid=self.exact_grid,
+            phase_search=self.phase_search,
+            search_time=self.search_time)
 
     # The STEPWriter exports to a STEP file
     @Part
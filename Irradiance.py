@@ -0,0 +1,180 @@
+"""
+Irradiance backends used by :class:`OptimizedPlacement`.
+
+Two interchangeable backends answer the same two questions:
+
+* ``'pvgis'`` – the JRC PVGIS web API (``PVcalc`` / ``seriescalc``) via
+  the shared :class:`PVGISClient`, with the hourly series cached on disk by
+  :class:`PVGISCache`.  Failures raise :class:`PVGISError`.
+* ``'local'`` – the offline :class:`LocalIrradiance` model, which needs no
+  network at all.
+
+Angles follow the PVGIS convention (azimuth 0° = south, tilt 0° = flat).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PVGISCache import pvgis_cache, hourly_to_array, components_to_array
+from PVGISClient import pvgis_client, PVGISError
+from LocalIrradiance import local_irradiance
+from Profiler import profiler
+
+BACKENDS = ('pvgis', 'local')
+
+
+def check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown irradiance backend {backend!r}, "
+                         f"choose one of {', '.join(BACKENDS)}.")
+
+
+_optimal_angles = {}
+
+
+# Optimal tilt and azimuth for a [lat, lon] pair, returned as [azimuth, tilt].
+# The answer only depends on location, loss and backend, so it is memoized
+# in memory and persisted in the PVGIS cache across sessions.
+def optimal_angles(coords, loss, backend='pvgis'):
+    check_backend(backend)
+    key = (round(coords[0], 6), round(coords[1], 6), loss, backend)
+    if key in _optimal_angles:
+        profiler.count("optimal_angles.memo_hit")
+        return list(_optimal_angles[key])
+
+    peakpower_kwp = 1  # IGNORE, Not important for optimal angles
+    params = {
+        'lat': coords[0],
+        'lon': coords[1],
+        'outputformat': 'json',
+        'mountingplace': 'building',
+        'peakpower': peakpower_kwp,
+        'loss': loss,
+        'optimalangles': 1,
+        'usehorizon': 1
+    }
+    endpoint = pvgis_client.url("PVcalc") if backend == 'pvgis' else 'local-optimal-angles'
+    if backend == 'local':
+        params['clearness'] = local_irradiance.clearness_at(coords[0])  # model setting, part of the key
+    angles = pvgis_cache.get(endpoint, params)
+    if angles is None:
+        if backend == 'local':
+            angles = local_irradiance.optimal_angles(coords[0], coords[1])
+        else:
+            data = pvgis_client.get_json("PVcalc", params)
+            optimal_tilt = data['inputs']['mounting_system']['fixed']['slope']['value']
+            optimal_azimuth = data['inputs']['mounting_system']['fixed']['azimuth']['value']
+            angles = [optimal_azimuth, optimal_tilt]
+        pvgis_cache.put(endpoint, params, angles)
+
+    _optimal_angles[key] = tuple(angles)
+    return list(angles)
+
+
+# Hourly series (HOURLY_DTYPE records) on a plane with the given (normalized)
+# tilt and azimuth. Raises PVGISError when PVGIS does not deliver any data.
+def hourly_series(coords, tilt, azimuth, loss, backend='pvgis'):
+    check_backend(backend)
+    if backend == 'local':
+        return local_irradiance.hourly(coords[0], coords[1], tilt, azimuth)
+
+    radiation_url = pvgis_client.url("seriescalc")
+    params = {
+        'lat': coords[0],  # Latitude
+        'lon': coords[1],  # Longitude
+        'angle': tilt,  # Panel tilt (slope)
+        'aspect': azimuth,  # Panel azimuth
+        'outputformat': 'json',
+        'pvcalculation': 1,
+        'peakpower': 1,
+        'loss': loss,  # Loss factor unimportant for radiation
+        'usehorizon': 1
+    }
+
+    # Identical requests are answered from the on-disk cache
+    series = pvgis_cache.get_array(radiation_url, params)
+    if series is not None:
+        return series
+
+    data = pvgis_client.get_json("seriescalc", params)
+    hourly_data = data.get('outputs', {}).get('hourly', [])
+    if not hourly_data:
+        raise PVGISError("No hourly data in radiation response")
+    series = hourly_to_array(hourly_data)
+    pvgis_cache.put_array(radiation_url, params, series)
+    return series
+
+
+# Hourly irradiance components on the horizontal plane, ready for
+# LocalIrradiance.transpose: solar position plus ghi, dni and dhi (W/m²)
+# per time step.  With PVGIS these are the measured beam and diffuse
+# components of one horizontal seriescalc (all years, cached on disk), so
+# any number of tilted planes costs a single request.
+def horizontal_components(coords, loss, backend='pvgis'):
+    check_backend(backend)
+    if backend == 'local':
+        return local_irradiance.components(coords[0], coords[1])
+
+    radiation_url = pvgis_client.url("seriescalc")
+    params = {
+        'lat': coords[0],
+        'lon': coords[1],
+        'angle': 0,
+        'aspect': 0,
+        'outputformat': 'json',
+        'components': 1,
+        'loss': loss,
+        'usehorizon': 1
+    }
+    series = pvgis_cache.get_array(radiation_url, params)
+    if series is None:
+        data = pvgis_client.get_json("seriescalc", params)
+        hourly_data = data.get('outputs', {}).get('hourly', [])
+        if not hourly_data:
+            raise PVGISError("No hourly data in radiation response")
+        series = components_to_array(hourly_data)
+        pvgis_cache.put_array(radiation_url, params, series)
+
+    result = local_irradiance.solar_position(coords[0], coords[1], series['day'].astype(float),
+                                             series['hour'].astype(float))
+    beam = series['Gb(i)'].astype(float)
+    diffuse = series['Gd(i)'].astype(float)
+    # Beam measured while the modelled sun is (nearly) down cannot be
+    # turned into a normal irradiance; count it as diffuse instead
+    up = result['cos_zenith'] > 0.01745
+    result.update({
+        'ghi': beam + diffuse,
+        'dni': np.where(up, beam / np.where(up, result['cos_zenith'], 1), 0),
+        'dhi': diffuse + np.where(up, 0, beam),
+    })
+    return result
+
+
+# Key of a (coords, tilt, azimuth, loss) query in the result of prefetch_series
+def series_key(coords, tilt, azimuth, loss):
+    return round(coords[0], 6), round(coords[1], 6), round(tilt, 6), round(azimuth, 6), loss
+
+
+# Fetch many (coords, tilt, azimuth, loss) queries concurrently so they are
+# in the cache before the placement heuristics ask for them one by one.
+# Duplicates are dropped; concurrency is capped by the shared PVGISClient.
+# Returns {series_key: series}, with None for queries that failed, so one
+# failed query does not stop the others.
+def prefetch_series(queries, backend='pvgis'):
+    check_backend(backend)
+    if backend == 'local':
+        return {}  # computed on the fly, nothing to fetch
+
+    unique = {}
+    for coords, tilt, azimuth, loss in queries:
+        unique[series_key(coords, tilt, azimuth, loss)] = (coords, tilt, azimuth, loss)
+
+    def fetch(query):
+        coords, tilt, azimuth, loss = query
+        try:
+            return hourly_series(coords, tilt, azimuth, loss, backend=backend)
+        except PVGISError as e:
+            print(f"Prefetch of tilt {tilt}, azimuth {azimuth} failed: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=pvgis_client.max_concurrent) as pool:
+        return dict(zip(unique, pool.map(fetch, unique.values())))
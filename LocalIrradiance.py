@@ -0,0 +1,217 @@
+import numpy as np
+from PVGISCache import HOURLY_DTYPE
+from Profiler import profiler
+
+# All-sky / clear-sky ratio of the horizontal irradiation per absolute
+# latitude, fitted to typical annual totals of European sites (about 1900
+# kWh/m² in Andalusia, 1750 in Madrid, 1200 in Munich, 1050 in the
+# Netherlands and 930 in southern Scandinavia)
+CLEARNESS_BY_LATITUDE = ((36, 0.86), (40, 0.84), (44, 0.73), (48, 0.65), (52, 0.60), (56, 0.63), (60, 0.63))
+
+
+class LocalIrradiance:
+    """
+    Offline plane-of-array irradiance model that can stand in for the PVGIS
+    ``seriescalc`` / ``PVcalc`` endpoints.
+
+    Over one hourly (non-leap) year the model computes:
+
+    1.  The solar position (NOAA / Spencer series for declination and
+        equation of time).
+    2.  Clear-sky global horizontal irradiance (Haurwitz) and its split into
+        direct and diffuse parts (Erbs correlation).
+    3.  A climatological mix of clear and overcast skies, so that the
+        all-sky irradiation equals the clearness (see
+        :meth:`clearness_at`) times the clear-sky one.
+    4.  The transposition onto the tilted plane (Hay-Davies sky diffuse,
+        isotropic ground reflection).
+
+    Everything is vectorised over the 8760 hours; tilt and azimuth may be
+    NumPy arrays, in which case one series per orientation is returned.
+
+    Parameters
+    ----------
+    clearness : float, optional
+        Ratio of all-sky to clear-sky horizontal irradiation.  By default
+        it is interpolated from ``CLEARNESS_BY_LATITUDE``, which gives
+        roughly 1000-1100 kWh/m²/year in the Netherlands and 1700-1800 in
+        Madrid; pass a number to use one value everywhere.
+    overcast : float, default 0.25
+        Fraction of the clear-sky irradiance that reaches the ground (as
+        diffuse light only) under an overcast sky.
+    albedo : float, default 0.2
+        Ground reflectance used for the ground-reflected component.
+    year : int, default 2019
+        Only used as label in the ``year`` column of the series.
+
+    Notes
+    -----
+    * Angles follow the PVGIS convention: tilt 0° is horizontal, azimuth
+      (``aspect``) 0° is south, -90° east and 90° west.
+    * Horizon shading (PVGIS ``usehorizon``) is not modelled, so the local
+      backend is slightly optimistic in hilly or built-up areas.
+    * The latitude table is fitted to Europe (36-60°, the nearest value is
+      used outside it).  Climates that differ a lot at the same latitude,
+      e.g. deserts or the tropics, need an explicit ``clearness``.
+    """
+
+    def __init__(self, clearness=None, overcast=0.25, albedo=0.2, year=2019):
+        self.clearness = clearness
+        self.overcast = overcast
+        self.albedo = albedo
+        self.year = year
+        self._components = {}
+
+    def clearness_at(self, lat):
+        """All-sky / clear-sky irradiation ratio used at latitude ``lat``."""
+        if self.clearness is not None:
+            return self.clearness
+        latitudes, values = zip(*CLEARNESS_BY_LATITUDE)
+        return float(np.interp(abs(lat), latitudes, values))
+
+    # Horizontal irradiance components and solar position for one location.
+    # Depends on location only, so it is computed once and reused for every
+    # tilt / azimuth query at that location.
+    def components(self, lat, lon):
+        key = (round(lat, 6), round(lon, 6))
+        if key in self._components:
+            profiler.count("local_irradiance.hit")
+            return self._components[key]
+        profiler.count("local_irradiance.miss")
+
+        hours = np.arange(8760)
+        day = hours // 24 + 1
+        hour_utc = hours % 24 + 0.5  # middle of every hour
+        result = self.solar_position(lat, lon, day, hour_utc)
+        cos_zenith, extraterrestrial = result['cos_zenith'], result['extraterrestrial']
+        up = cos_zenith > 0
+        mu = np.where(up, cos_zenith, 1)
+
+        clear_ghi = np.where(up, 1098 * mu * np.exp(-0.057 / mu), 0)
+
+        # Erbs diffuse fraction from the clear-sky clearness index
+        kt = np.clip(np.where(up, clear_ghi / (extraterrestrial * mu), 0), 0, 1)
+        diffuse_fraction = np.where(
+            kt <= 0.22, 1 - 0.09 * kt,
+            np.where(kt <= 0.8,
+                     0.9511 - 0.1604 * kt + 4.388 * kt ** 2 - 16.638 * kt ** 3 + 12.336 * kt ** 4,
+                     0.165))
+        clear_dhi = clear_ghi * diffuse_fraction
+        clear_dni = np.where(up, (clear_ghi - clear_dhi) / mu, 0)
+
+        # Mix of clear and fully overcast (purely diffuse) skies that gives
+        # the requested overall clearness
+        clearness = self.clearness_at(lat)
+        sunny = (clearness - self.overcast) / (1 - self.overcast)
+        result.update({
+            'ghi': clearness * clear_ghi,
+            'dni': sunny * clear_dni,
+            'dhi': sunny * clear_dhi + (1 - sunny) * self.overcast * clear_ghi,
+            'day': day,
+            'hour_utc': hour_utc,
+        })
+        self._components[key] = result
+        return result
+
+    # Solar position for day-of-year / UTC hour arrays: cos and sin of the
+    # zenith angle (cos 0 at night), sun azimuth and extraterrestrial
+    # irradiance
+    @staticmethod
+    def solar_position(lat, lon, day, hour_utc):
+        gamma = 2 * np.pi / 365 * (day - 1 + (hour_utc - 12) / 24)
+        eq_time = 229.18 * (0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+                            - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma))
+        decl = (0.006918 - 0.399912 * np.cos(gamma) + 0.070257 * np.sin(gamma)
+                - 0.006758 * np.cos(2 * gamma) + 0.000907 * np.sin(2 * gamma)
+                - 0.002697 * np.cos(3 * gamma) + 0.00148 * np.sin(3 * gamma))
+
+        true_solar_time = hour_utc * 60 + eq_time + 4 * lon  # minutes
+        hour_angle = np.radians(true_solar_time / 4 - 180)
+        phi = np.radians(lat)
+
+        cos_zenith = np.sin(phi) * np.sin(decl) + np.cos(phi) * np.cos(decl) * np.cos(hour_angle)
+        cos_zenith = np.clip(cos_zenith, -1, 1)
+        sin_zenith = np.sqrt(1 - cos_zenith ** 2)
+        # Measured from south, positive towards west (same as PVGIS aspect)
+        sun_azimuth = np.arctan2(np.sin(hour_angle),
+                                 np.cos(hour_angle) * np.sin(phi) - np.tan(decl) * np.cos(phi))
+
+        extraterrestrial = 1361 * (1 + 0.033 * np.cos(2 * np.pi * day / 365))
+        return {
+            'cos_zenith': np.maximum(cos_zenith, 0),
+            'sin_zenith': sin_zenith,
+            'sun_azimuth': sun_azimuth,
+            'extraterrestrial': extraterrestrial,
+        }
+
+    def poa_irradiance(self, lat, lon, tilt, azimuth):
+        """
+        Global irradiance on the inclined plane G(i) in W/m² for every hour.
+        ``tilt`` and ``azimuth`` (degrees) may be arrays of equal shape; the
+        result then has that shape plus a trailing axis of 8760 hours.
+        """
+        return self.transpose(self.components(lat, lon), tilt, azimuth)
+
+    def transpose(self, c, tilt, azimuth):
+        """
+        Global irradiance on the inclined plane G(i) in W/m² from horizontal
+        components ``c`` (:meth:`solar_position` plus ``ghi``, ``dni`` and
+        ``dhi`` per time step, modelled by :meth:`components` or measured,
+        see :func:`Irradiance.horizontal_components`).  Broadcasts like
+        :meth:`poa_irradiance`.
+        """
+        beta = np.radians(np.asarray(tilt, dtype=float))[..., np.newaxis]
+        aspect = np.radians(np.asarray(azimuth, dtype=float))[..., np.newaxis]
+
+        cos_aoi = (c['cos_zenith'] * np.cos(beta)
+                   + c['sin_zenith'] * np.sin(beta) * np.cos(c['sun_azimuth'] - aspect))
+        cos_aoi = np.maximum(cos_aoi, 0)
+        cos_aoi = np.where(c['cos_zenith'] > 0, cos_aoi, 0)
+
+        beam = c['dni'] * cos_aoi
+        anisotropy = c['dni'] / c['extraterrestrial']
+        rb = cos_aoi / np.maximum(c['cos_zenith'], 0.01745)  # cap at 89° zenith
+        sky_diffuse = c['dhi'] * (anisotropy * rb + (1 - anisotropy) * (1 + np.cos(beta)) / 2)
+        ground = c['ghi'] * self.albedo * (1 - np.cos(beta)) / 2
+        return beam + sky_diffuse + ground
+
+    # Same record layout as a cached PVGIS seriescalc response
+    def hourly(self, lat, lon, tilt, azimuth):
+        c = self.components(lat, lon)
+        series = np.zeros(8760, dtype=HOURLY_DTYPE)
+        series['year'] = self.year
+        series['G(i)'] = self.poa_irradiance(lat, lon, tilt, azimuth)
+        # Crude climatology, only kept so the series is complete
+        series['T2m'] = (10 - 8 * np.cos(2 * np.pi * (c['day'] - 15) / 365)
+                         - 3 * np.cos(2 * np.pi * (c['hour_utc'] + lon / 15 - 3) / 24))
+        series['WS10m'] = 3.0
+        return series
+
+    def optimal_angles(self, lat, lon):
+        """
+        Tilt and azimuth that maximise the annual irradiation, found with a
+        coarse 5° grid search refined on a 1° grid.  Returns
+        ``[azimuth, tilt]`` like the PVGIS-based optimal angles.
+        """
+        best_azimuth, best_tilt = 0.0, 0.0
+        for step, span in ((5, None), (1, 5)):
+            if span is None:
+                tilts = np.arange(0, 91, step)
+                azimuths = np.arange(-180, 180, step)
+            else:
+                tilts = np.arange(max(best_tilt - span, 0), min(best_tilt + span, 90) + 1, step)
+                azimuths = np.arange(best_azimuth - span, best_azimuth + span + 1, step)
+            tilt_grid, azimuth_grid = np.meshgrid(tilts, azimuths, indexing='ij')
+            annual = np.concatenate([
+                self.poa_irradiance(lat, lon, t, a).sum(axis=-1)
+                for t, a in zip(tilt_grid, azimuth_grid)
+            ])
+            i = int(np.argmax(annual))
+            best_tilt = float(tilt_grid.ravel()[i])
+            best_azimuth = float(azimuth_grid.ravel()[i])
+        best_azimuth = (best_azimuth + 180) % 360 - 180
+        return [best_azimuth, best_tilt]
+
+
+# Shared instance so the per-location components are computed only once
+local_irradiance = LocalIrradiance()
@@ -1,9 +1,11 @@
 from parapy.core import Input, Attribute, Part, child
 from parapy.geom import GeomBase, Point, Polygon, TextLabel
 import osmnx as ox
-from shapely.geometry import MultiPolygon
+from BuildingIndex import building_index
+from Profiler import profile_attributes, profiled, profiler
 
 
+@profile_attributes
 class Map(GeomBase):
     """
     Downloads and normalises nearby building footprints from **osmnx** API.
@@ -18,6 +20,13 @@ class Map(GeomBase):
     selected_building_index : int, default 0
         Index in :pyattr:`nearby_buildings` that will be exposed as the
         *primary* footprint (:pyattr:`footprint`).
+    osm_source : str, optional
+        Local OSM extract (``.gpkg`` / ``.osm.pbf``).  When given, the
+        buildings come from an in-memory :class:`BuildingIndex` of that file
+        instead of a live Overpass query, ordered by distance to *address*.
+    address_table : str, optional
+        CSV (``address, lat, lon``) used to geocode *address* offline
+        together with *osm_source*.
 
     Important attributes
     -------------
@@ -30,6 +39,9 @@ class Map(GeomBase):
         Same geometry, but projected to a *local* XY frame whose origin
         equals the first point of the primary footprint.  Ready to be
         rendered by :class:`parapy.geom.Polygon`.
+    projected_buildings : list[shapely.Polygon]
+        First polygon of every nearby building, projected once (as one
+        GeoDataFrame) to the UTM zone :pyattr:`utm_crs`.
     footprint : shapely.Polygon
         The *projected* footprint that downstream logic (Roof etc.)
         operates on.
@@ -44,53 +56,72 @@ class Map(GeomBase):
     address = Input()
     range = Input(5) # Defines the size of the clipping window in meters.
     selected_building_index = Input(0) # Default to the first building in the list.
+    osm_source = Input(None) # Local OSM extract, None queries the osmnx API
+    address_table = Input(None) # Local geocoding table for osm_source
 
     # get the OSM data for the given address, and turn into shapely geometries
     @Attribute
+    @profiled
     def house(self):
+        if self.osm_source is not None:
+            return building_index(self.osm_source, self.address_table).features_from_address(self.address,
+                                                                                             self.range)
         tags = {"building": True}
-        gdf = ox.features_from_address(self.address, tags=tags, dist=self.range)
+        with profiler.span("network:OSM features_from_address"):
+            gdf = ox.features_from_address(self.address, tags=tags, dist=self.range)
         return gdf[gdf.geometry.type.isin(['Polygon', 'MultiPolygon'])]
 
     @Attribute
+    @profiled
     def coords(self):
         center = self.house.geometry.iloc[0].centroid
         return [center.y, center.x]
 
     @Attribute
+    @profiled
     def nearby_buildings(self):
         shapes = self.house.geometry
         return list(shapes)
 
+    # UTM zone of the address, the one metric frame of all geometry
+    @Attribute
+    @profiled
+    def utm_crs(self):
+        return self.house.estimate_utm_crs()
+
+    # All nearby buildings projected to utm_crs in one vectorised call;
+    # outlines and footprint are derived from this instead of projecting
+    # every geometry separately
+    @Attribute
+    @profiled
+    def projected_house(self):
+        return self.house.to_crs(self.utm_crs)
+
+    # First polygon of every nearby building, in metres
+    @Attribute
+    @profiled
+    def projected_buildings(self):
+        return [geom if geom.geom_type == "Polygon" else list(geom.geoms)[0]
+                for geom in self.projected_house.geometry]
+
     # Get all the outline points of all the nearby buildings
     @Attribute
+    @profiled
     def building_outline_points(self):
-        results = []
-        reference_geom = self.nearby_buildings[0]
-        ref_poly = reference_geom if reference_geom.geom_type == "Polygon" else list(reference_geom.geoms)[0]
-        ref_proj, _ = ox.projection.project_geometry(ref_poly)
-        origin_x, origin_y = ref_proj.exterior.coords[0]
-
-        for geom in self.nearby_buildings:
-            geom = geom if geom.geom_type == "Polygon" else list(geom.geoms)[0]
-            projected_geom, _ = ox.projection.project_geometry(geom)
-            coords = [(x - origin_x, y - origin_y) for x, y in projected_geom.exterior.coords]
-            points = [Point(x, y, 0) for x, y in coords]
-            results.append(points)
-        return results
+        origin_x, origin_y = self.projected_buildings[0].exterior.coords[0]
+        return [[Point(x - origin_x, y - origin_y, 0) for x, y in poly.exterior.coords]
+                for poly in self.projected_buildings]
 
     @Attribute
+    @profiled
     def building_outline_centroids(self):
         return [Polygon(points=pts).cog for pts in self.building_outline_points]
 
     # The primary footprint is the one selected by the user
     @Attribute
+    @profiled
     def footprint(self):
-        geom = self.nearby_buildings[self.selected_building_index] # INPUT USED HERE
-        if isinstance(geom, MultiPolygon):
-            geom = list(geom.geoms)[0]
-        projected_geom, _ = ox.projection.project_geometry(geom)
-        return projected_geom
+        return self.projected_buildings[self.selected_building_index] # INPUT USED HERE
 
     @Part
     def building_outlines(self):
@@ -1,13 +1,20 @@
 from parapy.core import Base, Input, Attribute
-import requests
 from parapy.geom import Rectangle, Face, Point, Vector, Position, Orientation
 from shapely.geometry import Polygon as ShapelyPolygon
 from shapely.geometry import Point as ShapelyPoint
-from shapely.geometry import box
 from shapely.affinity import rotate as shapely_rotate
 import math
+from PVGISCache import daily_totals, annual_totals
+from PlacementEngine import (PlacementEngine, DEFAULT_STRATEGIES, PANEL_SPECS, RASTER_CELL, SEARCH_TIME, MAX_JITTER,
+                             projected_panels)
+import Irradiance as irradiance
+from PVGISClient import PVGISError
+from IrradianceGrid import irradiance_grid
+from ExactPlacement import solve_exact, EXACT_GRID, EXACT_TIME_LIMIT
+from Profiler import profile_attributes, profiled
 
 
+@profile_attributes
 class OptimizedPlacement(Base):
     """
     Heavy-duty optimisation helper that decides **how many**, **which
@@ -17,9 +24,9 @@ class OptimizedPlacement(Base):
     --------
     1.  The roof face is flattened (if necessary) so that Shapely can
         operate in 2-D.
-    2.  Four alternative heuristics try to fill the available polygon
-        with rectangular panels (with / without sectioning, at wall-
-        aligned or optimal PVGIS azimuth).
+    2.  Alternative heuristics (by default four: with / without
+        sectioning, at wall-aligned or optimal PVGIS azimuth) try to fill
+        the available polygon with rectangular panels.
         Each heuristic returns    *(placements, area, azimuth, …)*.
     3.  For every heuristic a call to PVGIS `seriescalc` estimates the
         daily irradiation → kWh.  The method with the highest yield (or
@@ -37,20 +44,68 @@ class OptimizedPlacement(Base):
         Maximum amount (EUR) that may be spent on this face.
     loss : float, default 18 %
         Loss factor of solar panels only which is passed straight to PVGIS.
+    irradiance_backend : {'pvgis', 'local'}, default 'pvgis'
+        Source of optimal angles and radiation: the PVGIS web API or the
+        offline :class:`LocalIrradiance` model (no network needed).
+    radiation_lookup : bool, default False
+        Answer radiation queries from a per-location tilt/azimuth table
+        (:class:`IrradianceGrid`, built once from a single horizontal
+        series) instead of one series per query.
+    optimal_angles : list[float], optional
+        ``[azimuth, tilt]`` from PVGIS for this location.  Defaults to its
+        own (memoized) request; :class:`House` injects the shared value.
+    radiation_prefetch : dict, optional
+        Result of :pyattr:`House.radiation_prefetch`.  Read to make sure
+        the radiation of all roof faces is fetched concurrently (into the
+        cache) before this face starts ranking its heuristics; azimuths
+        whose prefetch failed are skipped without a second request.
+    strategies : list[dict], default ``DEFAULT_STRATEGIES``
+        Placement heuristics to evaluate, see *Heuristics* below.
+    execution : {'serial', 'process'}, default 'serial'
+        Run the strategies one after the other, or concurrently in a shared
+        process pool (one CPU core per strategy).
+    packer : {'shapely', 'raster', 'rows'}, default 'shapely'
+        Fit tests of the placement engine: exact Shapely containment, an
+        occupancy grid of the roof (x at cell resolution, up to one cell
+        conservative along slanted edges and not generally faster, see
+        :func:`place_section_raster`), or a row
+        solver choosing the best panel mix per row (see
+        :func:`place_section_rows`).
+    raster_cell : float, default 0.05
+        Cell size (m) of the ``'raster'`` packer.
+    refine_budget : bool, default False
+        Place every strategy whose panels the budget cannot pay again with
+        the budget (see :meth:`PlacementEngine.budgeted`).  Helps the
+        ``'rows'`` packer; costs a placement run per budget change.
+    placement_mode : {'heuristic', 'exact'}, default 'heuristic'
+        ``'exact'`` additionally solves the placement of the best heuristic
+        as an integer program (:func:`solve_exact`, needs ``ortools``),
+        warm-started from that heuristic and bounded by a time limit.
+    exact_objective : {'yield', 'count'}, default 'yield'
+        Maximise the panel area (yield) or panel count in ``'exact'`` mode.
+    exact_time_limit : float, default 30
+        Time limit (s) per roof face in ``'exact'`` mode, including building
+        the candidates and the model.
+    exact_grid : float, default 0.25
+        Spacing (m) of the candidate panel positions in ``'exact'`` mode.
+    phase_search : bool, default False
+        Let every strategy keep the best of many shifted grids and slightly
+        rotated azimuths (within 2 degrees), see :meth:`PlacementEngine.search`.
+    search_time : float, default 2
+        Time budget (s) of the phase search per roof face.
 
     Important attributes
     -----------------
     roof_poly : ShapelyPolygon
         2D polygon of roof face that is used to find the best solar panel setup.
-    optimal_angle : tuple(float)
-        PVGIS call to find the optimal tilt and azimuth angles for this face's
-        longitude and latitude.
     calculate_solar_radiation : float
         PVGIS call to calculate the daily solar radiation of a solar panel
         array. It handles errors when given input angles are not normalized.
     find_closest_direction : float
         Calculates the closest direction to the optimal azimuth for a specific
         roof face. This way, wall-aligned solar panels are oriented correctly.
+    radiation_queries : list[tuple(float, float)]
+        Normalized (tilt, azimuth) pairs the heuristics need radiation for.
     panel_specs : dict{key : float}
         Defines the length, width, height and cost of three different types
         of solar panels common in europe.
@@ -60,27 +115,47 @@ class OptimizedPlacement(Base):
 
     Heuristics
     -----------------
-    optimize_method_1 : tuple(placements[dict], proj_area, azimuth, rot_angle, name, total_cost)
-        Places the solar panels aligned with the wall of the roof face.
-        First divides the roof face into sections before placement.
-    optimize_method_2 : tuple(placements[dict], proj_area, azimuth, rot_angle, name, total_cost)
-        Places the solar panels aligned with the wall of the roof face.
-    optimize_method_3 : tuple(placements[dict], proj_area, azimuth, rot_angle, name, total_cost)
-        Places the solar panels in their optimal azimuth position.
-    optimize_method_3 : tuple(placements[dict], proj_area, azimuth, rot_angle, name, total_cost)
-        Places the solar panels in their optimal azimuth position.
-        First divides the roof face into sections before placement.
+    strategies : list[dict]
+        Input describing the heuristics to run (``name``, ``align`` =
+        ``'wall'`` | ``'optimal'``, ``sections`` and optional azimuth
+        ``offset``, ``stagger`` and ``orientation``).  The default are the
+        four classic heuristics: wall-aligned or optimal azimuth, each with
+        3 or without sections.  ``LAYOUT_STRATEGIES`` adds staggered rows
+        and portrait or mixed panel orientation.
+    strategy_sequences : list[tuple(placements[dict], proj_area, azimuth, rot_angle, name, total_cost)]
+        Budget-independent placement of every eligible strategy (all panels
+        that fit, in placement order), computed by one shared
+        :class:`PlacementEngine` (rotated polygons, insets and sections are
+        built once per azimuth).  Sloped roofs only use wall-aligned ones.
+    strategy_results : list[tuple(placements[dict], proj_area, azimuth, rot_angle, name, total_cost)]
+        The results under ``budget`` (:meth:`PlacementEngine.budgeted`): a
+        sequence the budget pays is reused, otherwise it is trimmed to the
+        budget in O(n), with cheaper panels in the freed slots (and placed
+        again with ``refine_budget``).  A budget change re-runs no radiation
+        query.
+    exact_result : tuple(placements[dict], proj_area, azimuth, rot_angle, name, total_cost)
+        ``'exact'`` mode only: integer programming placement at the azimuth
+        of the best heuristic, under ``budget``.  Competes with the
+        heuristics in ``best_result``; ``yield_curve`` and
+        ``evaluate_budget`` keep using the heuristics.
 
     Result attributes
     -----------------
     best_result : tuple
         *(placements[dict], proj_area, azimuth, rot_angle, name, total_cost)*
         of the winning heuristic.
+    yield_curve : list[tuple(float, float)]
+        ``(cost, kWh/year)`` of every panel the best heuristic places without
+        budget limit, in placement order (used by the global budget
+        allocation of :class:`House`).  Empty for a vertical face.
     panel_frames : list[parapy.geom.Position]
         Fully defined local frames for every panel (origin = lower-left
         corner; +X = row direction; +Z = roof normal).
     annual_solar_radiation : float
         Estimated DC kWh per **year** for this face.
+    evaluate_budget : tuple(float, float)
+        ``(total_cost, annual_radiation)`` the face would reach with another
+        budget, used by :meth:`House.budget_sweep`.
 
     Notes
     -----
@@ -92,14 +167,30 @@ class OptimizedPlacement(Base):
     coords = Input()  # [lat, lon] pair (decimal degrees) used for all PVGIS calls.
     budget = Input()  # Maximum amount (EUR) that may be spent on this face.
     loss = Input()  # Loss factor of solar panels only which is passed straight to PVGIS.
+    irradiance_backend = Input('pvgis')  # 'pvgis' (web API) or 'local' (offline model)
+    radiation_lookup = Input(False)  # Interpolate radiation from a per-location tilt/azimuth table
+    radiation_prefetch = Input(None)  # Evaluated before placement; House fetches all faces at once
+    strategies = Input(DEFAULT_STRATEGIES)  # Placement strategies to evaluate, see PlacementEngine
+    execution = Input('serial')  # 'serial' or 'process' (strategies in parallel worker processes)
+    packer = Input('shapely')  # 'shapely' (containment tests), 'raster' (occupancy grid) or 'rows' (row DP)
+    raster_cell = Input(RASTER_CELL)  # Cell size (m) of the raster packer
+    refine_budget = Input(False)  # Place strategies again under the budget instead of only trimming them
+    placement_mode = Input('heuristic')  # 'heuristic' or 'exact' (integer program, needs ortools)
+    exact_objective = Input('yield')  # 'yield' (panel area) or 'count', exact mode only
+    exact_time_limit = Input(EXACT_TIME_LIMIT)  # Solver time limit (s) per face, exact mode only
+    exact_grid = Input(EXACT_GRID)  # Spacing (m) of candidate positions, exact mode only
+    phase_search = Input(False)  # Search grid offsets and azimuth jitter per strategy
+    search_time = Input(SEARCH_TIME)  # Time budget (s) of the phase search per face
 
     @Attribute
+    @profiled
     def roof_normal(self):
         return self.roof_face.plane_normal.normalized
 
     # Rotate the roof face to 2D for Shapely operations
     # Only done for non-flat roofs
     @Attribute
+    @profiled
     def flatten_gable_roof(self):
         n = self.roof_face.plane_normal.normalized
         if n.is_parallel(Vector(0, 0, 1), tol=1e-2):
@@ -115,33 +206,22 @@ class OptimizedPlacement(Base):
 
     # Turn roof face into a 2D Shapely polygon for better handling
     @Attribute
+    @profiled
     def roof_poly(self):
         # Use outer wire (boundary) of face
         xy = [(v.point.x, v.point.y) for v in self.flatten_gable_roof.outer_wire.vertices]
         return ShapelyPolygon(xy)
 
     # Get the optimal tilt and azimuth for the roof face using PVGIS
-    @Attribute
+    # (or the offline model when irradiance_backend == 'local').
+    # House computes this once per location and passes it to every face.
+    @Input
+    @profiled
     def optimal_angles(self):
-        # PVGIS request
-        peakpower_kwp = 1  # IGNORE, Not important for optimal angles
-        params = {
-            'lat': self.coords[0],
-            'lon': self.coords[1],
-            'outputformat': 'json',
-            'mountingplace': 'building',
-            'peakpower': peakpower_kwp,
-            'loss': self.loss,
-            'optimalangles': 1,
-            'usehorizon': 1
-        }
-        response = requests.get("https://re.jrc.ec.europa.eu/api/v5_2/PVcalc", params=params)
-        data = response.json()
-        optimal_tilt = data['inputs']['mounting_system']['fixed']['slope']['value']
-        optimal_azimuth = data['inputs']['mounting_system']['fixed']['azimuth']['value']
-        return [optimal_azimuth, optimal_tilt]
+        return irradiance.optimal_angles(self.coords, self.loss, backend=self.irradiance_backend)
 
     @Attribute
+    @profiled
     def tilt_angle_deg(self):
         if self.roof_face.plane_normal.is_parallel(Vector(0, 0, 1), tol=1e-2):
             return self.optimal_angles[1]
@@ -151,6 +231,7 @@ class OptimizedPlacement(Base):
             return tilt_deg
 
     @Attribute
+    @profiled
     def optimal_azimuth(self):
         return self.optimal_angles[0]
 
@@ -178,46 +259,26 @@ class OptimizedPlacement(Base):
     def calculate_solar_radiation(self, tilt, azimuth):
         """
         Calls PVGIS seriescalc API to get average daily solar radiation (kWh/m²/day)
-        using the specified tilt and azimuth.
+        using the specified tilt and azimuth. Responses are kept in the
+        on-disk :class:`PVGISCache`, so repeated calls are not re-downloaded.
+        With ``irradiance_backend='local'`` the offline model is used instead,
+        and with ``radiation_lookup`` the value is interpolated from a
+        per-location :class:`IrradianceGrid`.
+        Raises :class:`PVGISError` when no radiation data can be obtained.
         """
-        radiation_url = "https://re.jrc.ec.europa.eu/api/v5_2/seriescalc"
         normalized_azimuth = self.normalize_azimuth(azimuth)
         normalized_tilt = self.normalize_tilt(tilt)
 
-        params = {
-            'lat': self.coords[0],  # Latitude
-            'lon': self.coords[1],  # Longitude
-            'angle': normalized_tilt,  # Panel tilt (slope)
-            'aspect': normalized_azimuth,  # Panel azimuth
-            'outputformat': 'json',
-            'pvcalculation': 1,
-            'peakpower': 1,
-            'loss': self.loss,  # Loss factor unimportant for radiation
-            'usehorizon': 1
-        }
-
-        try:
-            response = requests.get(radiation_url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                hourly_data = data.get('outputs', {}).get('hourly', [])
-                if not hourly_data:
-                    print("No hourly data in radiation response")
-                    return 0
-
-                total_radiation_wh = sum(hour.get('G(i)', 0) for hour in hourly_data)
-                num_days = len(hourly_data) / 24
-                daily_solrad = total_radiation_wh / 1000 / num_days  # kWh/m²/day
-                print('Azimuth:', azimuth)
-                print("Average daily radiation:", daily_solrad)
-                return daily_solrad
-            else:
-                print(f"Radiation API returned status {response.status_code}")
-                print(f"Response text: {response.text[:500]}...")
-                return 0
-        except Exception as e:
-            print(f"Radiation API call failed: {e}")
-            return 0
+        if self.radiation_lookup:
+            grid = irradiance_grid(self.coords, self.loss, backend=self.irradiance_backend)
+            daily_solrad = grid.daily_radiation(normalized_tilt, normalized_azimuth)
+        else:
+            series = irradiance.hourly_series(self.coords, normalized_tilt, normalized_azimuth,
+                                              self.loss, backend=self.irradiance_backend)
+            daily_solrad = float(daily_totals(series).mean())  # kWh/m²/day
+        print('Azimuth:', azimuth)
+        print("Average daily radiation:", daily_solrad)
+        return daily_solrad
 
     # Calculate the bearing (azimuth) between two points
     def calculate_bearing(self, p1, p2):
@@ -249,417 +310,207 @@ class OptimizedPlacement(Base):
                 best_dir = wd
         return best_dir
 
-    # Rotate the polygon to align with the target azimuth
-    def rotate_polygon_to_azimuth(self, poly, target_azimuth):
-        rotation_angle = -target_azimuth + 90
-        return shapely_rotate(poly, rotation_angle, origin='centroid', use_radians=False)
-
     # Check if the roof face is north-facing
     # Important for placement of panels on gable roof only
     @Attribute
+    @profiled
     def is_north_facing(self):
         return self.roof_face.plane_normal.y > 0
 
+    # Wall direction closest to the optimal azimuth, used by the
+    # wall-aligned strategies
+    @Attribute
+    @profiled
+    def wall_aligned_azimuth(self):
+        wall_directions = self.compute_wall_directions(self.roof_poly)
+        best_dir = self.find_closest_direction(wall_directions, self.optimal_azimuth)
+        if self.is_north_facing:
+            best_dir = (best_dir + 180) % 360  # Rotate direction for north-facing roofs
+        return best_dir
+
+    # Normalized (tilt, azimuth) pairs that best_result will ask radiation for.
+    # Known before any panel is placed, so House can fetch them up front.
+    @Attribute
+    @profiled
+    def radiation_queries(self):
+        tilt = self.normalize_tilt(self.tilt_angle_deg)
+        azimuths = {self.normalize_azimuth(self.strategy_azimuth(strategy))
+                    for strategy in self.eligible_strategies}
+        return [(tilt, azimuth) for azimuth in sorted(azimuths)]
+
     # Panel types for common in europe
     @Attribute
+    @profiled
     def panel_specs(self):
-        return [
-            {'type': 'large', 'length': 0.991, 'width': 1.956, 'cost': 900 * 0.9},
-            {'type': 'medium', 'length': 0.991, 'width': 1.65, 'cost': 762 * 0.9},
-            {'type': 'small', 'length': 0.991, 'width': 0.991, 'cost': 457 * 0.9},
-        ]
+        return [dict(spec) for spec in PANEL_SPECS]
 
     # Create a dictionary with characteristics of a single panel
     # Includes projected length/width which is used for placement
-    # on flat roofs
+    # on flat roofs. Portrait (rotated) panels are only added when a
+    # strategy places them.
     @Attribute
+    @profiled
     def panels(self):
-        tilt_rad = math.radians(self.tilt_angle_deg)
-        panels = []
-        for spec in self.panel_specs:
-            length = spec['length']
-            width = spec['width']
-            proj_len = length * math.cos(tilt_rad)
-            proj_wid = width
-            eff_len = proj_len + 0.5
-            eff_wid = proj_wid + 0.1
-            panels.append({
-                'type': spec['type'],
-                'proj_len': proj_len,
-                'proj_wid': proj_wid,
-                'eff_len': eff_len,
-                'eff_wid': eff_wid,
-                'cost': spec['cost']
-            })
+        panels = projected_panels(self.panel_specs, self.tilt_angle_deg)
+        if any(strategy.get('orientation', 'landscape') != 'landscape' for strategy in self.strategies):
+            panels += projected_panels(self.panel_specs, self.tilt_angle_deg, rotated=True)
         return panels
 
     # -----------------------------
-    # Method 1: Wall-Aligned + Sections
+    # Placement strategies
     # -----------------------------
     @Attribute
-    def optimize_method_1(self):
-        wall_directions = self.compute_wall_directions(self.roof_poly)
-        best_dir = self.find_closest_direction(wall_directions, self.optimal_azimuth)
-        if self.is_north_facing:
-            best_dir = (best_dir + 180) % 360  # Rotate direction for north-facing roofs
-        rotated_poly = self.rotate_polygon_to_azimuth(self.roof_poly, best_dir)
-        rotation_angle = -best_dir + 90  # Rotate to align with wall direction
-
-        def partition_roof_shape_based(poly, num_sections=3):
-            minx, miny, maxx, maxy = poly.bounds
-            section_width = (maxx - minx) / num_sections
-            sections = []
-            for i in range(num_sections):
-                sec_minx = minx + i * section_width
-                section = box(sec_minx, miny, sec_minx + section_width, maxy).intersection(poly)
-                if not section.is_empty:
-                    sections.append(section)
-            return sections
-
-        def optimize_section(section, roof_poly, panels, current_total_cost):
-            sec_minx, sec_miny, sec_maxx, sec_maxy = section.bounds
-            eff_sec_minx = sec_minx + 0.05
-            eff_sec_miny = sec_miny + 0.25
-            eff_sec_maxx = sec_maxx - 0.05
-            eff_sec_maxy = sec_maxy - 0.25
-            if eff_sec_maxx <= eff_sec_minx or eff_sec_maxy <= eff_sec_miny:
-                return [], 0, current_total_cost
-
-            placements = []
-            total_area = 0
-            sorted_panels = sorted(panels, key=lambda p: p['eff_len'] * p['eff_wid'], reverse=True)
-            y = eff_sec_miny
-
-            while y < eff_sec_maxy:
-                x = eff_sec_minx
-                while x < eff_sec_maxx:
-                    placed = False
-                    for panel in sorted_panels:
-                        # Skip if budget exceeded
-                        if current_total_cost + panel['cost'] > self.budget:
-                            continue
-
-                        # Create a rectangle for the panel placement
-                        rect_shape = box(x, y, x + panel['eff_len'], y + panel['eff_wid'])
-                        if section.contains(rect_shape) and roof_poly.buffer(-0.05, join_style=2).contains(rect_shape):
-                            placements.append({
-                                'type': panel['type'],
-                                'x': x,
-                                'y': y,
-                                'length': panel['proj_len'],
-                                'width': panel['proj_wid'],
-                                'color': {'small': 'lightgreen', 'medium': 'orange', 'large': 'lightblue'}[
-                                    panel['type']],
-                            })
-                            total_area += panel['proj_len'] * panel['proj_wid']
-                            current_total_cost += panel['cost']
-                            x += panel['eff_len']
-                            placed = True
-                            break
-                    if not placed:
-                        x += 0.5
-                y += max(p['eff_wid'] for p in panels)
-            return placements, total_area, current_total_cost
-
-        sections = partition_roof_shape_based(rotated_poly, num_sections=3)
-        all_placements = []
-        total_area = 0
-        total_cost = 0
-
-        for section in sections:
-            section_placements, section_area, total_cost = optimize_section(section, rotated_poly, self.panels,
-                                                                            total_cost)
-            all_placements.extend(section_placements)
-            total_area += section_area
-
-        print('Total projection area:', total_area)
-        print('Total cost:', total_cost)
-        return [all_placements, total_area, best_dir, rotation_angle, 'Wall-Aligned (With Sections)', total_cost]
+    @profiled
+    def placement_engine(self):
+        return PlacementEngine(self.roof_poly, self.panels, self.packer, self.raster_cell)
 
-    # -----------------------------
-    # Method 2: Wall-Aligned (No Sections)
-    # -----------------------------
+    # Strategies that may be used on this face. Sloped roofs only allow
+    # wall-aligned placement, panels lie flat on the roof surface there.
     @Attribute
-    def optimize_method_2(self):
-        wall_directions = self.compute_wall_directions(self.roof_poly)
-        best_dir = self.find_closest_direction(wall_directions, self.optimal_azimuth)
-        if self.is_north_facing:
-            best_dir = (best_dir + 180) % 360  # Rotate direction for north-facing roofs
-        rotated_poly = self.rotate_polygon_to_azimuth(self.roof_poly, best_dir)
-        rotation_angle = -best_dir + 90  # Rotate to align with wall direction
-
-        def partition_roof_shape_based(poly, num_sections=1):
-            minx, miny, maxx, maxy = poly.bounds
-            section_width = (maxx - minx) / num_sections
-            sections = []
-            for i in range(num_sections):
-                sec_minx = minx + i * section_width
-                section = box(sec_minx, miny, sec_minx + section_width, maxy).intersection(poly)
-                if not section.is_empty:
-                    sections.append(section)
-            return sections
-
-        def optimize_section(section, roof_poly, panels, current_total_cost):
-            sec_minx, sec_miny, sec_maxx, sec_maxy = section.bounds
-            eff_sec_minx = sec_minx + 0.05
-            eff_sec_miny = sec_miny + 0.25
-            eff_sec_maxx = sec_maxx - 0.05
-            eff_sec_maxy = sec_maxy - 0.25
-            if eff_sec_maxx <= eff_sec_minx or eff_sec_maxy <= eff_sec_miny:
-                return [], 0, current_total_cost
-
-            placements = []
-            total_area = 0
-            sorted_panels = sorted(panels, key=lambda p: p['eff_len'] * p['eff_wid'], reverse=True)
-            y = eff_sec_miny
-
-            while y < eff_sec_maxy:
-                x = eff_sec_minx
-                while x < eff_sec_maxx:
-                    placed = False
-                    for panel in sorted_panels:
-                        # Skip if budget exceeded
-                        if current_total_cost + panel['cost'] > self.budget:
-                            continue
-
-                        # Create a rectangle for the panel placement
-                        rect_shape = box(x, y, x + panel['eff_len'], y + panel['eff_wid'])
-                        if section.contains(rect_shape) and roof_poly.buffer(-0.05, join_style=2).contains(rect_shape):
-                            placements.append({
-                                'type': panel['type'],
-                                'x': x,
-                                'y': y,
-                                'length': panel['proj_len'],
-                                'width': panel['proj_wid'],
-                                'color': {'small': 'lightgreen', 'medium': 'orange', 'large': 'lightblue'}[
-                                    panel['type']],
-                            })
-                            total_area += panel['proj_len'] * panel['proj_wid']
-                            current_total_cost += panel['cost']
-                            x += panel['eff_len']
-                            placed = True
-                            break
-                    if not placed:
-                        x += 0.5
-                y += max(p['eff_wid'] for p in panels)
-            return placements, total_area, current_total_cost
-
-        sections = partition_roof_shape_based(rotated_poly, num_sections=1)
-        all_placements = []
-        total_area = 0
-        total_cost = 0
-
-        for section in sections:
-            section_placements, section_area, total_cost = optimize_section(section, rotated_poly, self.panels,
-                                                                            total_cost)
-            all_placements.extend(section_placements)
-            total_area += section_area
-
-        print('Total projection area:', total_area)
-        print('Total cost:', total_cost)
-        return [all_placements, total_area, best_dir, rotation_angle, 'Wall-Aligned (No Sections)', total_cost]
+    @profiled
+    def eligible_strategies(self):
+        if self.roof_face.plane_normal.is_parallel(Vector(0, 0, 1), tol=1e-2):
+            return list(self.strategies)
+        return [strategy for strategy in self.strategies if strategy['align'] == 'wall']
+
+    def strategy_azimuth(self, strategy):
+        if strategy['align'] == 'wall':
+            azimuth = self.wall_aligned_azimuth
+        elif strategy['align'] == 'optimal':
+            azimuth = self.optimal_azimuth
+        else:
+            raise ValueError(f"Strategy {strategy['name']!r}: align must be 'wall' or 'optimal', "
+                             f"got {strategy['align']!r}.")
+        return azimuth + strategy.get('offset', 0)
 
-    # -----------------------------
-    # Method 3: Optimal Azimuth (No Sections)
-    # -----------------------------
+    # (azimuth, sections, name, stagger, orientation) per eligible strategy
     @Attribute
-    def optimize_method_3(self):
-        rotation_angle = -self.optimal_azimuth + 90  # Rotate to align with optimal azimuth
-        rotated_poly = self.rotate_polygon_to_azimuth(self.roof_poly, self.optimal_azimuth)
-
-        def partition_roof_shape_based(poly, num_sections=1):
-            minx, miny, maxx, maxy = poly.bounds
-            section_width = (maxx - minx) / num_sections
-            sections = []
-            for i in range(num_sections):
-                sec_minx = minx + i * section_width
-                section = box(sec_minx, miny, sec_minx + section_width, maxy).intersection(poly)
-                if not section.is_empty:
-                    sections.append(section)
-            return sections
-
-        def optimize_section(section, roof_poly, panels, current_total_cost):
-            sec_minx, sec_miny, sec_maxx, sec_maxy = section.bounds
-            eff_sec_minx = sec_minx + 0.05
-            eff_sec_miny = sec_miny + 0.25
-            eff_sec_maxx = sec_maxx - 0.05
-            eff_sec_maxy = sec_maxy - 0.25
-            if eff_sec_maxx <= eff_sec_minx or eff_sec_maxy <= eff_sec_miny:
-                return [], 0, current_total_cost
-
-            placements = []
-            total_area = 0
-            sorted_panels = sorted(panels, key=lambda p: p['eff_len'] * p['eff_wid'], reverse=True)
-            y = eff_sec_miny
-
-            while y < eff_sec_maxy:
-                x = eff_sec_minx
-                while x < eff_sec_maxx:
-                    placed = False
-                    for panel in sorted_panels:
-                        # Skip if budget exceeded
-                        if current_total_cost + panel['cost'] > self.budget:
-                            continue
-
-                        # Create a rectangle for the panel placement
-                        rect_shape = box(x, y, x + panel['eff_len'], y + panel['eff_wid'])
-                        if section.contains(rect_shape) and roof_poly.buffer(-0.05, join_style=2).contains(rect_shape):
-                            placements.append({
-                                'type': panel['type'],
-                                'x': x,
-                                'y': y,
-                                'length': panel['proj_len'],
-                                'width': panel['proj_wid'],
-                                'color': {'small': 'lightgreen', 'medium': 'orange', 'large': 'lightblue'}[
-                                    panel['type']],
-                            })
-                            total_area += panel['proj_len'] * panel['proj_wid']
-                            current_total_cost += panel['cost']
-                            x += panel['eff_len']
-                            placed = True
-                            break
-                    if not placed:
-                        x += 0.5
-                y += max(p['eff_wid'] for p in panels)
-            return placements, total_area, current_total_cost
-
-        sections = partition_roof_shape_based(rotated_poly, num_sections=1)
-        all_placements = []
-        total_area = 0
-        total_cost = 0
-
-        for section in sections:
-            section_placements, section_area, total_cost = optimize_section(section, rotated_poly, self.panels,
-                                                                            total_cost)
-            all_placements.extend(section_placements)
-            total_area += section_area
-
-        print('Total projection area:', total_area)
-        print('Total cost:', total_cost)
-        return [all_placements, total_area, self.optimal_azimuth, rotation_angle, 'Optimal Azimuth (No Sections)',
-                total_cost]
-
-    # -----------------------------
-    # Method 4: Optimal Azimuth + Roof Sectioning
-    # -----------------------------
+    @profiled
+    def strategy_jobs(self):
+        return [(self.strategy_azimuth(strategy), strategy['sections'], strategy['name'],
+                 strategy.get('stagger', False), strategy.get('orientation', 'landscape'))
+                for strategy in self.eligible_strategies]
+
+    # Budget-independent placement sequence per eligible strategy (every
+    # panel that fits, in placement order). Does not read the budget, so it
+    # survives budget changes, and PlacementEngine keeps it for the session.
     @Attribute
-    def optimize_method_4(self):
-        rotation_angle = -self.optimal_azimuth + 90  # Rotate to align with optimal azimuth
-        rotated_poly = self.rotate_polygon_to_azimuth(self.roof_poly, self.optimal_azimuth)
-
-        def partition_roof_shape_based(poly, num_sections=3):
-            minx, miny, maxx, maxy = poly.bounds
-            section_width = (maxx - minx) / num_sections
-            sections = []
-            for i in range(num_sections):
-                sec_minx = minx + i * section_width
-                section = box(sec_minx, miny, sec_minx + section_width, maxy).intersection(poly)
-                if not section.is_empty:
-                    sections.append(section)
-            return sections
-
-        def optimize_section(section, roof_poly, panels, current_total_cost):
-            sec_minx, sec_miny, sec_maxx, sec_maxy = section.bounds
-            eff_sec_minx = sec_minx + 0.05
-            eff_sec_miny = sec_miny + 0.25
-            eff_sec_maxx = sec_maxx - 0.05
-            eff_sec_maxy = sec_maxy - 0.25
-            if eff_sec_maxx <= eff_sec_minx or eff_sec_maxy <= eff_sec_miny:
-                return [], 0, current_total_cost
-
-            placements = []
-            total_area = 0
-            sorted_panels = sorted(panels, key=lambda p: p['eff_len'] * p['eff_wid'], reverse=True)
-            y = eff_sec_miny
-
-            while y < eff_sec_maxy:
-                x = eff_sec_minx
-                while x < eff_sec_maxx:
-                    placed = False
-                    for panel in sorted_panels:
-                        # Skip if budget exceeded
-                        if current_total_cost + panel['cost'] > self.budget:
-                            continue
-
-                        # Create a rectangle for the panel placement
-                        rect_shape = box(x, y, x + panel['eff_len'], y + panel['eff_wid'])
-                        if section.contains(rect_shape) and roof_poly.buffer(-0.05, join_style=2).contains(rect_shape):
-                            placements.append({
-                                'type': panel['type'],
-                                'x': x,
-                                'y': y,
-                                'length': panel['proj_len'],
-                                'width': panel['proj_wid'],
-                                'color': {'small': 'lightgreen', 'medium': 'orange', 'large': 'lightblue'}[
-                                    panel['type']],
-                            })
-                            total_area += panel['proj_len'] * panel['proj_wid']
-                            current_total_cost += panel['cost']
-                            x += panel['eff_len']
-                            placed = True
-                            break
-                    if not placed:
-                        x += 0.5
-                y += max(p['eff_wid'] for p in panels)
-            return placements, total_area, current_total_cost
-
-        sections = partition_roof_shape_based(rotated_poly, num_sections=3)
-        all_placements = []
-        total_area = 0
-        total_cost = 0
-
-        for section in sections:
-            section_placements, section_area, total_cost = optimize_section(section, rotated_poly, self.panels,
-                                                                            total_cost)
-            all_placements.extend(section_placements)
-            total_area += section_area
-
-        print('Total projection area:', total_area)
-        print('Total cost:', total_cost)
-        return [all_placements, total_area, self.optimal_azimuth, rotation_angle, 'Optimal Azimuth (With Sections)',
-                total_cost]
-
+    @profiled
+    def strategy_sequences(self):
+        if self.phase_search:
+            return self.placement_engine.search(self.strategy_jobs, time_budget=self.search_time,
+                                                execution=self.execution)
+        return self.placement_engine.sequences(self.strategy_jobs, execution=self.execution)
+
+    # One result per eligible strategy under the budget (PlacementEngine.budgeted):
+    # [placements, proj_area, azimuth, rotation_angle, name, total_cost]
     @Attribute
-    def best_result(self):
-        methods = [
-            self.optimize_method_1,
-            self.optimize_method_2,
-            self.optimize_method_3,
-            self.optimize_method_4,
-        ]
-        results = []
-        azimuth = 10000000  # dummy value to ensure the first method is always processed
-        solar_radiation = 0  # dummy value to ensure the first method is always processed
-        for method in methods:
-            # if statemtent to esnure that calculate_solar_radiation is only called when azimuth changes
-            # otherwise it takes a lot of time to calculate the radiation
-            if azimuth - method[2] >= 1e-2:
-                sw = True
-            else:
-                sw = False
-            azimuth = method[2]
-            area = method[1]
+    @profiled
+    def strategy_results(self):
+        results = self.placement_engine.budgeted(self.strategy_jobs, self.strategy_sequences, self.budget,
+                                                 execution=self.execution, refine=self.refine_budget)
+        for result in results:
+            print(f"{result[4]}: total projection area {result[1]:.2f}, total cost {result[5]}")
+        return results
+
+    # Average daily radiation (kWh/m²/day) per normalized strategy azimuth,
+    # None when it could not be obtained for that azimuth
+    @Attribute
+    @profiled
+    def strategy_radiation(self):
+        prefetched = self.radiation_prefetch or {}  # let House fill the cache for all faces first
+        tilt = self.normalize_tilt(self.tilt_angle_deg)
+        radiation = {}
+        for strategy in self.eligible_strategies:
+            azimuth = self.strategy_azimuth(strategy)
+            key = round(self.normalize_azimuth(azimuth), 6)
+            if key in radiation:
+                continue
+            query = irradiance.series_key(self.coords, tilt, self.normalize_azimuth(azimuth), self.loss)
+            if query in prefetched and prefetched[query] is None:
+                print(f"No radiation for {strategy['name']}: prefetch failed, skipped")
+                radiation[key] = None
+                continue
             try:
-                if sw:
-                    solar_radiation = self.calculate_solar_radiation(self.tilt_angle_deg, azimuth)
-                total_radiation = area * solar_radiation
+                radiation[key] = self.calculate_solar_radiation(self.tilt_angle_deg, azimuth)
             except Exception as e:
-                print(f"Error calculating radiation for {method[4]}: {e}")
+                print(f"Error calculating radiation for {strategy['name']}: {e}")
+                radiation[key] = None
+        return radiation
+
+    # Daily radiation of a result azimuth. The phase search rotates the
+    # strategy azimuths by up to MAX_JITTER degrees; those reuse the
+    # radiation of the nearest strategy azimuth instead of a new query.
+    def radiation_of(self, azimuth):
+        key = self.radiation_key(azimuth)
+        return None if key is None else self.strategy_radiation[key]
+
+    # Normalized strategy azimuth whose radiation answers radiation_of
+    def radiation_key(self, azimuth):
+        key = round(self.normalize_azimuth(azimuth), 6)
+        if key in self.strategy_radiation:
+            return key
+        distance = {known: abs((known - key + 180) % 360 - 180) for known in self.strategy_radiation}
+        nearest = min(distance, key=distance.get, default=None)
+        if nearest is not None and distance[nearest] <= MAX_JITTER + 1e-6:
+            return nearest
+        return None
+
+    # Best of the given strategy results by daily radiation on the panels:
+    # (method, total_radiation)
+    def rank_results(self, strategy_results):
+        results = []
+        for method in strategy_results:
+            daily = self.radiation_of(method[2])
+            if daily is None:
                 continue
             results.append({
                 'method': method,
-                'total_radiation': total_radiation
+                'total_radiation': method[1] * daily
             })
-        if self.roof_face.plane_normal.is_parallel(Vector(0, 0, 1), tol=1e-2):
-            best = max(results, key=lambda x: x['total_radiation'])
+        if not results:
+            raise PVGISError("No radiation data for any of the placement heuristics")
+        best = max(results, key=lambda x: x['total_radiation'])
+        return best['method'], best['total_radiation']
+
+    # Integer programming placement, warm-started from the best heuristic
+    @Attribute
+    @profiled
+    def exact_result(self):
+        hint, _ = self.rank_results(self.strategy_results)
+        return solve_exact(self.placement_engine, hint, self.budget, grid=self.exact_grid,
+                           time_limit=self.exact_time_limit, objective=self.exact_objective)
+
+    @Attribute
+    @profiled
+    def best_result(self):
+        if self.placement_mode == 'heuristic':
+            results = self.strategy_results
+        elif self.placement_mode == 'exact':
+            results = self.strategy_results + [self.exact_result]
         else:
-            # For sloped roofs, we only consider wall-aligned methods
-            best = max([results[0], results[1]], key=lambda x: x['total_radiation'])
+            raise ValueError(f"placement_mode must be 'heuristic' or 'exact', got {self.placement_mode!r}.")
+        best = self.rank_results(results)
         print(
-            f"Best Method: {best['method'][4]} | Total Solar Radiation: {best['total_radiation']:.2f} kWh/day | Total Cost: {best['method'][5]}")
-        return best['method'], best['total_radiation']
+            f"Best Method: {best[0][4]} | Total Solar Radiation: {best[1]:.2f} kWh/day | Total Cost: {best[0][5]}")
+        return best
 
+    # Panels of the best heuristic without any budget limit, in placement
+    # order, as (cost, kWh/year) pairs.  Does not depend on the budget, so
+    # House can divide one budget over all faces by marginal yield.
     @Attribute
+    @profiled
+    def yield_curve(self):
+        cos_tilt = math.cos(math.radians(self.tilt_angle_deg))
+        if cos_tilt < 1e-9:
+            return []  # vertical face: no projected panel area, gets no budget
+        method, _ = self.rank_results(self.strategy_sequences)
+        # Same energy estimate as annual_solar_radiation, per panel
+        kwh_per_m2 = self.annual_irradiation(method[2]) / cos_tilt
+        return [(p['cost'], p['length'] * p['width'] * kwh_per_m2) for p in method[0]]
+
+    @Attribute
+    @profiled
     def solar_panel_placement(self):
         best_placements = self.best_result[0][0]
         panel_vertices = []
@@ -686,6 +537,7 @@ class OptimizedPlacement(Base):
 
     # points on the flat roof face
     @Attribute
+    @profiled
     def flat_points(self):
         return [
             Point(vertex['x_real'], vertex['y_real'], self.roof_face.cog.z)
@@ -693,6 +545,7 @@ class OptimizedPlacement(Base):
 
     # Project flat points onto the real sloped roof face, if it is not flat
     @Attribute(in_tree=True)
+    @profiled
     def real_points(self):
         z = self.roof_face.plane_normal.normalized
         # Choose a non-parallel reference vector
@@ -706,6 +559,7 @@ class OptimizedPlacement(Base):
         ]
 
     @Attribute
+    @profiled
     def panel_frames(self):
         if self.roof_face.plane_normal.is_parallel(Vector(0, 0, 1), tol=1e-2):
             tilt_rad = math.radians(self.optimal_angles[1])
@@ -739,30 +593,58 @@ class OptimizedPlacement(Base):
         return frames  # list[Position]
 
     @Attribute
+    @profiled
     def annual_solar_radiation(self):
         best_method_data = self.best_result[0]  # [placements, total_area, azimuth, rotation_angle, method_name, cost]
-        total_projected_area = best_method_data[1]
+        return self.annual_radiation(best_method_data)
+
+    def annual_radiation(self, method):
+        total_projected_area = method[1]
         tilt_deg = self.tilt_angle_deg
-        azimuth = best_method_data[2]
+        azimuth = method[2]
         # Compute actual panel area from projected area
         tilt_rad = math.radians(tilt_deg)
         actual_area = total_projected_area / math.cos(tilt_rad) if tilt_deg != 90 else float('inf')
-        # Get daily solar radiation based on tilt and azimuth
-        daily_solrad = self.calculate_solar_radiation(tilt_deg, azimuth)
-        # Annual radiation = actual area * daily * 365
-        annual_radiation = actual_area * daily_solrad * 365
-        return annual_radiation
+        return actual_area * self.annual_irradiation(azimuth)
+
+    # Irradiation (kWh/m²/year) at a result azimuth: the mean calendar-year
+    # total of the (cached) hourly series the heuristics were ranked with,
+    # or 365 days of the interpolated daily value with radiation_lookup
+    def annual_irradiation(self, azimuth):
+        tilt_deg = self.tilt_angle_deg
+        daily_solrad = self.radiation_of(azimuth)
+        if daily_solrad is None:
+            daily_solrad = self.calculate_solar_radiation(tilt_deg, azimuth)
+        if self.radiation_lookup:
+            return daily_solrad * 365  # the lookup table only holds daily averages
+        key = self.radiation_key(azimuth)
+        series = irradiance.hourly_series(self.coords, self.normalize_tilt(tilt_deg),
+                                          self.normalize_azimuth(azimuth) if key is None else key,
+                                          self.loss, backend=self.irradiance_backend)
+        yearly = annual_totals(series)
+        return sum(yearly.values()) / len(yearly)
+
+    # (total_cost, annual_radiation) of the best heuristic for another
+    # budget, from the cached sequences and radiation (no radiation
+    # queries, no geometry and no change to best_result)
+    def evaluate_budget(self, budget):
+        method, _ = self.rank_results(self.placement_engine.budgeted(self.strategy_jobs, self.strategy_sequences,
+                                                                     budget, execution=self.execution))
+        return method[5], self.annual_radiation(method)
 
     # In OptimizedPlacement class
     @Attribute
+    @profiled
     def roof_area(self):
         return self.roof_face.area  # Roof area of the face
 
     @Attribute
+    @profiled
     def panel_total_area(self):
         return self.best_result[0][1]  # Total area covered by panels
 
     @Attribute
+    @profiled
     def panel_counts(self):
         counts = {'small': 0, 'medium': 0, 'large': 0}
         placements = self.best_result[0][0]  # Best method placements
@@ -771,23 +653,27 @@ class OptimizedPlacement(Base):
         return counts
 
     @Attribute
+    @profiled
     def best_tilt(self):
         return self.tilt_angle_deg  # Optimal tilt angle
 
     @Attribute
+    @profiled
     def best_azimuth(self):
         return self.optimal_angles[0]  # PVGIS-recommended azimuth
 
     @Attribute
+    @profiled
     def actual_azimuth(self):
         return self.best_result[0][2]  # Actual azimuth used (e.g., wall-aligned)
 
     @Attribute
+    @profiled
     def avg_solar_radiation(self):
         best_method_data = self.best_result[0]  # [placements, total_area, azimuth, rotation_angle, method_name, cost]
-        tilt_deg = self.tilt_angle_deg
         azimuth = best_method_data[2]
-        daily_solrad = self.calculate_solar_radiation(tilt_deg, azimuth)
+        # Same value the heuristics were ranked with (no new query for a jittered azimuth)
+        daily_solrad = self.radiation_of(azimuth)
         return daily_solrad  # Daily average kWh/m²/day
 
 
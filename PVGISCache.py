@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from Profiler import profiler
+
+
+# Compact record layout of one hourly PVGIS seriescalc sample
+HOURLY_DTYPE = np.dtype([
+    ('year', '<u2'),
+    ('G(i)', '<f4'),  # Global irradiance on the inclined plane (W/m²)
+    ('T2m', '<f4'),  # Air temperature at 2 m (°C)
+    ('WS10m', '<f4'),  # Wind speed at 10 m (m/s)
+])
+
+
+def hourly_to_array(hourly_data):
+    """
+    Converts the ``outputs.hourly`` list of a seriescalc response into a
+    structured ``HOURLY_DTYPE`` array (one record per hour).
+    """
+    series = np.zeros(len(hourly_data), dtype=HOURLY_DTYPE)
+    series['year'] = [int(hour.get('time', '0')[:4]) for hour in hourly_data]
+    for column in ('G(i)', 'T2m', 'WS10m'):
+        series[column] = [hour.get(column, 0) for hour in hourly_data]
+    return series
+
+
+# Horizontal beam and diffuse irradiance of one seriescalc sample
+# (angle 0, components=1) with its time of day
+COMPONENTS_DTYPE = np.dtype([
+    ('day', '<u2'),  # Day of the year (1-366)
+    ('hour', '<f4'),  # UTC hour of the sample, e.g. 12.1667 for 12:10
+    ('Gb(i)', '<f4'),  # Beam irradiance on the horizontal plane (W/m²)
+    ('Gd(i)', '<f4'),  # Diffuse irradiance on the horizontal plane (W/m²)
+])
+
+
+def components_to_array(hourly_data):
+    """
+    Converts the ``outputs.hourly`` list of a horizontal seriescalc
+    response with ``components=1`` into a ``COMPONENTS_DTYPE`` array.
+    PVGIS time stamps read ``YYYYMMDD:HHMM`` in UTC.
+    """
+    times = [hour.get('time', '20010101:0000') for hour in hourly_data]
+    series = np.zeros(len(hourly_data), dtype=COMPONENTS_DTYPE)
+    dates = np.array([f"{t[:4]}-{t[4:6]}-{t[6:8]}" for t in times], dtype='datetime64[D]')
+    series['day'] = (dates - dates.astype('datetime64[Y]')).astype(int) + 1
+    series['hour'] = [int(t[9:11]) + int(t[11:13]) / 60 for t in times]
+    for column in ('Gb(i)', 'Gd(i)'):
+        series[column] = [hour.get(column, 0) for hour in hourly_data]
+    return series
+
+
+def daily_totals(series):
+    """Daily irradiation (kWh/m²/day) for every full day in the series."""
+    num_days = len(series) // 24
+    g = series['G(i)'][:num_days * 24]
+    return g.reshape(num_days, 24).sum(axis=1, dtype=np.float64) / 1000
+
+
+def annual_totals(series):
+    """Irradiation (kWh/m²/year) per calendar year in the series."""
+    years, index = np.unique(series['year'], return_inverse=True)
+    totals = np.bincount(index, weights=series['G(i)'].astype(np.float64)) / 1000
+    return dict(zip(years.tolist(), totals.tolist()))
+
+
+class PVGISCache:
+    """
+    Content-addressed on-disk cache for PVGIS responses.
+
+    Every entry is stored as ``<sha1>.json`` (plain responses) or
+    ``<sha1>.npy`` (hourly series) inside :pyattr:`folder`, where
+    the hash is taken over the endpoint and the *normalised* request
+    parameters.  This mirrors the way osmnx stores its Overpass/Nominatim
+    answers in ``cache/*.json``, so re-running a house (or re-opening the
+    GUI) does not hit the PVGIS servers again.
+
+    Parameters
+    ----------
+    folder : str, default ``cache/pvgis``
+        Directory in which the cache files are written.
+    max_bytes : int, default 500 MB
+        Size cap of the cache folder.  When exceeded, the least recently
+        used entries (oldest modification time) are evicted.
+
+    Notes
+    -----
+    * Floats are rounded to 6 decimals before hashing, so e.g. a tilt of
+      ``35.0`` and ``35`` map onto the same entry.
+    * A cache hit touches the file, which is what makes the eviction LRU.
+    * Hourly series are stored as float32 ``HOURLY_DTYPE`` records and
+      loaded as read-only memory maps, so a cache hit costs no parsing.
+    * The folder size is tracked in memory after one initial scan, so a
+      write costs O(1).  The folder is only listed again when the cap is
+      exceeded or after ``rescan_writes`` writes (to notice entries of
+      other processes sharing the folder).
+    """
+
+    def __init__(self, folder=os.path.join("cache", "pvgis"), max_bytes=500 * 1024 ** 2, rescan_writes=256):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.rescan_writes = rescan_writes
+        self._size = None  # bytes in the folder, None until the first scan
+        self._writes = 0  # writes since the last scan
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint, params):
+        normalized = {}
+        for name, value in params.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = round(float(value), 6)
+            normalized[name] = value
+        payload = json.dumps([endpoint, normalized], sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def path(self, endpoint, params, extension=".json"):
+        return os.path.join(self.folder, self.key(endpoint, params) + extension)
+
+    def get(self, endpoint, params):
+        path = self.path(endpoint, params)
+        if not os.path.exists(path):
+            profiler.count("pvgis_cache.miss")
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # Half-written or corrupted entry, drop it and fetch again
+            self._remove(path)
+            profiler.count("pvgis_cache.miss")
+            return None
+        os.utime(path)  # mark as recently used
+        profiler.count("pvgis_cache.hit")
+        return data
+
+    def get_array(self, endpoint, params):
+        path = self.path(endpoint, params, extension=".npy")
+        if not os.path.exists(path):
+            profiler.count("pvgis_cache.miss")
+            return None
+        try:
+            data = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            self._remove(path)
+            profiler.count("pvgis_cache.miss")
+            return None
+        os.utime(path)
+        profiler.count("pvgis_cache.hit")
+        return data
+
+    def put_array(self, endpoint, params, data):
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path(endpoint, params, extension=".npy")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, data)
+        self._commit(tmp_path, path)
+
+    def put(self, endpoint, params, data):
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path(endpoint, params)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        self._commit(tmp_path, path)
+
+    # Move a written entry in place and update the tracked folder size;
+    # the folder is only scanned when the size is unknown, over the cap or
+    # due for a rescan
+    def _commit(self, tmp_path, path):
+        size = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)  # atomic, readers never see partial files
+        with self._lock:
+            self._writes += 1
+            if self._size is not None:
+                self._size += size - replaced
+            scan = self._size is None or self._size > self.max_bytes or self._writes >= self.rescan_writes
+        if scan:
+            self.evict()
+
+    # Remove least recently used entries until the folder fits in max_bytes
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # evicted by another writer in the meantime
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+        with self._lock:
+            self._size = total
+            self._writes = 0
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # e.g. already evicted by another writer
+
+
+# Shared instance used by all PVGIS calls of the app
+pvgis_cache = PVGISCache()
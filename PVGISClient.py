@@ -0,0 +1,108 @@
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from Profiler import profiler
+
+
+class PVGISError(RuntimeError):
+    """Raised when PVGIS does not deliver a usable answer, even after retrying."""
+
+
+class PVGISClient:
+    """
+    Shared HTTP client for all PVGIS traffic of the app.
+
+    * One pooled :class:`requests.Session` (keep-alive), so consecutive
+      calls reuse the TCP/TLS connection.
+    * At most ``max_concurrent`` requests in flight at the same time, across
+      all threads.
+    * Retries on connection errors, ``429`` and ``5xx`` answers with
+      exponential backoff (plus jitter); a ``Retry-After`` header sent by
+      the rate limiter takes precedence.
+    * Every request has a ``(connect, read)`` timeout.
+    * Failures raise :class:`PVGISError` instead of returning dummy values.
+
+    Parameters
+    ----------
+    base_url : str, optional
+        API root.  Defaults to the ``PVGIS_BASE_URL`` environment variable or
+        the public v5.2 API, so the client can be pointed at a local stub
+        server.
+    max_concurrent : int, default 4
+        Maximum number of simultaneous requests.
+    max_retries : int, default 5
+        Number of retries after the first attempt.
+    backoff_factor : float, default 0.5 s
+        First backoff delay; doubled after every failed attempt.
+    max_backoff : float, default 30 s
+        Upper bound of a single backoff delay.
+    timeout : tuple(float, float), default (5 s, 60 s)
+        Connect and read timeout of a single request.
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, base_url=None, max_concurrent=4, max_retries=5, backoff_factor=0.5,
+                 max_backoff=30.0, timeout=(5, 60)):
+        self.base_url = base_url or os.environ.get("PVGIS_BASE_URL", "https://re.jrc.ec.europa.eu/api/v5_2/")
+        if not self.base_url.endswith("/"):
+            self.base_url += "/"
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrent)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, endpoint):
+        return self.base_url + endpoint
+
+    def _delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after is not None:
+                try:
+                    return min(float(retry_after), self.max_backoff)
+                except ValueError:
+                    pass  # HTTP-date format, fall back to exponential backoff
+        delay = min(self.backoff_factor * 2 ** attempt, self.max_backoff)
+        return delay * (0.5 + random.random() / 2)
+
+    def get_json(self, endpoint, params):
+        """GET ``endpoint`` with ``params`` and return the decoded JSON body."""
+        url = self.url(endpoint)
+        error = None
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                with self._slots, profiler.span(f"network:PVGIS {endpoint}"):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = f"{endpoint} request failed: {e}"
+            else:
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError:
+                        raise PVGISError(f"{endpoint} returned invalid JSON: {response.text[:500]}")
+                if response.status_code not in self.RETRY_STATUS:
+                    # Bad request etc., retrying will not help
+                    raise PVGISError(f"{endpoint} returned status {response.status_code}: "
+                                     f"{response.text[:500]}")
+                error = f"{endpoint} returned status {response.status_code}"
+
+            if attempt < self.max_retries:
+                time.sleep(self._delay(attempt, response))
+        raise PVGISError(f"{error} (gave up after {self.max_retries + 1} attempts)")
+
+
+# Shared client used by all PVGIS calls of the app
+pvgis_client = PVGISClient()
@@ -0,0 +1,1144 @@
+"""
+Geometry engine behind the placement heuristics of
+:class:`OptimizedPlacement`.
+
+Works on plain Shapely polygons (already rotated so that panel rows run
+along +X) and panel dictionaries as produced by
+:pyattr:`OptimizedPlacement.panels`, so it has no ParaPy dependency.
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import shapely
+from shapely.geometry import box
+from shapely.affinity import rotate as shapely_rotate
+
+PANEL_COLORS = {'small': 'lightgreen', 'medium': 'orange', 'large': 'lightblue'}
+# Panel types common in Europe, largest first
+PANEL_SPECS = (
+    {'type': 'large', 'length': 0.991, 'width': 1.956, 'cost': 900 * 0.9},
+    {'type': 'medium', 'length': 0.991, 'width': 1.65, 'cost': 762 * 0.9},
+    {'type': 'small', 'length': 0.991, 'width': 0.991, 'cost': 457 * 0.9},
+)
+X_STEP = 0.5  # x advance (m) when no panel fits at the current position
+MAX_CHUNK = 64  # maximum number of x positions tested per vectorised batch
+MAX_SEQUENCES = 256  # budget-independent placement sequences kept in memory
+ROW_UNIT = 0.001  # resolution (m) of the row solver
+SEARCH_TIME = 2.0  # default time budget (s) of the phase search per roof face
+MAX_JITTER = 2.0  # largest rotation (degrees) the phase search adds to an azimuth
+MAX_OFFSETS = 64  # phase search candidates per strategy
+PACKERS = ('shapely', 'raster', 'rows')
+ORIENTATIONS = ('landscape', 'portrait', 'mixed')
+RASTER_CELL = 0.05  # default cell size (m) of the raster packer
+
+# The four classic heuristics.  A strategy is a plain dict:
+#   name     : label reported in the results
+#   align    : 'wall' (closest wall direction) or 'optimal' (PVGIS azimuth)
+#   sections : number of vertical strips the roof is split into
+#   offset   : optional extra azimuth rotation in degrees (default 0)
+#   stagger  : optional, shift every other row by half a panel (default False)
+#   orientation : optional 'landscape' (default), 'portrait' (panels turned
+#                 by 90 degrees) or 'mixed' (either, chosen per panel)
+DEFAULT_STRATEGIES = (
+    {'name': 'Wall-Aligned (With Sections)', 'align': 'wall', 'sections': 3},
+    {'name': 'Wall-Aligned (No Sections)', 'align': 'wall', 'sections': 1},
+    {'name': 'Optimal Azimuth (No Sections)', 'align': 'optimal', 'sections': 1},
+    {'name': 'Optimal Azimuth (With Sections)', 'align': 'optimal', 'sections': 3},
+)
+
+# Staggered rows and portrait/mixed panel orientation, to be evaluated
+# together with the classic ones (DEFAULT_STRATEGIES + LAYOUT_STRATEGIES)
+LAYOUT_STRATEGIES = (
+    {'name': 'Wall-Aligned (Staggered)', 'align': 'wall', 'sections': 1, 'stagger': True},
+    {'name': 'Wall-Aligned (Portrait)', 'align': 'wall', 'sections': 1, 'orientation': 'portrait'},
+    {'name': 'Wall-Aligned (Mixed Orientation)', 'align': 'wall', 'sections': 1, 'orientation': 'mixed'},
+    {'name': 'Optimal Azimuth (Staggered)', 'align': 'optimal', 'sections': 1, 'stagger': True},
+    {'name': 'Optimal Azimuth (Portrait)', 'align': 'optimal', 'sections': 1, 'orientation': 'portrait'},
+    {'name': 'Optimal Azimuth (Mixed Orientation)', 'align': 'optimal', 'sections': 1, 'orientation': 'mixed'},
+)
+
+
+class PlacementStats:
+    """
+    Counters of the work done by the placement engine, e.g. to compare
+    workloads in benchmarks.  Call :meth:`reset` before a measurement.
+
+    Attributes
+    ----------
+    containment_tests : int
+        Number of (panel box, polygon) containment tests performed.
+    batches : int
+        Number of vectorised containment calls.
+    raster_lookups : int
+        Number of footprint fits looked up in an occupancy grid (raster
+        packer), not comparable with containment tests.
+    row_bands : int
+        Number of row bands whose free intervals were computed (rows
+        packer), one per row and panel height.
+    """
+
+    FIELDS = ('containment_tests', 'batches', 'raster_lookups', 'row_bands')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.containment_tests = 0
+        self.batches = 0
+        self.raster_lookups = 0
+        self.row_bands = 0
+
+    def snapshot(self):
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+    # Add the counters of a worker process, see _run_packed
+    def add(self, counts):
+        for field, n in zip(self.FIELDS, counts):
+            setattr(self, field, getattr(self, field) + n)
+
+
+stats = PlacementStats()
+
+
+# Characteristics of every panel type for a given tilt, including the
+# projected length/width used for placement on the (flattened) roof and the
+# effective footprint with row spacing. rotated=True gives the panels turned
+# by 90 degrees (portrait): length and width swap before the projection.
+def projected_panels(specs, tilt_deg, rotated=False):
+    tilt_rad = math.radians(tilt_deg)
+    panels = []
+    for spec in specs:
+        length, width = (spec['width'], spec['length']) if rotated else (spec['length'], spec['width'])
+        proj_len = length * math.cos(tilt_rad)
+        proj_wid = width
+        panels.append({
+            'type': spec['type'],
+            'proj_len': proj_len,
+            'proj_wid': proj_wid,
+            'eff_len': proj_len + 0.5,
+            'eff_wid': proj_wid + 0.1,
+            'cost': spec['cost'],
+            'rotated': rotated
+        })
+    return panels
+
+
+# Placement dict of a panel whose footprint starts at (x, y)
+def panel_placement(panel, x, y):
+    return {
+        'type': panel['type'],
+        'x': x,
+        'y': y,
+        'length': panel['proj_len'],
+        'width': panel['proj_wid'],
+        'color': PANEL_COLORS[panel['type']],
+        'rotated': panel.get('rotated', False),
+    }
+
+
+# Roof polygon shrunk by the 5 cm edge clearance, computed and prepared once
+# per heuristic (not per candidate panel)
+def inset_polygon(roof_poly):
+    inset = roof_poly.buffer(-0.05, join_style=2)
+    shapely.prepare(inset)
+    return inset
+
+
+# Vectorised test which boxes lie inside both the section and the inset roof.
+# The section is only tested for boxes that passed the inset test.
+def contained(section, inset, boxes):
+    fits = shapely.contains(inset, boxes)
+    stats.containment_tests += fits.size
+    stats.batches += 1
+    if fits.any():
+        stats.containment_tests += int(fits.sum())
+        stats.batches += 1
+        fits[fits] = shapely.contains(section, boxes[fits])
+    return fits
+
+
+def place_section(section, inset, panels, current_total_cost, budget, phase=(0.0, 0.0), stagger=0.0):
+    """
+    Greedily fills one section with rows of panels.
+
+    Walks every row from left to right; at each x the largest affordable
+    panel that fits is placed, otherwise x advances by ``X_STEP``.  Instead
+    of building and testing one Shapely box per candidate, the next
+    candidate positions of all panel types are tested in one vectorised
+    ``shapely.contains`` call against prepared geometries (``inset`` comes
+    from :func:`inset_polygon`, shared by all sections), which gives the
+    same placements as testing them one after the other.  The batch starts
+    at a single position after every placement (densely filled rows) and
+    doubles while nothing fits (gaps, concave parts), up to ``MAX_CHUNK``.
+    After the largest panel is placed, a chain of further largest panels is
+    tested in one call as well, since those win wherever they fit.
+
+    ``phase = (dx, dy)`` moves the grid origin (start of every row and
+    height of the first row), see :meth:`PlacementEngine.search`; every
+    other row starts ``stagger`` further right (staggered rows).
+
+    Returns ``(placements, total_area, current_total_cost)``.
+    """
+    sec_minx, sec_miny, sec_maxx, sec_maxy = section.bounds
+    eff_sec_minx = sec_minx + 0.05 + phase[0]
+    eff_sec_miny = sec_miny + 0.25 + phase[1]
+    eff_sec_maxx = sec_maxx - 0.05
+    eff_sec_maxy = sec_maxy - 0.25
+    if eff_sec_maxx <= eff_sec_minx or eff_sec_maxy <= eff_sec_miny:
+        return [], 0, current_total_cost
+
+    shapely.prepare(section)
+    placements = []
+    total_area = 0
+    sorted_panels = sorted(panels, key=lambda p: p['eff_len'] * p['eff_wid'], reverse=True)
+    eff_len = np.array([p['eff_len'] for p in sorted_panels])[:, np.newaxis]
+    eff_wid = np.array([p['eff_wid'] for p in sorted_panels])[:, np.newaxis]
+    row_pitch = max(p['eff_wid'] for p in panels)
+    largest = sorted_panels[0]
+    steps = np.full(MAX_CHUNK, X_STEP)
+    run_steps = np.full(MAX_CHUNK, largest['eff_len'])
+
+    def place(panel, x, y):
+        nonlocal total_area, current_total_cost
+        placements.append(panel_placement(panel, float(x), y))
+        total_area += panel['proj_len'] * panel['proj_wid']
+        current_total_cost += panel['cost']
+
+    y = eff_sec_miny
+    row = 0
+
+    while y < eff_sec_maxy:
+        x = eff_sec_minx + stagger * (row % 2)
+        chunk = 1
+        while x < eff_sec_maxx:
+            affordable = np.array([current_total_cost + p['cost'] <= budget for p in sorted_panels])
+            if not affordable.any():
+                return placements, total_area, current_total_cost
+
+            # Candidate x positions if nothing fits: x, x + 0.5, x + 1.0, ...
+            # (accumulated like the scalar loop, so floats match exactly)
+            steps[0] = x
+            xs = np.cumsum(steps[:chunk])
+            xs = xs[xs < eff_sec_maxx]
+
+            boxes = shapely.box(xs, y, xs + eff_len, y + eff_wid)  # (n_types, n_x)
+            fits = contained(section, inset, boxes)
+            fits &= affordable[:, np.newaxis]
+
+            hits = np.flatnonzero(fits.any(axis=0))
+            if len(hits) == 0:
+                x = xs[-1] + X_STEP
+                chunk = min(2 * chunk, MAX_CHUNK)
+                continue
+
+            k = hits[0]
+            choice = int(np.argmax(fits[:, k]))  # largest fitting type
+            place(sorted_panels[choice], xs[k], y)
+            x = xs[k] + sorted_panels[choice]['eff_len']
+            chunk = 1
+
+            # Dense stretch: test a whole chain of further largest panels at
+            # once, every one that fits is what the scalar loop would place
+            run = 2
+            while choice == 0 and x < eff_sec_maxx:
+                run_steps[0] = x
+                chain = np.cumsum(run_steps[:run])
+                chain = chain[chain < eff_sec_maxx]
+                boxes = shapely.box(chain, y, chain + largest['eff_len'], y + largest['eff_wid'])
+                ok = contained(section, inset, boxes)
+                n_fit = len(chain) if ok.all() else int(np.argmin(ok))
+                placed = 0
+                for cx in chain[:n_fit]:
+                    if current_total_cost + largest['cost'] > budget:
+                        break
+                    place(largest, cx, y)
+                    x = cx + largest['eff_len']
+                    placed += 1
+                if placed < len(chain):
+                    break
+                run = min(2 * run, MAX_CHUNK)
+        y += row_pitch
+        row += 1
+    return placements, total_area, current_total_cost
+
+
+def rasterize(region, cell):
+    """
+    Occupancy grid of ``region``: ``(free, x0, y0)`` with ``free[j, i]``
+    True when the cell ``[x0 + i*cell, x0 + (i+1)*cell] x [y0 + j*cell,
+    y0 + (j+1)*cell]`` lies inside ``region``, or None for an empty region.
+
+    A cell is free when its four corners are inside (even-odd scanline
+    over all ring edges at once, points on the boundary count as inside)
+    and no boundary passes through its interior (checked with points
+    sampled along every edge, which catches slivers narrower than a cell).
+    Cells on the grid are exact for edges along the grid lines.
+    """
+    if region.is_empty:
+        return None
+    x0, y0, maxx, maxy = region.bounds
+    nx = int(math.ceil((maxx - x0) / cell - 1e-9))
+    ny = int(math.ceil((maxy - y0) / cell - 1e-9))
+    if nx < 1 or ny < 1:
+        return None
+
+    def edges(geom):
+        x1, y1, x2, y2 = [], [], [], []
+        for ring in shapely.get_rings(shapely.get_parts(geom)):
+            xy = shapely.get_coordinates(ring)
+            x1.append(xy[:-1, 0])
+            y1.append(xy[:-1, 1])
+            x2.append(xy[1:, 0])
+            y2.append(xy[1:, 1])
+        return [np.concatenate(a) for a in (x1, y1, x2, y2)]
+
+    # Corners inside the region, dilated a little so boundary points count
+    x1, y1, x2, y2 = edges(region.buffer(1e-7, join_style='mitre'))
+    sloped = y1 != y2
+    x1, y1, x2, y2 = x1[sloped], y1[sloped], x2[sloped], y2[sloped]
+    yc = y0 + np.arange(ny + 1) * cell
+    # Scanlines each edge may cross (one extra on both ends against
+    # rounding), then the exact test on just those
+    first = np.clip(np.floor((np.minimum(y1, y2) - y0) / cell).astype(int) - 1, 0, ny + 1)
+    last = np.clip(np.ceil((np.maximum(y1, y2) - y0) / cell).astype(int) + 2, 0, ny + 1)
+    counts = np.maximum(last - first, 0)
+    crossing = np.repeat(np.arange(len(x1)), counts)
+    rows = first[crossing] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    hit = (y1[crossing] <= yc[rows]) != (y2[crossing] <= yc[rows])
+    rows, crossing = rows[hit], crossing[hit]
+    xs = x1[crossing] + (yc[rows] - y1[crossing]) * (x2[crossing] - x1[crossing]) / (y2[crossing] - y1[crossing])
+    order = np.lexsort((xs, rows))
+    rows, xs = rows[order], xs[order]
+    start = np.clip(np.ceil((xs[0::2] - x0) / cell), 0, nx + 1).astype(int)
+    stop = np.clip(np.floor((xs[1::2] - x0) / cell) + 1, 0, nx + 1).astype(int)
+    diff = np.zeros((ny + 1, nx + 2), dtype=np.int8)  # intervals of a row never overlap
+    np.add.at(diff, (rows[0::2], start), 1)
+    np.add.at(diff, (rows[0::2], stop), -1)
+    corner = np.cumsum(diff, axis=1, dtype=np.int8)[:, :nx + 1] > 0
+    free = corner[:-1, :-1] & corner[:-1, 1:] & corner[1:, :-1] & corner[1:, 1:]
+
+    # Cells with a piece of boundary strictly inside them
+    x1, y1, x2, y2 = edges(region)
+    counts = np.ceil(np.hypot(x2 - x1, y2 - y1) / (cell / 2)).astype(int) + 1
+    edge = np.repeat(np.arange(len(x1)), counts)
+    t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / np.repeat(counts - 1, counts)
+    u = (x1[edge] + t * (x2[edge] - x1[edge]) - x0) / cell
+    v = (y1[edge] + t * (y2[edge] - y1[edge]) - y0) / cell
+    i, j = np.floor(u).astype(int), np.floor(v).astype(int)
+    inner = ((u - i > 1e-6) & (u - i < 1 - 1e-6) & (v - j > 1e-6) & (v - j < 1 - 1e-6)
+             & (i >= 0) & (i < nx) & (j >= 0) & (j < ny))
+    free[j[inner], i[inner]] = False
+    return free, x0, y0
+
+
+def place_section_raster(section, inset, panels, current_total_cost, budget, cell, phase=(0.0, 0.0),
+                         stagger=0.0, raster=None):
+    """
+    Raster counterpart of :func:`place_section`: same rows, margins and
+    "largest affordable panel that fits" rule, but the fit tests are
+    lookups in an occupancy grid.
+
+    ``inset ∩ section`` is rasterized once (:func:`rasterize`, or pass its
+    result as ``raster``; :meth:`PlacementEngine.rasters` keeps it per
+    layout).  For every row band the columns that are completely free are
+    reduced to a prefix sum of blocked columns (the rows of a summed-area
+    table that are actually used), and the fits of all panel types at
+    every cell of the row, plus the next cell where anything fits, are
+    scored in one NumPy pass; the walk along the row is then a few list
+    lookups per placed panel.  Panels are placed at exact positions (a
+    footprint is tested on every cell it touches); instead of advancing
+    x by ``X_STEP`` when nothing fits, the row jumps to the first cell
+    where a panel does fit.  Fits are up to one cell conservative along
+    edges that are not parallel to the rows, so the result is not always
+    better than :func:`place_section`: it often places more panels on
+    concave roofs, but fewer on many rotated layouts.  Building the grid
+    (O(area / cell²)) dominates the run time, so on large roofs it is
+    not faster than :func:`place_section`.
+    ``phase`` and ``stagger`` as in :func:`place_section`.
+
+    Returns ``(placements, total_area, current_total_cost)``.
+    """
+    sec_minx, sec_miny, sec_maxx, sec_maxy = section.bounds
+    eff_sec_minx = sec_minx + 0.05 + phase[0]
+    eff_sec_miny = sec_miny + 0.25 + phase[1]
+    eff_sec_maxx = sec_maxx - 0.05
+    eff_sec_maxy = sec_maxy - 0.25
+    if eff_sec_maxx <= eff_sec_minx or eff_sec_maxy <= eff_sec_miny:
+        return [], 0, current_total_cost
+    if raster is None:
+        raster = rasterize(inset.intersection(section), cell)
+    if raster is None:
+        return [], 0, current_total_cost
+    free, x0, y0 = raster
+    ny, nx = free.shape
+
+    placements = []
+    total_area = 0
+    sorted_panels = sorted(panels, key=lambda p: p['eff_len'] * p['eff_wid'], reverse=True)
+    costs = np.array([p['cost'] for p in sorted_panels])
+    lengths = np.array([p['eff_len'] for p in sorted_panels]) / cell  # in cells
+    widths = np.ceil(lengths - 1e-9).astype(int)  # cells covered from a cell boundary
+    row_pitch = max(p['eff_wid'] for p in panels)
+    types = list(enumerate(zip(sorted_panels, lengths.tolist(), widths.tolist())))
+    columns = np.arange(nx)
+
+    def place(panel, x, y):
+        nonlocal total_area, current_total_cost
+        placements.append(panel_placement(panel, float(x), y))
+        total_area += panel['proj_len'] * panel['proj_wid']
+        current_total_cost += panel['cost']
+
+    y = eff_sec_miny
+    row = 0
+    while y < eff_sec_maxy:
+        # Score all candidate cells of the row at once: fits[t][k][i] when
+        # type t fits covering widths[t] + k cells from cell i, and
+        # following[i] is the first cell >= i where some type fits
+        fits = np.zeros((len(sorted_panels), 2, nx), dtype=bool)
+        j = int(math.floor((y - y0) / cell + 1e-9))
+        bands = {}  # top row -> blocked columns of the band left of every column
+        for t, panel in enumerate(sorted_panels):
+            top = int(math.ceil((y + panel['eff_wid'] - y0) / cell - 1e-9))
+            if j < 0 or top > ny:
+                continue
+            if top not in bands:
+                bands[top] = np.concatenate(([0], np.cumsum(~free[j:top].all(axis=0))))
+            band = bands[top]
+            for k in (0, 1):
+                w = widths[t] + k
+                if w <= nx:
+                    fits[t, k, :nx - w + 1] = band[w:] == band[:nx - w + 1]
+        stats.raster_lookups += fits.size
+        following = np.minimum.accumulate(np.where(fits[:, 0].any(axis=0), columns, nx)[::-1])[::-1]
+        following = following.tolist() + [nx]
+        fit_lists = fits.tolist()
+
+        x = max(eff_sec_minx + stagger * (row % 2), x0)  # nothing fits left of the grid
+        while x < eff_sec_maxx:
+            u = (x - x0) / cell
+            i = math.floor(u + 1e-9)
+            if i >= nx:
+                break
+            choice = None
+            for t, (panel, length, width) in types:  # largest affordable type that fits
+                k = math.ceil(u + length - 1e-9) - i - width
+                if fit_lists[t][k][i] and current_total_cost + panel['cost'] <= budget:
+                    choice = panel
+                    break
+            if choice is not None:
+                place(choice, x, y)
+                x += choice['eff_len']
+                continue
+
+            affordable = current_total_cost + costs <= budget
+            if not affordable.any():
+                return placements, total_area, current_total_cost
+            # Nothing fits here: jump to the next cell where something does
+            if affordable.all():
+                i = following[i + 1]
+            else:
+                hits = np.flatnonzero(fits[affordable, 0, i + 1:].any(axis=0))
+                i = i + 1 + int(hits[0]) if len(hits) else nx
+            if i >= nx:
+                break
+            x = x0 + i * cell
+        y += row_pitch
+        row += 1
+    return placements, total_area, current_total_cost
+
+
+# Free x intervals of every row band [y, y + height]: the vertical segment
+# of the band at x lies inside the region.  Blocked are the x ranges of the
+# boundary edges inside the open band; of the gaps between them, those whose
+# midpoint lies inside the region are free.
+def free_intervals(region, ys, height, x_min, x_max):
+    rings = shapely.get_rings(shapely.get_parts(region))
+    xy = [shapely.get_coordinates(ring) for ring in rings]
+    x1 = np.concatenate([c[:-1, 0] for c in xy])
+    y1 = np.concatenate([c[:-1, 1] for c in xy])
+    x2 = np.concatenate([c[1:, 0] for c in xy])
+    y2 = np.concatenate([c[1:, 1] for c in xy])
+    lo_y, hi_y = np.minimum(y1, y2), np.maximum(y1, y2)
+    flat = hi_y - lo_y < 1e-12
+    slope = np.where(flat, 0.0, (x2 - x1) / np.where(flat, 1.0, y2 - y1))
+
+    rows = []
+    for y in ys:
+        bottom, top = y + 1e-9, y + height - 1e-9
+        hit = np.flatnonzero((hi_y > bottom) & (lo_y < top))
+        ya = np.maximum(lo_y[hit], bottom)
+        yb = np.minimum(hi_y[hit], top)
+        xa = x1[hit] + (ya - y1[hit]) * slope[hit]
+        xb = x1[hit] + (yb - y1[hit]) * slope[hit]
+        starts = np.where(flat[hit], np.minimum(x1[hit], x2[hit]), np.minimum(xa, xb))
+        ends = np.where(flat[hit], np.maximum(x1[hit], x2[hit]), np.maximum(xa, xb))
+        order = np.argsort(starts)
+        starts, ends = starts[order], np.maximum.accumulate(ends[order])
+        # Gaps between the merged blocked ranges, clipped to [x_min, x_max]
+        gap_start = np.concatenate(([x_min], ends))
+        gap_end = np.concatenate((starts, [x_max]))
+        gap_start = np.maximum(gap_start, x_min)
+        gap_end = np.minimum(gap_end, x_max)
+        keep = gap_end > gap_start + 1e-9
+        gap_start, gap_end = gap_start[keep], gap_end[keep]
+        inside = shapely.contains_xy(region, (gap_start + gap_end) / 2, y + height / 2)
+        rows.append(list(zip(gap_start[inside].tolist(), gap_end[inside].tolist())))
+    return rows
+
+
+def fill_row(intervals, panels, x_min):
+    """
+    Panels ``(type index, x)`` with the largest total area in one row,
+    where ``intervals[t]`` are the free intervals of panel type ``t``.
+    Positions are whole ``ROW_UNIT`` steps from ``x_min``; rows with the
+    same intervals (rectilinear roofs) are solved once, see
+    :func:`_fill_units`.
+    """
+    widths = tuple(int(math.ceil(p['eff_len'] / ROW_UNIT - 1e-6)) for p in panels)
+    values = tuple(int(round(p['proj_len'] * p['proj_wid'] * 1e4)) for p in panels)  # cm²
+    ranges = [[(int(math.ceil((a - x_min) / ROW_UNIT - 1e-6)), int(math.floor((b - x_min) / ROW_UNIT + 1e-6)))
+               for a, b in free] for free in intervals]
+    starts = [lo for free in ranges for lo, _ in free]
+    if not starts:
+        return []
+    origin = min(starts)
+    ranges = tuple(tuple((lo - origin, hi - origin) for lo, hi in free) for free in ranges)
+    return [(t, x_min + (origin + start) * ROW_UNIT) for t, start in _fill_units(ranges, widths, values)]
+
+
+@lru_cache(maxsize=4096)
+def _fill_units(ranges, widths, values):
+    """
+    Unbounded knapsack of :func:`fill_row` in ``ROW_UNIT`` steps (panel
+    lengths rounded up, so the panels always fit): ``best[c]`` is the
+    largest area that fits left of ``c``.  A panel type is added to all
+    positions at once with a running maximum along the chains
+    ``r, r + w, r + 2w, ...`` of its length ``w``, restarted wherever it
+    may not end; the passes over all types repeat until nothing changes,
+    which allows any order of types along the row.
+    Returns ``(type index, start)`` pairs from left to right.
+    """
+    size = max((hi for free in ranges for _, hi in free), default=0)
+    if size <= 0:
+        return ()
+    big = 2 * max(values) * (size // min(widths) + 1) + 1
+
+    # ends[t, c]: a panel of type t may end at c (and start at c - w)
+    ends = np.zeros((len(widths), size + 1), dtype=bool)
+    for t, w in enumerate(widths):
+        for lo, hi in ranges[t]:
+            if lo + w <= hi:
+                ends[t, lo + w:hi + 1] = True
+    if not ends.any():
+        return ()
+
+    best = np.zeros(size + 1, dtype=np.int64)
+    while True:
+        previous = best
+        for t, (w, v) in enumerate(zip(widths, values)):
+            if not ends[t].any():
+                continue
+            n = -(-(size + 1) // w) * w
+            g = np.zeros(n, dtype=np.int64)
+            g[:size + 1] = best
+            ok = np.zeros(n, dtype=bool)
+            ok[:size + 1] = ends[t]
+            g, ok = g.reshape(-1, w), ok.reshape(-1, w)  # row k, column r: position k*w + r
+            k = np.arange(len(g))[:, np.newaxis] * v
+            segment = np.cumsum(~ok, axis=0) * big
+            chained = np.maximum.accumulate(g - k + segment, axis=0) - segment + k
+            best = np.maximum(best, chained.ravel()[:size + 1])
+        best = np.maximum.accumulate(best)
+        if np.array_equal(best, previous):
+            break
+
+    row = []
+    c = size
+    while best[c] > 0:
+        c = int(np.searchsorted(best, best[c]))  # where the last panel ends
+        for t, (w, v) in enumerate(zip(widths, values)):
+            if ends[t, c] and best[c - w] + v == best[c]:
+                row.append((t, c - w))
+                c -= w
+                break
+    return tuple(row[::-1])
+
+
+def affordable_row(row, intervals, panels, budget_left):
+    """
+    Best part of a row that costs at most ``budget_left``, for rows the
+    remaining budget cannot pay (only a few panels are affordable then,
+    so all combinations of type counts are enumerated).
+
+    When all panel types share one free interval, any mix whose lengths
+    fit in it is a candidate, placed from the left, largest first;
+    otherwise the candidates are the subsets of ``row`` (see
+    :func:`fill_row`), leftmost panels of every type first.  Of the
+    mixes with the largest area the cheapest is taken.
+    """
+    single = len(intervals[0]) == 1 and all(free == intervals[0] for free in intervals)
+    if single:
+        start, end = intervals[0][0]
+        available = [int((end - start) // p['eff_len']) for p in panels]
+    else:
+        available = [sum(1 for t, _ in row if t == i) for i in range(len(panels))]
+    limits = [min(n, int(budget_left // p['cost'])) for n, p in zip(available, panels)]
+    grid = np.indices([n + 1 for n in limits]).reshape(len(panels), -1)
+    cost = np.array([p['cost'] for p in panels]) @ grid
+    value = np.array([p['proj_len'] * p['proj_wid'] for p in panels]) @ grid
+    ok = cost <= budget_left
+    if single:
+        ok &= np.array([p['eff_len'] for p in panels]) @ grid <= end - start + 1e-9
+    value = np.where(ok, value, -1)
+    choice = np.flatnonzero(value >= value.max() - 1e-9)
+    counts = grid[:, choice[np.argmin(cost[choice])]].tolist()
+
+    kept = []
+    if single:
+        x = start
+        for t, n in enumerate(counts):
+            for _ in range(n):
+                kept.append((t, x))
+                x += panels[t]['eff_len']
+        return kept
+    for t, x in row:
+        if counts[t] > 0:
+            counts[t] -= 1
+            kept.append((t, x))
+    return kept
+
+
+def place_section_rows(section, inset, panels, current_total_cost, budget, phase=(0.0, 0.0), stagger=0.0):
+    """
+    Row solver counterpart of :func:`place_section` with the same rows and
+    margins.
+
+    The free intervals of every row and panel type (where the band of
+    that type lies inside ``inset ∩ section``) are computed once per panel
+    height for all rows, by interval arithmetic on the boundary edges
+    crossing each band (:func:`free_intervals`), and every row is filled
+    with the panel mix of :func:`fill_row` (best total area) instead of
+    trying large → small at every ``X_STEP``.  When the remaining budget
+    cannot pay a row, the best affordable mix is placed instead
+    (:func:`affordable_row`); :meth:`PlacementEngine.budgeted` runs the
+    solver with the real budget for that reason.  ``phase`` and ``stagger`` as in
+    :func:`place_section`; since panels may start anywhere in a row here,
+    staggering only moves the left end of every other row.
+
+    Returns ``(placements, total_area, current_total_cost)``.
+    """
+    sec_minx, sec_miny, sec_maxx, sec_maxy = section.bounds
+    eff_sec_minx = sec_minx + 0.05 + phase[0]
+    eff_sec_miny = sec_miny + 0.25 + phase[1]
+    eff_sec_maxx = sec_maxx - 0.05
+    eff_sec_maxy = sec_maxy - 0.25
+    if eff_sec_maxx <= eff_sec_minx or eff_sec_maxy <= eff_sec_miny:
+        return [], 0, current_total_cost
+
+    placements = []
+    total_area = 0
+    sorted_panels = sorted(panels, key=lambda p: p['eff_len'] * p['eff_wid'], reverse=True)
+    row_pitch = max(p['eff_wid'] for p in panels)
+    ys = [eff_sec_miny]
+    while ys[-1] + row_pitch < eff_sec_maxy:
+        ys.append(ys[-1] + row_pitch)
+    region = inset.intersection(section)
+    # A panel may start up to eff_sec_maxx, like in place_section
+    x_max = min(sec_maxx, eff_sec_maxx + max(p['eff_len'] for p in panels))
+    by_height = {}
+    for panel in sorted_panels:
+        if panel['eff_wid'] not in by_height:
+            by_height[panel['eff_wid']] = free_intervals(region, np.array(ys), panel['eff_wid'],
+                                                         eff_sec_minx, x_max)
+            stats.row_bands += len(ys)
+
+    for r, y in enumerate(ys):
+        x_min = eff_sec_minx + stagger * (r % 2)
+        intervals = [[(max(a, x_min), b) for a, b in by_height[p['eff_wid']][r] if b > x_min + 1e-9]
+                     for p in sorted_panels]
+        row = fill_row(intervals, sorted_panels, x_min)
+        if sum(sorted_panels[t]['cost'] for t, _ in row) + current_total_cost > budget:
+            row = affordable_row(row, intervals, sorted_panels, budget - current_total_cost)
+        for t, x in row:
+            panel = sorted_panels[t]
+            placements.append(panel_placement(panel, x, y))
+            total_area += panel['proj_len'] * panel['proj_wid']
+            current_total_cost += panel['cost']
+    return placements, total_area, current_total_cost
+
+
+# Panels as plain data for worker processes: type names plus one row of
+# [proj_len, proj_wid, eff_len, eff_wid, cost, rotated] per panel
+def encode_panels(panels):
+    types = tuple(p['type'] for p in panels)
+    specs = np.array([[p['proj_len'], p['proj_wid'], p['eff_len'], p['eff_wid'], p['cost'],
+                       float(p.get('rotated', False))] for p in panels])
+    return types, specs
+
+
+def decode_panels(types, specs):
+    return [{'type': t, 'proj_len': row[0], 'proj_wid': row[1], 'eff_len': row[2], 'eff_wid': row[3],
+             'cost': row[4], 'rotated': bool(row[5])} for t, row in zip(types, specs.tolist())]
+
+
+_pool = None
+_threads = None
+_worker_engines = {}
+
+
+# Process pool shared by all faces, created on first use
+def process_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _pool
+
+
+# Thread pool of the phase search, created on first use
+def thread_pool():
+    global _threads
+    if _threads is None:
+        _threads = ThreadPoolExecutor(max_workers=os.cpu_count())
+    return _threads
+
+
+# Phase search candidates (dx, dy, jitter): the unshifted grid first, then a
+# Halton sequence (bases 2, 3, 5) over [0, x_period) x [0, y_period) x
+# [-max_jitter, max_jitter], which covers the box evenly for any count
+def search_offsets(count, x_period, y_period, max_jitter):
+    def halton(i, base):
+        f, r = 1.0, 0.0
+        while i > 0:
+            f /= base
+            r += f * (i % base)
+            i //= base
+        return r
+
+    offsets = [(0.0, 0.0, 0.0)]
+    for i in range(1, count):
+        jitter = (2 * halton(i, 5) - 1) * max_jitter if max_jitter else 0.0
+        offsets.append((halton(i, 2) * x_period, halton(i, 3) * y_period, jitter))
+    return offsets
+
+
+# Runs in a worker process. Takes the roof as WKB and the panels as arrays
+# and returns the placements as compact arrays:
+# (x, y, type index, proj_area, total_cost, stats counters)
+def _run_packed(roof_wkb, types, specs, azimuth, num_sections, budget, packer='shapely', cell=RASTER_CELL,
+                phase=(0.0, 0.0), stagger=False, orientation='landscape'):
+    key = (roof_wkb, types, specs.tobytes(), packer, cell)
+    engine = _worker_engines.get(key)
+    if engine is None:
+        _worker_engines.clear()  # only keep the face that is being worked on
+        engine = PlacementEngine(shapely.from_wkb(roof_wkb), decode_panels(types, specs), packer, cell)
+        _worker_engines[key] = engine
+    before = stats.snapshot()
+    placements, total_area, _, _, _, total_cost = engine.run(azimuth, num_sections, budget, phase=phase,
+                                                             stagger=stagger, orientation=orientation)
+    type_index = {(p['type'], p['rotated']): i for i, p in enumerate(engine.panels)}
+    return (np.array([p['x'] for p in placements]),
+            np.array([p['y'] for p in placements]),
+            np.array([type_index[p['type'], p['rotated']] for p in placements], dtype=np.int8),
+            total_area, total_cost, tuple(a - b for a, b in zip(stats.snapshot(), before)))
+
+
+class Sequence(list):
+    """
+    Stored placement ``[placements, proj_area, azimuth, rotation_angle,
+    name, total_cost]`` together with the grid ``phase`` ``(dx, dy)`` it
+    was placed with, so a budgeted run can repeat it.
+    """
+
+    def __init__(self, result, phase=(0.0, 0.0)):
+        super().__init__(result)
+        self.phase = phase
+
+
+# Budget-independent sequences of all engines, keyed by roof, panels,
+# azimuth and section count (least recently used dropped first)
+_sequences = OrderedDict()
+
+
+def truncate(result, budget, substitutes=None):
+    """
+    Apply a budget to a budget-independent placement sequence (a result
+    of :meth:`PlacementEngine.sequences`) in O(n): panels are taken in
+    placement order and any panel that no longer fits in the budget is
+    skipped.  The remaining panels never overlap, since they did not
+    overlap with the skipped ones present either.
+
+    Without ``substitutes`` the slots of skipped panels stay empty.  With
+    ``substitutes`` (:meth:`PlacementEngine.substitutes`) such a slot
+    takes the largest affordable panel whose footprint fits inside that of
+    the skipped one, which is just as valid and needs no geometry.
+    Returns ``[placements, proj_area, azimuth, rotation_angle, name, total_cost]``.
+    """
+    placements, total_area, azimuth, rotation_angle, name, total_cost = result
+    if total_cost <= budget:
+        return [list(placements), total_area, azimuth, rotation_angle, name, total_cost]
+    kept = []
+    total_area = 0
+    total_cost = 0
+    for placement in placements:
+        if total_cost + placement['cost'] <= budget:
+            kept.append(placement)
+        elif substitutes is not None:
+            panel = next((panel for panel in substitutes[placement['type'], placement['rotated']]
+                          if total_cost + panel['cost'] <= budget), None)
+            if panel is None:
+                continue
+            placement = panel_placement(panel, placement['x'], placement['y'])
+            placement['cost'] = panel['cost']
+            kept.append(placement)
+        else:
+            continue
+        total_area += placement['length'] * placement['width']
+        total_cost += placement['cost']
+    return [kept, total_area, azimuth, rotation_angle, name, total_cost]
+
+
+# Split the polygon into vertical strips of equal width
+def partition_roof_shape_based(poly, num_sections=3):
+    minx, miny, maxx, maxy = poly.bounds
+    section_width = (maxx - minx) / num_sections
+    sections = []
+    for i in range(num_sections):
+        sec_minx = minx + i * section_width
+        section = box(sec_minx, miny, sec_minx + section_width, maxy).intersection(poly)
+        if not section.is_empty:
+            sections.append(section)
+    return sections
+
+
+class PlacementEngine:
+    """
+    Runs any number of placement strategies on one roof polygon while
+    sharing the expensive setup between them: the rotated polygon and its
+    prepared inset are built once per azimuth, the sections once per
+    (azimuth, section count) and the panel list is sorted once.
+
+    Parameters
+    ----------
+    roof_poly : shapely.Polygon
+        Flattened 2-D roof face.
+    panels : list[dict]
+        Panel dictionaries (``type``, ``proj_len``, ``proj_wid``,
+        ``eff_len``, ``eff_wid``, ``cost`` and optionally ``rotated``).
+        Portrait (``rotated``) panels are only used by jobs with the
+        ``'portrait'`` or ``'mixed'`` orientation.
+    packer : {'shapely', 'raster', 'rows'}, default 'shapely'
+        :func:`place_section` (exact Shapely containment tests, x in
+        ``X_STEP`` steps), :func:`place_section_raster` (occupancy grid
+        with O(1) fit tests, x at cell resolution) or
+        :func:`place_section_rows` (free intervals per row, best panel mix
+        per row by dynamic programming).
+    cell : float, default ``RASTER_CELL``
+        Cell size (m) of the raster packer, 0.02–0.05 is sensible.
+    """
+
+    def __init__(self, roof_poly, panels, packer='shapely', cell=RASTER_CELL):
+        if packer not in PACKERS:
+            raise ValueError(f"packer must be one of {', '.join(PACKERS)}, got {packer!r}.")
+        self.roof_poly = roof_poly
+        self.panels = sorted(panels, key=lambda p: p['eff_len'] * p['eff_wid'], reverse=True)
+        self.oriented = {
+            'landscape': [p for p in self.panels if not p.get('rotated', False)],
+            'portrait': [p for p in self.panels if p.get('rotated', False)],
+            'mixed': self.panels,
+        }
+        self.packer = packer
+        self.cell = cell
+        self._substitutes = {}
+        self._layouts = {}
+        self._sections = {}
+        self._rasters = {}
+        self._key = None
+
+    @staticmethod
+    def rotation_angle(azimuth):
+        return -azimuth + 90
+
+    # Cheaper panels of an orientation whose footprint fits inside that of
+    # each panel, largest first, keyed by (type, rotated); see truncate
+    def substitutes(self, orientation):
+        if orientation not in self._substitutes:
+            panels = self.oriented[orientation]
+            self._substitutes[orientation] = {
+                (panel['type'], panel.get('rotated', False)): [
+                    other for other in panels if other['cost'] < panel['cost']
+                    and other['eff_len'] <= panel['eff_len'] + 1e-9 and other['eff_wid'] <= panel['eff_wid'] + 1e-9]
+                for panel in panels}
+        return self._substitutes[orientation]
+
+    # Rotated polygon (rows along +X) and its prepared inset for an azimuth
+    def layout(self, azimuth):
+        key = round(azimuth, 9)
+        if key not in self._layouts:
+            rotated = shapely_rotate(self.roof_poly, self.rotation_angle(azimuth), origin='centroid',
+                                     use_radians=False)
+            self._layouts[key] = (rotated, inset_polygon(rotated))
+        return self._layouts[key]
+
+    def sections(self, azimuth, num_sections):
+        key = (round(azimuth, 9), num_sections)
+        if key not in self._sections:
+            rotated, _ = self.layout(azimuth)
+            self._sections[key] = partition_roof_shape_based(rotated, num_sections=num_sections)
+        return self._sections[key]
+
+    # Occupancy grid (rasterize) of every section inside the inset, for the
+    # raster packer; shared by all runs, phases and budgets of a layout
+    def rasters(self, azimuth, num_sections):
+        key = (round(azimuth, 9), num_sections)
+        if key not in self._rasters:
+            _, inset = self.layout(azimuth)
+            self._rasters[key] = [rasterize(inset.intersection(section), self.cell)
+                                  for section in self.sections(azimuth, num_sections)]
+        return self._rasters[key]
+
+    def run(self, azimuth, num_sections, budget, name='', phase=(0.0, 0.0), stagger=False,
+            orientation='landscape'):
+        """
+        Places panels at ``azimuth`` over ``num_sections`` sections and returns
+        ``[placements, proj_area, azimuth, rotation_angle, name, total_cost]``.
+        ``phase`` moves the grid origin of every section, ``stagger`` shifts
+        every other row by half the longest panel footprint and
+        ``orientation`` (``'landscape'``, ``'portrait'`` or ``'mixed'``)
+        selects the panels the packer may use.
+        """
+        if orientation not in ORIENTATIONS:
+            raise ValueError(f"orientation must be one of {', '.join(ORIENTATIONS)}, got {orientation!r}.")
+        panels = self.oriented[orientation]
+        if not panels:
+            raise ValueError(f"orientation {orientation!r} needs {orientation} panels, "
+                             f"see projected_panels(..., rotated=True).")
+        shift = max(p['eff_len'] for p in panels) / 2 if stagger else 0.0
+        _, inset = self.layout(azimuth)
+        all_placements = []
+        total_area = 0
+        total_cost = 0
+        sections = self.sections(azimuth, num_sections)
+        rasters = self.rasters(azimuth, num_sections) if self.packer == 'raster' else [None] * len(sections)
+        for section, raster in zip(sections, rasters):
+            if self.packer == 'raster':
+                section_placements, section_area, total_cost = place_section_raster(
+                    section, inset, panels, total_cost, budget, self.cell, phase, shift, raster)
+            elif self.packer == 'rows':
+                section_placements, section_area, total_cost = place_section_rows(
+                    section, inset, panels, total_cost, budget, phase, shift)
+            else:
+                section_placements, section_area, total_cost = place_section(section, inset, panels,
+                                                                             total_cost, budget, phase, shift)
+            all_placements.extend(section_placements)
+            total_area += section_area
+        return [all_placements, total_area, azimuth, self.rotation_angle(azimuth), name, total_cost]
+
+    @property
+    def key(self):
+        if self._key is None:
+            types, specs = encode_panels(self.panels)
+            self._key = (shapely.to_wkb(self.roof_poly), types, specs.tobytes(), self.packer, self.cell)
+        return self._key
+
+    def sequences(self, jobs, execution='serial'):
+        """
+        Budget-independent placement of every ``(azimuth, num_sections,
+        name, stagger, orientation)`` job (see :meth:`run`): all panels that
+        fit, in placement order, each with its ``cost``.  A budget is then
+        applied with :meth:`budgeted` in O(n), without geometry.  Sequences are kept per
+        roof/panels/azimuth/sections/layout for the whole session.
+        """
+        keys = [(self.key, round(azimuth, 9), num_sections, stagger, orientation)
+                for azimuth, num_sections, _, stagger, orientation in jobs]
+        missing = [(job, key) for job, key in zip(jobs, keys) if key not in _sequences]
+        if missing:
+            results = self.run_many([job for job, _ in missing], float('inf'), execution=execution)
+            self._store([key for _, key in missing], results)
+        return self._stored(jobs, keys)
+
+    def _store(self, keys, results, phases=None):
+        cost = {panel['type']: panel['cost'] for panel in self.panels}  # same for both orientations
+        for key, result, phase in zip(keys, results, phases or [(0.0, 0.0)] * len(keys)):
+            for placement in result[0]:
+                placement['cost'] = cost[placement['type']]
+            _sequences[key] = Sequence(result, phase)
+            if len(_sequences) > MAX_SEQUENCES:
+                _sequences.popitem(last=False)
+
+    def budgeted(self, jobs, sequences, budget, execution='serial', refine=False):
+        """
+        Results of ``jobs`` under ``budget``, given their ``sequences``
+        (:meth:`sequences` or :meth:`search`, the azimuth and grid phase of
+        a sequence replace those of its job).
+
+        A sequence the budget pays is returned as is.  Otherwise the budget
+        is applied in O(n) without any geometry: the better of
+        :func:`truncate` and :func:`truncate` with :meth:`substitutes`
+        (cheaper panels in the slots of unaffordable ones).  A searched
+        sequence competes with the unshifted grid of :meth:`sequences`
+        (stored by :meth:`search`), so under any budget a search places at
+        least as much as no search.
+
+        ``refine=True`` also runs every job the budget cannot pay again
+        with the budget, at the azimuth and phase of its sequence, so the
+        packer can use the space a cheaper panel leaves (and the row
+        solver picks its best affordable mix), and keeps that run when it
+        places more.  Refined runs are kept for the session like
+        sequences.
+        """
+        plain = self.sequences(jobs, execution=execution)
+        options = [[sequence] if base[0] is sequence[0] else [sequence, base]
+                   for sequence, base in zip(sequences, plain)]
+        results = []
+        for (_, _, _, _, orientation), candidates in zip(jobs, options):
+            best = None
+            for sequence in candidates:
+                for result in (truncate(sequence, budget), truncate(sequence, budget, self.substitutes(orientation))):
+                    if best is None or result[1] > best[1] + 1e-9:
+                        best = result
+            results.append(best)
+        over = [(i, (sequence[2], num_sections, name, stagger, orientation), getattr(sequence, 'phase', (0.0, 0.0)))
+                for i, ((_, num_sections, name, stagger, orientation), candidates) in enumerate(zip(jobs, options))
+                for sequence in candidates if sequence[5] > budget]
+        if not refine or not over:
+            return results
+        keys = [(self.key, round(azimuth, 9), num_sections, stagger, orientation, 'budget', budget, phase)
+                for _, (azimuth, num_sections, _, stagger, orientation), phase in over]
+        missing = [(job, phase, key) for (_, job, phase), key in zip(over, keys) if key not in _sequences]
+        if missing:
+            runs = self.run_many([job for job, _, _ in missing], budget, execution=execution,
+                                 phases=[phase for _, phase, _ in missing])
+            self._store([key for _, _, key in missing], runs, [phase for _, phase, _ in missing])
+        runs = self._stored([job for _, job, _ in over], keys)
+        for (i, _, _), run in zip(over, runs):
+            if run[1] > results[i][1] + 1e-9:
+                results[i] = [list(run[0])] + run[1:]
+        return results
+
+    @staticmethod
+    def _stored(jobs, keys):
+        sequences = []
+        for (_, _, name, _, _), key in zip(jobs, keys):
+            _sequences.move_to_end(key)
+            stored = _sequences[key]
+            placements, total_area, azimuth, rotation_angle, _, total_cost = stored
+            sequences.append(Sequence([placements, total_area, azimuth, rotation_angle, name, total_cost],
+                                      stored.phase))
+        return sequences
+
+    def run_many(self, jobs, budget, execution='serial', phases=None):
+        """
+        Runs several ``(azimuth, num_sections, name, stagger, orientation)``
+        jobs (with the grid ``phases``, unshifted by default) and returns
+        their results in order.  With ``execution='process'`` every job runs in the
+        shared :func:`process_pool`; the roof is sent as WKB, the panels as an
+        array and the placements come back as compact arrays, so the wall
+        time is that of the slowest job instead of the sum.
+        """
+        phases = phases or [(0.0, 0.0)] * len(jobs)
+        if execution == 'serial':
+            return [self.run(azimuth, num_sections, budget, name=name, phase=phase, stagger=stagger,
+                             orientation=orientation)
+                    for (azimuth, num_sections, name, stagger, orientation), phase in zip(jobs, phases)]
+        if execution != 'process':
+            raise ValueError(f"execution must be 'serial' or 'process', got {execution!r}.")
+
+        roof_wkb = shapely.to_wkb(self.roof_poly)
+        types, specs = encode_panels(self.panels)
+        futures = [process_pool().submit(_run_packed, roof_wkb, types, specs, azimuth, num_sections, budget,
+                                         self.packer, self.cell, phase, stagger, orientation)
+                   for (azimuth, num_sections, _, stagger, orientation), phase in zip(jobs, phases)]
+
+        return [self._unpack(future.result(), job[0], job[2]) for job, future in zip(jobs, futures)]
+
+    # Result of _run_packed back to [placements, proj_area, azimuth, rotation_angle, name, total_cost]
+    def _unpack(self, packed, azimuth, name):
+        xs, ys, kinds, total_area, total_cost, counts = packed
+        stats.add(counts)
+        placements = []
+        for x, y, kind in zip(xs.tolist(), ys.tolist(), kinds.tolist()):
+            placements.append(panel_placement(self.panels[kind], x, y))
+        return [placements, total_area, azimuth, self.rotation_angle(azimuth), name, total_cost]
+
+    def search(self, jobs, time_budget=SEARCH_TIME, max_jitter=MAX_JITTER, execution='serial'):
+        """
+        Like :meth:`sequences`, but every ``(azimuth, num_sections, name,
+        stagger, orientation)`` job keeps the best of many shifted and
+        slightly rotated grids.
+
+        The grid origin is fixed at the section corner and the row pitch at
+        the tallest panel, so a few centimetres of shift can fit an extra
+        row or column.  Candidates ``(dx, dy, jitter)`` come from
+        :func:`search_offsets` (the unshifted grid first, so the result is
+        never worse than :meth:`sequences`, which it stores as well; under
+        a budget see :meth:`budgeted`) and run concurrently: in a
+        thread pool, or in the :func:`process_pool` with
+        ``execution='process'``.  New candidates are started until
+        ``time_budget`` seconds have passed (for all jobs together); the
+        one with the largest panel area wins, so the outcome depends on the
+        machine speed.  Results are kept for the session like sequences.
+        The azimuth of a result includes its jitter, its ``phase`` the
+        winning ``(dx, dy)``.
+        """
+        if execution not in ('serial', 'process'):
+            raise ValueError(f"execution must be 'serial' or 'process', got {execution!r}.")
+        keys = [(self.key, round(azimuth, 9), num_sections, stagger, orientation, 'search', time_budget,
+                 max_jitter) for azimuth, num_sections, _, stagger, orientation in jobs]
+        missing = [(job, key) for job, key in zip(jobs, keys) if key not in _sequences]
+        if not missing:
+            return self._stored(jobs, keys)
+
+        row_pitch = max(p['eff_wid'] for p in self.panels)
+        offsets = search_offsets(MAX_OFFSETS, X_STEP, row_pitch, max_jitter)
+        tasks = iter([(j, offset) for offset in offsets for j in range(len(missing))])
+        if execution == 'process':
+            executor = process_pool()
+            roof_wkb = shapely.to_wkb(self.roof_poly)
+            types, specs = encode_panels(self.panels)
+        else:
+            executor = thread_pool()
+
+        def submit(j, offset):
+            (azimuth, num_sections, name, stagger, orientation), _ = missing[j]
+            dx, dy, jitter = offset
+            if execution == 'process':
+                return executor.submit(_run_packed, roof_wkb, types, specs, azimuth + jitter, num_sections,
+                                       float('inf'), self.packer, self.cell, (dx, dy), stagger, orientation)
+            return executor.submit(self.run, azimuth + jitter, num_sections, float('inf'), name, (dx, dy),
+                                   stagger, orientation)
+
+        deadline = time.perf_counter() + time_budget
+        best = [None] * len(missing)
+        phases = [(0.0, 0.0)] * len(missing)
+        running = {}
+        for task in tasks:
+            running[submit(*task)] = task
+            if len(running) >= max(len(missing), 2 * (os.cpu_count() or 1)):
+                break
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                j, offset = running.pop(future)
+                dx, dy, jitter = offset
+                (azimuth, num_sections, name, stagger, orientation), _ = missing[j]
+                result = future.result()
+                if execution == 'process':
+                    result = self._unpack(result, azimuth + jitter, name)
+                if offset == offsets[0]:
+                    # The unshifted grid is the plain sequence, kept for budgeted
+                    self._store([(self.key, round(azimuth, 9), num_sections, stagger, orientation)], [result])
+                if best[j] is None or result[1] > best[j][1] + 1e-9:
+                    best[j] = result
+                    phases[j] = (dx, dy)
+                if time.perf_counter() < deadline:
+                    task = next(tasks, None)
+                    if task is not None:
+                        running[submit(*task)] = task
+
+        self._store([key for _, key in missing], best, phases)
+        return self._stored(jobs, keys)
@@ -0,0 +1,200 @@
+"""
+Opt-in profiling of the model tree.
+
+Enable it with the environment variable ``SOLAR_PROFILE=1`` (or
+``profiler.enable()`` before building the :class:`House`).  While enabled:
+
+* every ParaPy attribute whose function is decorated with
+  :func:`profiled` records its evaluations (ParaPy only
+  evaluates an attribute again after an input changed, so more than one
+  call means the cache was invalidated), total and self wall time, and
+  its cache hits (reads answered with the cached value, counted for
+  classes decorated with :func:`profile_attributes`);
+* PVGIS and OSM requests are recorded as ``network:`` spans;
+* the caches of the app report hits and misses through :meth:`Profiler.count`.
+
+:class:`TextWriter` writes the report next to ``Results.txt``:
+``Profile.json`` (per attribute, network and counter tables) and
+``Profile.folded`` (self time per call stack in microseconds, the input
+format of ``flamegraph.pl`` and speedscope).
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Profiler:
+    """Collects nested timing spans and counters, see the module docstring."""
+
+    def __init__(self):
+        self.enabled = os.environ.get('SOLAR_PROFILE', '') not in ('', '0')
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._classes = {}  # class -> profiled attribute names, see profile_attributes
+        self._hooked = {}  # class -> its own __getattribute__ (or None) before hooking
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.spans = {}  # name -> [calls, total_s, self_s]
+            self.stacks = {}  # 'outer;inner' -> self_s
+            self.counters = {}
+            self.hits = {}  # attribute -> reads served from the ParaPy cache
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        for cls in list(self._classes):
+            if enabled:
+                self._hook(cls)
+            else:
+                self._unhook(cls)
+
+    # Count reads of the profiled attributes of cls that did not evaluate
+    # the function, i.e. were answered from the ParaPy cache
+    def _hook(self, cls):
+        if cls in self._hooked:
+            return
+        names = self._classes[cls]
+        self._hooked[cls] = cls.__dict__.get('__getattribute__')
+        original = cls.__getattribute__
+
+        def __getattribute__(obj, name):
+            if name not in names:
+                return original(obj, name)
+            evaluated = self._local.__dict__.setdefault('evaluated', {})
+            key = (id(obj), name)
+            before = evaluated.get(key, 0)
+            value = original(obj, name)
+            if evaluated.get(key, 0) == before:
+                self.hit(f"{type(obj).__name__}.{name}")
+            return value
+
+        cls.__getattribute__ = __getattribute__
+
+    def _unhook(self, cls):
+        if cls not in self._hooked:
+            return
+        own = self._hooked.pop(cls)
+        if own is None:
+            del cls.__getattribute__
+        else:
+            cls.__getattribute__ = own
+
+    @contextmanager
+    def span(self, name):
+        if not self.enabled:
+            yield
+            return
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        frame = [name, 0.0]  # name, time spent in child spans
+        stack.append(frame)
+        path = ';'.join(f[0] for f in stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][1] += elapsed
+            own = elapsed - frame[1]
+            with self._lock:
+                entry = self.spans.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] += own
+                self.stacks[path] = self.stacks.get(path, 0.0) + own
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def hit(self, name):
+        with self._lock:
+            self.hits[name] = self.hits.get(name, 0) + 1
+
+    def report(self):
+        def table(names):
+            return {name: {'calls': calls, 'total_s': round(total, 6), 'self_s': round(own, 6)}
+                    for name, (calls, total, own) in sorted(self.spans.items(), key=lambda kv: -kv[1][1])
+                    if name in names}
+
+        with self._lock:
+            network = {name for name in self.spans if name.startswith('network:')}
+            attributes = table(set(self.spans) - network)
+            for name, hits in self.hits.items():
+                attributes.setdefault(name, {'calls': 0, 'total_s': 0.0, 'self_s': 0.0})['cache_hits'] = hits
+            for entry in attributes.values():
+                entry.setdefault('cache_hits', 0)
+            return {
+                'attributes': attributes,
+                'network': table(network),
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def write_report(self, folder="OUTPUT"):
+        """Write ``Profile.json`` and ``Profile.folded`` to ``folder``."""
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "Profile.json"), "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        with self._lock:
+            stacks = sorted(self.stacks.items())
+        with open(os.path.join(folder, "Profile.folded"), "w", encoding="utf-8") as f:
+            for path, seconds in stacks:
+                f.write(f"{path} {int(seconds * 1e6)}\n")
+        print(f"Profiler: report written to {os.path.join(folder, 'Profile.json')}")
+
+
+# Shared profiler of the app
+profiler = Profiler()
+
+
+# Names of the profiled functions per class qualname, see profile_attributes
+_profiled_names = {}
+
+
+def profiled(func):
+    """
+    Record every evaluation of ``func`` as ``Class.attribute``.  Put it
+    below ``@Attribute`` / ``@Input`` so ParaPy caches the wrapper.
+    """
+    owner, _, name = func.__qualname__.rpartition('.')
+    _profiled_names.setdefault(owner, set()).add(name)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not profiler.enabled:
+            return func(self, *args, **kwargs)
+        evaluated = profiler._local.__dict__.setdefault('evaluated', {})
+        key = (id(self), func.__name__)
+        evaluated[key] = evaluated.get(key, 0) + 1
+        with profiler.span(f"{type(self).__name__}.{func.__name__}"):
+            return func(self, *args, **kwargs)
+    return wrapper
+
+
+def profile_attributes(cls):
+    """
+    Class decorator: count the cache hits of the :func:`profiled`
+    attributes of ``cls``.
+
+    Reads of those attributes go through a ``__getattribute__`` hook; a
+    read during which the function did not run was answered from the
+    ParaPy cache and is counted as a cache hit.  The hook is only
+    installed while profiling is enabled, so it costs nothing otherwise.
+    Raises ``TypeError`` when ``cls`` has no :func:`profiled` functions.
+    """
+    names = _profiled_names.get(cls.__qualname__)
+    if not names:
+        raise TypeError(f"{cls.__qualname__} has no @profiled attributes to profile")
+    profiler._classes[cls] = names
+    if profiler.enabled:
+        profiler._hook(cls)
+    return cls
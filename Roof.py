@@ -2,9 +2,11 @@ from parapy.core import Base, Input, Attribute, Part, child
 from parapy.geom import Face, Point, LineSegment, Wire
 from shapely.geometry import Polygon as ShapelyPolygon
 from GableRoof import GableRoof
-from tkinter import Tk, messagebox
+from tkinter import Tk, TclError, messagebox
+from Profiler import profile_attributes, profiled
 
 
+@profile_attributes
 class Roof(Base):
     """
     Composite roof consisting of a standard flat surface with
@@ -42,8 +44,12 @@ class Roof(Base):
     """
 
     # Create a Tk root window to use for pop-up dialogs
+    # Without a display (batch runs) the ValueError raised after it is enough
     def _popup_error(self, title: str, msg: str):
-        dlg = Tk()
+        try:
+            dlg = Tk()
+        except TclError:
+            return
         dlg.withdraw()  # hide the root window
         messagebox.showerror(title, msg)  # modal dialog
         dlg.destroy()
@@ -89,6 +95,7 @@ class Roof(Base):
     # Normalized footprint and snap coordinates to a grid
     # If footprint is not normalized, parapy cant handle the large numbers
     @Attribute
+    @profiled
     def normalized_footprint(self):
         coords = list(self.footprint.exterior.coords)
         x0, y0 = coords[0]
@@ -102,6 +109,7 @@ class Roof(Base):
 
     # Define the flat roof as polygon without the gable roofs
     @Attribute
+    @profiled
     def flat_roof(self):
         flat_roof = self.normalized_footprint
         for gable in self.gable_roof_indices:
@@ -111,6 +119,7 @@ class Roof(Base):
         return flat_roof
 
     @Attribute
+    @profiled
     def flat_roof_wires(self):
         # if there's no flat area at all, skip it entirely
         if self.flat_roof.is_empty or self.flat_roof.area < 1e-6:
@@ -143,11 +152,13 @@ class Roof(Base):
             slope_height=self.slope_height)
 
     @Attribute
+    @profiled
     def gable_roof_faces(self):
         return self.gable_roofs.roof_faces
 
     # Get all roof wires, including flat and gable roofs
     @Attribute(in_tree=True)
+    @profiled
     def roof_wires(self):
         return self.flat_roof_wires + \
             [child.roof_wire_1 for child in self.gable_roofs] + \
@@ -19,6 +19,9 @@ class SolarPanel(GeomBase):
         :pyattr:`OptimizedPlacement.panel_frames`).
     color : str | tuple
         Visualization of the solar panel type.
+    rotated : bool
+        Portrait panel: turned by 90 degrees in its frame, so length and
+        width are swapped.
 
     Part
     ----------
@@ -36,6 +39,7 @@ class SolarPanel(GeomBase):
     type = Input() # 'small', 'medium', 'large'
     position = Input() # panel_frame from OptimizedPlacementCost
     color = Input() # Visulaization color of the solar panel type
+    rotated = Input(False) # Portrait orientation, length and width swapped
 
     @Attribute
     def type_size(self):
@@ -44,7 +48,10 @@ class SolarPanel(GeomBase):
             "medium": (0.05, 1.65,  0.991),
             "large":  (0.05, 1.956, 0.991),
         }
-        return Vector(*sizes.get(self.type, sizes["small"]))
+        height, width, length = sizes.get(self.type, sizes["small"])
+        if self.rotated:
+            width, length = length, width
+        return Vector(height, width, length)
 
     # Generate the box geometry for the solar panel module
     @Part
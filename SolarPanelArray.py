@@ -1,7 +1,12 @@
 from parapy.core import Base, Input, Part, child
 from SolarPanel import SolarPanel
 from OptimizedPlacementCost import OptimizedPlacement
+from PlacementEngine import DEFAULT_STRATEGIES, RASTER_CELL, SEARCH_TIME
+from ExactPlacement import EXACT_GRID, EXACT_TIME_LIMIT
+import Irradiance as irradiance
+from Profiler import profile_attributes, profiled
 
+@profile_attributes
 class SolarPanelArray(Base):
     """
     Container that groups all :class:`SolarPanel` objects belonging to a
@@ -17,6 +22,49 @@ class SolarPanelArray(Base):
         Budget for *this* face (already pre-allocated by :class:`House`).
     loss : float, default 18 %
         Electrical loss factor.
+    irradiance_backend : {'pvgis', 'local'}, default 'pvgis'
+        Radiation source – forwarded to :class:`OptimizedPlacement`.
+    radiation_lookup : bool, default False
+        Use the interpolated tilt/azimuth table – forwarded to
+        :class:`OptimizedPlacement`.
+    optimal_angles : list[float], optional
+        ``[azimuth, tilt]`` shared by all faces of a house – forwarded to
+        :class:`OptimizedPlacement`.
+    radiation_prefetch : object, optional
+        Concurrent radiation fetch of :class:`House` – forwarded to
+        :class:`OptimizedPlacement`.
+    strategies : list[dict], default ``DEFAULT_STRATEGIES``
+        Placement heuristics – forwarded to :class:`OptimizedPlacement`.
+    execution : {'serial', 'process'}, default 'serial'
+        Run the heuristics serially or in worker processes – forwarded to
+        :class:`OptimizedPlacement`.
+    packer : {'shapely', 'raster', 'rows'}, default 'shapely'
+        Fit tests of the placement engine – forwarded to
+        :class:`OptimizedPlacement`.
+    raster_cell : float, default 0.05
+        Cell size (m) of the raster packer – forwarded to
+        :class:`OptimizedPlacement`.
+    refine_budget : bool, default False
+        Place again under the budget – forwarded to
+        :class:`OptimizedPlacement`.
+    placement_mode : {'heuristic', 'exact'}, default 'heuristic'
+        Also solve the placement as an integer program – forwarded to
+        :class:`OptimizedPlacement`.
+    exact_objective : {'yield', 'count'}, default 'yield'
+        Objective of the ``'exact'`` mode – forwarded to
+        :class:`OptimizedPlacement`.
+    exact_time_limit : float, default 30
+        Time limit (s) of the ``'exact'`` mode – forwarded to
+        :class:`OptimizedPlacement`.
+    exact_grid : float, default 0.25
+        Candidate spacing (m) of the ``'exact'`` mode – forwarded to
+        :class:`OptimizedPlacement`.
+    phase_search : bool, default False
+        Search grid offsets and azimuth jitter per strategy – forwarded to
+        :class:`OptimizedPlacement`.
+    search_time : float, default 2
+        Time budget (s) of the phase search – forwarded to
+        :class:`OptimizedPlacement`.
 
     Parts
     -----
@@ -31,19 +79,55 @@ class SolarPanelArray(Base):
     coords = Input() # Latitude and longitude of the house
     budget = Input() # Budget for this face
     loss = Input(18) # Electrical loss factor, default 18%
+    irradiance_backend = Input('pvgis') # 'pvgis' (web API) or 'local' (offline model)
+    radiation_lookup = Input(False) # Interpolate radiation from a per-location table
+    radiation_prefetch = Input(None) # House-level concurrent fetch, evaluated before placement
+    strategies = Input(DEFAULT_STRATEGIES) # Placement heuristics evaluated by the optimizer
+    execution = Input('serial') # 'serial' or 'process' (heuristics in worker processes)
+    packer = Input('shapely') # 'shapely', 'raster' or 'rows' packer of the placement engine
+    raster_cell = Input(RASTER_CELL) # Cell size (m) of the raster packer
+    refine_budget = Input(False) # Place strategies again under the budget instead of only trimming them
+    placement_mode = Input('heuristic') # 'heuristic' or 'exact' (integer program, needs ortools)
+    exact_objective = Input('yield') # 'yield' (panel area) or 'count', exact mode only
+    exact_time_limit = Input(EXACT_TIME_LIMIT) # Solver time limit (s) per face, exact mode only
+    exact_grid = Input(EXACT_GRID) # Spacing (m) of candidate positions, exact mode only
+    phase_search = Input(False) # Search grid offsets and azimuth jitter per strategy
+    search_time = Input(SEARCH_TIME) # Time budget (s) of the phase search per face
+
+    # [azimuth, tilt] for this location, normally injected by House
+    @Input
+    @profiled
+    def optimal_angles(self):
+        return irradiance.optimal_angles(self.coords, self.loss, backend=self.irradiance_backend)
 
     @Part
     def solution(self):
         return OptimizedPlacement(roof_face=self.roof_face,
                                   coords=self.coords,
                                   budget=self.budget,
-                                  loss=self.loss)
+                                  loss=self.loss,
+                                  irradiance_backend=self.irradiance_backend,
+                                  radiation_lookup=self.radiation_lookup,
+                                  optimal_angles=self.optimal_angles,
+                                  radiation_prefetch=self.radiation_prefetch,
+                                  strategies=self.strategies,
+                                  execution=self.execution,
+                                  packer=self.packer,
+                                  raster_cell=self.raster_cell,
+                                  refine_budget=self.refine_budget,
+                                  placement_mode=self.placement_mode,
+                                  exact_objective=self.exact_objective,
+                                  exact_time_limit=self.exact_time_limit,
+                                  exact_grid=self.exact_grid,
+                                  phase_search=self.phase_search,
+                                  search_time=self.search_time)
 
     @Part
     def solar_panels(self):
         return SolarPanel(quantify=len(self.solution.real_points),
                           type=self.solution.best_result[0][0][child.index]['type'],
                           color=self.solution.best_result[0][0][child.index]['color'],
+                          rotated=self.solution.best_result[0][0][child.index]['rotated'],
                           position=self.solution.panel_frames[child.index])
 
 
@@ -1,5 +1,6 @@
 from parapy.core import Base, Input, Attribute
 import os
+from Profiler import profiler
 
 class TextWriter(Base):
     """
@@ -22,6 +23,8 @@ class TextWriter(Base):
     save_file : None
         Function that takes all the gathered data from 'House' and
         exports it into a text file so it can be used and shared.
+        With profiling enabled, ``Profile.json`` / ``Profile.folded``
+        are written to the same folder.
     """
     solar_panel_details = Input()
     summary_info = Input()
@@ -62,5 +65,9 @@ class TextWriter(Base):
                 f.write(f"      Usable Energy: {usable_energy:.2f} kWh/year\n")
                 f.write(f"      Money Saved: €{money_saved:.2f}/year\n")
 
+            # Profile of this run next to the results (SOLAR_PROFILE=1)
+            if profiler.enabled:
+                profiler.write_report(os.path.dirname(self.filename))
+
         except Exception as e:
             print(f"[ERROR] Failed to write file: {e}")
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Benchmark of :func:`FootprintGeometry.extended_intersections` against the
+former O(n²) double loop of ``House.extended_intersections`` on synthetic
+footprints, up to 1,000 vertexes.  Both must return identical points.
+
+Run from the repository root::
+
+    python benchmarks/bench_extended_intersections.py
+"""
+
+import time
+
+from synthetic import footprint, rectangle, l_shape, star, comb
+from FootprintGeometry import extended_intersections, snap
+
+
+# The former House.extended_intersections loop, on (x, y) tuples
+def reference_intersections(pts):
+    intersections = []
+    base_xy = {(round(x, 6), round(y, 6)) for x, y in pts}
+
+    def on_segment(p, q1, q2):
+        return (min(q1[0], q2[0]) - 1e-6 <= p[0] <= max(q1[0], q2[0]) + 1e-6
+                and min(q1[1], q2[1]) - 1e-6 <= p[1] <= max(q1[1], q2[1]) + 1e-6)
+
+    for i in range(len(pts) - 1):
+        for j in range(i + 1, len(pts) - 1):
+            a1, a2 = pts[i], pts[i + 1]
+            b1, b2 = pts[j], pts[j + 1]
+            denom = (a1[0] - a2[0]) * (b1[1] - b2[1]) - (a1[1] - a2[1]) * (b1[0] - b2[0])
+            if abs(denom) > 1e-6:
+                px = ((a1[0] * a2[1] - a1[1] * a2[0]) * (b1[0] - b2[0]) - (a1[0] - a2[0]) * (
+                        b1[0] * b2[1] - b1[1] * b2[0])) / denom
+                py = ((a1[0] * a2[1] - a1[1] * a2[0]) * (b1[1] - b2[1]) - (a1[1] - a2[1]) * (
+                        b1[0] * b2[1] - b1[1] * b2[0])) / denom
+                p = (snap(px), snap(py))
+                key = (round(p[0], 6), round(p[1], 6))
+                if key not in base_xy and (on_segment(p, a1, a2) or on_segment(p, b1, b2)):
+                    intersections.append(p)
+    return intersections
+
+
+CASES = [('rectangle', footprint(rectangle())), ('L-shape', footprint(l_shape())),
+         ('star 100', footprint(star(100))), ('comb 100', footprint(comb(100))),
+         ('star 1000', footprint(star(1000))), ('comb 1000', footprint(comb(1000)))]
+
+
+def main():
+    print(f"{'footprint':<12}{'vertexes':>9}{'points':>9}{'loop (s)':>11}{'numpy (s)':>11}{'speedup':>9}")
+    for name, pts in CASES:
+        start = time.perf_counter()
+        expected = reference_intersections(pts)
+        t_loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = extended_intersections(pts)
+        t_numpy = time.perf_counter() - start
+
+        assert result == expected, f"{name}: results differ"
+        print(f"{name:<12}{len(pts) - 1:>9}{len(result):>9}{t_loop:>11.4f}{t_numpy:>11.4f}"
+              f"{t_loop / t_numpy:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Offline benchmark suite of the solar panel app.
+
+Covers the placement heuristics (:class:`PlacementEngine`, the engine
+behind :class:`OptimizedPlacement`) on synthetic roofs, gable roof plane
+fitting, ``House.extended_intersections``, the local irradiance model (in
+place of PVGIS, so no network is used) and the :class:`TextWriter` output
+(only when ParaPy is installed).  OSM and PVGIS are never contacted.
+
+For every case it reports the best and median wall time, the peak of
+traced allocations and, for placement, the number of containment tests
+(occupancy-grid lookups and row bands are stored separately for the
+raster and rows packers, they are not comparable).
+
+Usage, from the repository root::
+
+    python benchmarks/run_benchmarks.py                 # run, compare with baseline
+    python benchmarks/run_benchmarks.py --save          # store a new baseline
+    python benchmarks/run_benchmarks.py --check         # exit 1 on regressions
+    python benchmarks/run_benchmarks.py -k placement    # only matching cases
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from synthetic import ROOFS, footprint, roof_polygon, star, comb
+import PlacementEngine
+from PlacementEngine import (PlacementEngine as Engine, DEFAULT_STRATEGIES, LAYOUT_STRATEGIES, PANEL_SPECS,
+                             projected_panels)
+from FootprintGeometry import extended_intersections, fit_plane
+from LocalIrradiance import LocalIrradiance
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+WALL_AZIMUTH = 180.0  # Azimuths used for the 'wall' / 'optimal' strategies
+OPTIMAL_AZIMUTH = 163.1
+BUDGET = 1e9  # Large enough to never stop the placement early
+
+
+def placement_case(coords, budget=BUDGET, packer='shapely', strategies=DEFAULT_STRATEGIES):
+    roof = roof_polygon(coords)
+    panels = projected_panels(PANEL_SPECS, 0) + projected_panels(PANEL_SPECS, 0, rotated=True)
+
+    def run():
+        # Fresh engine and row solutions: rotated layouts are not reused between repeats
+        PlacementEngine._fill_units.cache_clear()
+        engine = Engine(roof, panels, packer=packer)
+        for strategy in strategies:
+            azimuth = WALL_AZIMUTH if strategy['align'] == 'wall' else OPTIMAL_AZIMUTH
+            engine.run(azimuth, strategy['sections'], budget, name=strategy['name'],
+                       stagger=strategy.get('stagger', False), orientation=strategy.get('orientation', 'landscape'))
+    return run
+
+
+def intersections_case(coords):
+    pts = footprint(coords)
+    return lambda: extended_intersections(pts)
+
+
+def plane_fit_case(n=2000):
+    rng = np.random.default_rng(0)
+    # Four corners of a sloped gable face each (two eaves, two ridge points)
+    quads = []
+    for _ in range(n):
+        x, y = rng.uniform(0, 10, 2)
+        w, d, h = rng.uniform(4, 12), rng.uniform(3, 6), rng.uniform(1, 3)
+        quads.append([[x, y, 6], [x + w, y, 6], [x + w, y + d, 6 + h], [x, y + d, 6 + h]])
+    return lambda: [fit_plane(quad) for quad in quads]
+
+
+def irradiance_case():
+    def run():
+        # Fresh model: no cached solar position
+        model = LocalIrradiance()
+        for azimuth in (-90, -30, 0, 30, 90):
+            model.hourly(52.0, 4.4, 35.0, azimuth)
+    return run
+
+
+def textwriter_case():
+    try:
+        from TextWriter import TextWriter
+    except ImportError:
+        return None  # ParaPy not installed
+
+    folder = tempfile.mkdtemp(prefix='solar-bench-')
+    details = [{'roof_area': 120.0 + i, 'panel_total_area': 80.0,
+                'panel_counts': {'small': 3, 'medium': 5, 'large': 20},
+                'best_tilt': 35.0, 'best_azimuth': 0.0, 'actual_azimuth': 12.0, 'avg_daily_radiation': 3.1}
+               for i in range(50)]
+
+    class BenchWriter(TextWriter):
+        filename = os.path.join(folder, 'Results.txt')
+
+    return lambda: BenchWriter(solar_panel_details=details, summary_info=(25000, 9000.0, 2700.0)).save_file
+
+
+def cases():
+    result = {}
+    for name, coords in ROOFS.items():
+        result[f'placement/{name}'] = placement_case(coords)
+    result['placement/rectangle-budget'] = placement_case(ROOFS['rectangle'], budget=5000)
+    for name in ('concave', 'warehouse', 'many-vertex'):
+        result[f'placement-raster/{name}'] = placement_case(ROOFS[name], packer='raster')
+        result[f'placement-rows/{name}'] = placement_case(ROOFS[name], packer='rows')
+        result[f'placement-layout/{name}'] = placement_case(ROOFS[name], strategies=LAYOUT_STRATEGIES)
+    result['plane_fit/2000-faces'] = plane_fit_case()
+    for name, coords in (('star-100', star(100)), ('comb-100', comb(100)),
+                         ('star-1000', star(1000)), ('comb-1000', comb(1000))):
+        result[f'intersections/{name}'] = intersections_case(coords)
+    result['irradiance/local-5-planes'] = irradiance_case()
+    writer = textwriter_case()
+    if writer is not None:
+        result['textwriter/50-faces'] = writer
+    return result
+
+
+def measure(func, repeats):
+    func()  # warm-up: imports, numpy/shapely first-call overhead
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    PlacementEngine.stats.reset()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'best_s': min(times),
+        'median_s': statistics.median(times),
+        'peak_kib': peak / 1024,
+        'containment_tests': PlacementEngine.stats.containment_tests,
+        'raster_lookups': PlacementEngine.stats.raster_lookups,
+        'row_bands': PlacementEngine.stats.row_bands,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-k', dest='pattern', default='', help="only run cases containing this text")
+    parser.add_argument('-n', '--repeats', type=int, default=5)
+    parser.add_argument('--save', action='store_true', help="store the results as the new baseline")
+    parser.add_argument('--check', action='store_true', help="exit with 1 when a case regressed")
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help="slowdown factor of the best time that counts as a regression")
+    parser.add_argument('--baseline', default=BASELINE)
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    print(f"{'case':<32}{'best (ms)':>11}{'median (ms)':>13}{'peak (KiB)':>12}{'tests':>9} {'vs base':>8}")
+    for name, func in cases().items():
+        if args.pattern not in name:
+            continue
+        r = measure(func, args.repeats)
+        results[name] = r
+
+        ratio = ''
+        if name in baseline:
+            factor = r['best_s'] / baseline[name]['best_s']
+            ratio = f"{factor:.2f}x"
+            if factor > args.tolerance:
+                regressions.append(name)
+                ratio += ' !'
+            if any(r[counter] != baseline[name].get(counter, 0)
+                   for counter in ('containment_tests', 'raster_lookups', 'row_bands')):
+                ratio += ' (tests changed)'
+        print(f"{name:<32}{r['best_s'] * 1000:>11.2f}{r['median_s'] * 1000:>13.2f}{r['peak_kib']:>12.0f}"
+              f"{r['containment_tests']:>9} {ratio:>8}")
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+
+    if regressions:
+        print(f"Slower than {args.tolerance}x the baseline: {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
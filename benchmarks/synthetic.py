@@ -0,0 +1,62 @@
+"""
+Synthetic building footprints / roof outlines shared by the benchmarks.
+Every generator returns the open list of (x, y) vertexes in metres.
+"""
+
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shapely.geometry import Polygon as ShapelyPolygon
+from FootprintGeometry import snap
+
+
+def rectangle(length=20, width=10):
+    return [(0, 0), (length, 0), (length, width), (0, width)]
+
+
+def l_shape():
+    return [(0, 0), (30, 0), (30, 12), (12, 12), (12, 25), (0, 25)]
+
+
+def u_shape():
+    # Concave courtyard building
+    return [(0, 0), (30, 0), (30, 20), (20, 20), (20, 8), (10, 8), (10, 20), (0, 20)]
+
+
+def star(n):
+    # Concave polygon with n vertexes alternating between two radii
+    return [((40 if k % 2 else 25) * math.cos(2 * math.pi * k / n),
+             (40 if k % 2 else 25) * math.sin(2 * math.pi * k / n)) for k in range(n)]
+
+
+def comb(n):
+    # Rectilinear warehouse-like outline with n vertexes (many parallel edges)
+    teeth = max(1, (n - 4) // 4)
+    top = []
+    for k in range(teeth):
+        x = 2.0 * k
+        top += [(x, 10), (x, 12), (x + 1, 12), (x + 1, 10)]
+    return [(0, 0), (2.0 * teeth, 0)] + top[::-1]
+
+
+# Closed footprint ring relative to its first point, snapped like House.base_pts
+def footprint(coords):
+    coords = list(coords) + [coords[0]]
+    x0, y0 = coords[0]
+    return [(snap(x - x0), snap(y - y0)) for x, y in coords]
+
+
+def roof_polygon(coords):
+    return ShapelyPolygon(coords)
+
+
+ROOFS = {
+    'rectangle': rectangle(),
+    'L-shape': l_shape(),
+    'concave': u_shape(),
+    'warehouse': rectangle(100, 60),
+    'many-vertex': star(400),
+}
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The app is a set of flat modules in the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
@@ -0,0 +1,26 @@
+import numpy as np
+
+from BudgetAllocation import allocate_budget
+from PlacementEngine import truncate
+
+
+def test_unaffordable_panel_keeps_the_face_open():
+    curves = [[(500.0, 600.0), (100.0, 110.0)], [(300.0, 200.0)]]
+    spent, counts = allocate_budget(curves, 450.0)
+    assert spent == [100.0, 300.0]
+    assert counts == [1, 1]
+
+
+def test_face_budget_reproduces_the_chosen_panels():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        curves = [[(float(cost), float(cost * rng.uniform(0.5, 2.0))) for cost in rng.choice([250, 300, 400], n)]
+                  for n in rng.integers(0, 12, 3)]
+        budget = float(rng.uniform(0, 6000))
+        spent, counts = allocate_budget(curves, budget)
+        assert sum(spent) <= budget + 1e-9
+        for curve, face_budget, count in zip(curves, spent, counts):
+            placements = [{'cost': cost, 'length': 1.0, 'width': 1.0} for cost, _ in curve]
+            result = truncate([placements, 0.0, 0.0, 0.0, '', sum(cost for cost, _ in curve)], face_budget)
+            assert len(result[0]) == count
+            assert result[5] == face_budget
@@ -0,0 +1,52 @@
+import pytest
+import shapely
+from shapely.geometry import box
+
+from synthetic import ROOFS, roof_polygon
+from ExactPlacement import conflict_points, solve_exact
+from PlacementEngine import PlacementEngine, PANEL_SPECS, projected_panels
+
+pytest.importorskip('ortools')
+
+
+def assert_valid(engine, result):
+    _, inset = engine.layout(result[2])
+    boxes = [box(p['x'], p['y'], p['x'] + p['length'], p['y'] + p['width']) for p in result[0]]
+    assert all(inset.contains(b) for b in boxes)
+    assert shapely.union_all(boxes).area == pytest.approx(sum(b.area for b in boxes))
+
+
+@pytest.mark.parametrize('budget', [float('inf'), 3000.0])
+def test_exact_valid_and_never_worse_than_hint(budget):
+    engine = PlacementEngine(box(0, 0, 9, 6), projected_panels(PANEL_SPECS, 0))
+    hint = engine.run(180.0, 1, budget, name='Wall-Aligned (No Sections)')
+    result = solve_exact(engine, hint, budget, grid=0.25, time_limit=10)
+    assert_valid(engine, result)
+    assert result[5] <= budget
+    assert result[1] >= hint[1] - 1e-9
+    assert result[2:4] == hint[2:4]
+
+
+def test_exact_count_objective():
+    engine = PlacementEngine(roof_polygon(ROOFS['concave']), projected_panels(PANEL_SPECS, 35))
+    hint = engine.run(180.0, 1, float('inf'))
+    result = solve_exact(engine, hint, float('inf'), grid=0.5, time_limit=10, objective='count')
+    assert_valid(engine, result)
+    assert len(result[0]) >= len(hint[0])
+
+
+def test_conflict_points_cover_every_overlap():
+    panels = projected_panels(PANEL_SPECS, 0)
+    candidates = [(0, 0.0, 0.0), (2, 1.0, 0.5), (1, 1.2, 1.5), (2, 0.5, 2.1), (0, 3.0, 0.0)]
+    sets = [set(s) for s in conflict_points(candidates, panels)]
+    footprints = [box(x, y, x + panels[t]['eff_len'], y + panels[t]['eff_wid']) for t, x, y in candidates]
+    for a in range(len(candidates)):
+        for b in range(a + 1, len(candidates)):
+            overlap = footprints[a].intersection(footprints[b]).area > 1e-9
+            assert overlap == any({a, b} <= s for s in sets)
+
+
+def test_model_building_counts_against_time_limit():
+    engine = PlacementEngine(roof_polygon(ROOFS['concave']), projected_panels(PANEL_SPECS, 35))
+    hint = engine.run(180.0, 1, float('inf'))
+    assert solve_exact(engine, hint, float('inf'), time_limit=1e-6) == hint
@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pytest
+
+import Irradiance as irradiance
+import IrradianceGrid
+import PVGISCache
+from LocalIrradiance import local_irradiance
+from PVGISClient import PVGISError
+
+
+def test_prefetch_keeps_going_after_a_failed_query(monkeypatch):
+    def hourly_series(coords, tilt, azimuth, loss, backend='pvgis'):
+        if azimuth == 90:
+            raise PVGISError("rate limited")
+        return np.zeros(3)
+
+    monkeypatch.setattr(irradiance, 'hourly_series', hourly_series)
+    coords = [52.0, 4.4]
+    result = irradiance.prefetch_series([(coords, 35, azimuth, 14) for azimuth in (0, 90, -90)])
+    assert result[irradiance.series_key(coords, 35, 90, 14)] is None
+    assert result[irradiance.series_key(coords, 35, 0, 14)] is not None
+    assert result[irradiance.series_key(coords, 35, -90, 14)] is not None
+
+
+def test_evict_ignores_files_removed_by_another_writer(tmp_path, monkeypatch):
+    cache = PVGISCache.PVGISCache(folder=str(tmp_path), max_bytes=10)
+    for i in range(3):
+        (tmp_path / f'{i}.json').write_text('x' * 8)
+    gone = str(tmp_path / '1.json')
+
+    def racing_isfile(path):
+        if path == gone:
+            os.remove(path)  # another process evicts it right after this check
+            return True
+        return os.path.exists(path)
+
+    monkeypatch.setattr(PVGISCache.os.path, 'isfile', racing_isfile)
+    cache.evict()
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_cache_size_is_tracked_without_listing_the_folder(tmp_path, monkeypatch):
+    cache = PVGISCache.PVGISCache(folder=str(tmp_path), max_bytes=1000)
+    listings = []
+    listdir = os.listdir
+    monkeypatch.setattr(PVGISCache.os, 'listdir', lambda path: listings.append(path) or listdir(path))
+    for i in range(20):
+        cache.put('PVcalc', {'i': i}, 'x' * 10)
+    assert len(listings) == 1  # only the initial scan
+    for i in range(5):
+        cache.put('PVcalc', {'big': i}, 'x' * 300)
+    assert len(listings) > 1
+    assert sum(os.path.getsize(tmp_path / name) for name in listdir(tmp_path)) <= 1000
+
+
+def test_annual_totals_per_calendar_year():
+    series = np.zeros(24 * (365 + 366), dtype=PVGISCache.HOURLY_DTYPE)
+    series['year'][:24 * 365] = 2019
+    series['year'][24 * 365:] = 2020
+    series['G(i)'] = 500.0
+    assert PVGISCache.annual_totals(series) == {2019: 365 * 12.0, 2020: 366 * 12.0}
+
+
+@pytest.mark.parametrize('coords, low, high', [((52.0, 4.4), 1000, 1100), ((40.4, -3.7), 1650, 1850)])
+def test_local_horizontal_irradiation_per_latitude(coords, low, high):
+    annual = local_irradiance.components(*coords)['ghi'].sum() / 1000
+    assert low < annual < high
+
+
+def test_lookup_grid_within_one_percent(monkeypatch):
+    monkeypatch.setattr(IrradianceGrid.pvgis_cache, 'get_array', lambda endpoint, params: None)
+    monkeypatch.setattr(IrradianceGrid.pvgis_cache, 'put_array', lambda endpoint, params, data: None)
+    lat, lon = 52.0, 4.4
+    grid = IrradianceGrid.IrradianceGrid([lat, lon], 14, backend='local')
+    rng = np.random.default_rng(0)
+    tilts, azimuths = rng.uniform(0, 90, 200), rng.uniform(-180, 180, 200)
+    exact = local_irradiance.poa_irradiance(lat, lon, tilts, azimuths).sum(axis=-1) / 1000 / 365
+    approx = np.array([grid.daily_radiation(t, a) for t, a in zip(tilts, azimuths)])
+    assert np.abs(approx / exact - 1).max() < 0.01
+
+
+def test_pvgis_grid_takes_one_request(monkeypatch):
+    for module in (IrradianceGrid, irradiance):
+        monkeypatch.setattr(module.pvgis_cache, 'get_array', lambda endpoint, params: None)
+        monkeypatch.setattr(module.pvgis_cache, 'put_array', lambda endpoint, params, data: None)
+    lat, lon = 52.0, 4.4
+    c = local_irradiance.components(lat, lon)
+    beam = c['ghi'] - c['dhi']
+    times = np.datetime64('2019-01-01T00:30') + np.arange(8760).astype('timedelta64[h]')
+    hourly = [{'time': t.item().strftime('%Y%m%d:%H%M'), 'Gb(i)': b, 'Gd(i)': d}
+              for t, b, d in zip(times, beam, c['dhi'])]
+    calls = []
+
+    def get_json(endpoint, params):
+        calls.append((endpoint, params['angle'], params['components']))
+        return {'outputs': {'hourly': hourly}}
+
+    monkeypatch.setattr(irradiance.pvgis_client, 'get_json', get_json)
+    grid = IrradianceGrid.IrradianceGrid([lat, lon], 14)
+    local = IrradianceGrid.IrradianceGrid([lat, lon], 14, backend='local')
+    assert calls == [('seriescalc', 0, 1)]
+    assert np.allclose(grid.table, local.table, rtol=1e-3)
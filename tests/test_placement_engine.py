@@ -0,0 +1,197 @@
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import box
+
+from synthetic import ROOFS, roof_polygon
+import PlacementEngine as placement_engine
+from PlacementEngine import PlacementEngine, ORIENTATIONS, PACKERS, PANEL_SPECS, projected_panels, truncate
+
+JOB = (180.0, 1, 'Wall-Aligned (No Sections)', False, 'landscape')
+
+
+@pytest.mark.parametrize('packer', PACKERS)
+def test_refined_budget_never_worse_than_direct_run(packer):
+    rng = np.random.default_rng(0)
+    panels = projected_panels(PANEL_SPECS, 0)
+    cases = [(4.61, 10.63, 6228.0)] + [tuple(rng.uniform(3, 15, 2)) + (rng.uniform(500, 15000),)
+                                       for _ in range(40)]
+    for width, height, budget in cases:
+        engine = PlacementEngine(box(0, 0, width, height), panels, packer)
+        sequences = engine.sequences([JOB])
+        result = engine.budgeted([JOB], sequences, budget, refine=True)[0]
+        direct = engine.run(JOB[0], JOB[1], budget)
+        assert result[5] <= budget + 1e-9
+        assert result[1] >= direct[1] - 1e-9
+        assert result[1] >= truncate(sequences[0], budget)[1] - 1e-9
+
+
+def assert_valid(engine, result):
+    # Every panel inside the inset roof, no two panels overlapping
+    _, inset = engine.layout(result[2])
+    boxes = [box(p['x'], p['y'], p['x'] + p['length'], p['y'] + p['width']) for p in result[0]]
+    assert all(inset.contains(b) for b in boxes)
+    assert shapely.union_all(boxes).area == pytest.approx(sum(b.area for b in boxes))
+
+
+@pytest.mark.parametrize('packer', PACKERS)
+@pytest.mark.parametrize('orientation', ['landscape', 'mixed'])
+def test_budget_fills_slots_without_geometry(packer, orientation, monkeypatch):
+    panels = projected_panels(PANEL_SPECS, 35) + projected_panels(PANEL_SPECS, 35, rotated=True)
+    engine = PlacementEngine(roof_polygon(ROOFS['concave']), panels, packer)
+    job = (163.1, 3, 'Optimal (Sections)', False, orientation)
+    sequences = engine.sequences([job])
+    monkeypatch.setattr(engine, 'run_many', None)  # budgets must not place panels again
+    for budget in np.linspace(0, sequences[0][5], 25):
+        result = engine.budgeted([job], sequences, budget)[0]
+        assert result[5] <= budget + 1e-9
+        assert result[1] >= truncate(sequences[0], budget)[1] - 1e-9
+        assert_valid(engine, result)
+
+
+def test_budget_sweep_places_panels_once(monkeypatch):
+    # House.budget_sweep -> OptimizedPlacement.evaluate_budget -> budgeted, per face and budget
+    calls = []
+    place_section = placement_engine.place_section
+    monkeypatch.setattr(placement_engine, 'place_section', lambda *args: calls.append(1) or place_section(*args))
+    jobs = [(180.0 + strategy['offset'], strategy['sections'], strategy['name'], False, 'landscape')
+            for strategy in ({'name': 'Wall-Aligned', 'sections': 3, 'offset': 0.0},
+                             {'name': 'Optimal', 'sections': 1, 'offset': -11.3})]
+    faces = [PlacementEngine(roof_polygon(ROOFS[name]), projected_panels(PANEL_SPECS, 35))
+             for name in ('rectangle', 'concave')]
+    sequences = [face.sequences(jobs) for face in faces]
+    placed = len(calls)
+    assert placed > 0
+    for budget in np.linspace(0, 20000, 30):
+        for face, face_sequences in zip(faces, sequences):
+            face.budgeted(jobs, face_sequences, budget / 2)
+    assert len(calls) == placed
+
+
+@pytest.mark.parametrize('packer', PACKERS)
+def test_search_never_worse_than_sequences_under_budget(packer):
+    panels = projected_panels(PANEL_SPECS, 35)
+    jobs = [(180.0, 1, 'Wall-Aligned (No Sections)', False, 'landscape'),
+            (163.1, 3, 'Optimal (Sections)', True, 'landscape')]
+    for name in ('rectangle', 'L-shape', 'concave'):
+        engine = PlacementEngine(roof_polygon(ROOFS[name]), panels, packer)
+        searched = engine.search(jobs, time_budget=0.3)
+        plain = engine.sequences(jobs)
+        for budget in np.linspace(500, max(s[5] for s in plain), 12):
+            for refine in (False, True):
+                with_search = engine.budgeted(jobs, searched, budget, refine=refine)
+                without = engine.budgeted(jobs, plain, budget, refine=refine)
+                for a, b in zip(with_search, without):
+                    assert a[5] <= budget + 1e-9
+                    assert a[1] >= b[1] - 1e-9
+
+
+def test_refined_budget_keeps_the_searched_phase():
+    engine = PlacementEngine(roof_polygon(ROOFS['L-shape']), projected_panels(PANEL_SPECS, 35))
+    job = (163.1, 1, 'Optimal (No Sections)', False, 'landscape')
+    sequence = engine.search([job], time_budget=0.5)[0]
+    budget = sequence[5] * 0.6
+    direct = engine.run(sequence[2], 1, budget, phase=sequence.phase)
+    assert engine.budgeted([job], [sequence], budget, refine=True)[0][1] >= direct[1] - 1e-9
+
+
+@pytest.mark.parametrize('name', sorted(ROOFS))
+def test_rows_packer_valid_and_at_least_greedy(name):
+    panels = projected_panels(PANEL_SPECS, 0)
+    roof = roof_polygon(ROOFS[name])
+    rows = PlacementEngine(roof, panels, 'rows')
+    greedy = PlacementEngine(roof, panels)
+    for azimuth in (180.0, 163.1):
+        result = rows.run(azimuth, 1, float('inf'))
+        assert_valid(rows, result)
+        assert result[1] >= greedy.run(azimuth, 1, float('inf'))[1] - 1e-6
+
+
+def test_rows_packer_uses_budget():
+    # The budgeted row solver picks the best affordable mix of a row
+    panels = projected_panels(PANEL_SPECS, 0)
+    engine = PlacementEngine(box(0, 0, 8, 5), panels, 'rows')
+    sequences = engine.sequences([JOB])
+    result = engine.budgeted([JOB], sequences, 1263.7, refine=True)[0]
+    assert result[5] <= 1263.7
+    assert result[1] == pytest.approx(engine.run(JOB[0], JOB[1], 1263.7)[1])
+    assert result[1] > truncate(sequences[0], 1263.7)[1]
+
+
+def baseline_section(section, inset, panels, current_total_cost, budget):
+    # Scalar loop of the original optimize_section, one box at a time
+    sec_minx, sec_miny, sec_maxx, sec_maxy = section.bounds
+    eff_sec_minx, eff_sec_miny = sec_minx + 0.05, sec_miny + 0.25
+    eff_sec_maxx, eff_sec_maxy = sec_maxx - 0.05, sec_maxy - 0.25
+    if eff_sec_maxx <= eff_sec_minx or eff_sec_maxy <= eff_sec_miny:
+        return [], current_total_cost
+    placements = []
+    sorted_panels = sorted(panels, key=lambda p: p['eff_len'] * p['eff_wid'], reverse=True)
+    y = eff_sec_miny
+    while y < eff_sec_maxy:
+        x = eff_sec_minx
+        while x < eff_sec_maxx:
+            placed = False
+            for panel in sorted_panels:
+                if current_total_cost + panel['cost'] > budget:
+                    continue
+                rect_shape = box(x, y, x + panel['eff_len'], y + panel['eff_wid'])
+                if section.contains(rect_shape) and inset.contains(rect_shape):
+                    placements.append((panel['type'], x, y))
+                    current_total_cost += panel['cost']
+                    x += panel['eff_len']
+                    placed = True
+                    break
+            if not placed:
+                x += 0.5
+        y += max(p['eff_wid'] for p in panels)
+    return placements, current_total_cost
+
+
+@pytest.mark.parametrize('name', ['rectangle', 'L-shape', 'concave'])
+@pytest.mark.parametrize('azimuth, sections, budget', [(180.0, 1, float('inf')), (163.1, 3, float('inf')),
+                                                       (180.0, 3, 5000.0), (201.7, 1, 2500.0)])
+def test_shapely_packer_matches_baseline_loop(name, azimuth, sections, budget):
+    engine = PlacementEngine(roof_polygon(ROOFS[name]), projected_panels(PANEL_SPECS, 35))
+    result = engine.run(azimuth, sections, budget)
+    _, inset = engine.layout(azimuth)
+    expected = []
+    total_cost = 0
+    for section in engine.sections(azimuth, sections):
+        placements, total_cost = baseline_section(section, inset, engine.panels, total_cost, budget)
+        expected += placements
+    assert [(p['type'], p['x'], p['y']) for p in result[0]] == expected
+    assert result[5] == pytest.approx(total_cost)
+
+
+@pytest.mark.parametrize('name', sorted(ROOFS))
+def test_raster_packer_valid(name):
+    engine = PlacementEngine(roof_polygon(ROOFS[name]), projected_panels(PANEL_SPECS, 35), 'raster')
+    for azimuth in (180.0, 163.1):
+        for sections in (1, 3):
+            assert_valid(engine, engine.run(azimuth, sections, float('inf')))
+
+
+@pytest.mark.parametrize('packer', PACKERS)
+@pytest.mark.parametrize('name', ['rectangle', 'L-shape', 'concave', 'many-vertex'])
+def test_layouts_valid(packer, name):
+    panels = projected_panels(PANEL_SPECS, 35) + projected_panels(PANEL_SPECS, 35, rotated=True)
+    engine = PlacementEngine(roof_polygon(ROOFS[name]), panels, packer)
+    for azimuth, sections in ((180.0, 1), (163.1, 3)):
+        for stagger in (False, True):
+            for orientation in ORIENTATIONS:
+                result = engine.run(azimuth, sections, float('inf'), stagger=stagger, orientation=orientation)
+                assert_valid(engine, result)
+                if orientation != 'mixed':
+                    assert all(p['rotated'] == (orientation == 'portrait') for p in result[0])
+
+
+def test_raster_is_built_once_per_layout(monkeypatch):
+    engine = PlacementEngine(roof_polygon(ROOFS['concave']), projected_panels(PANEL_SPECS, 0), 'raster')
+    calls = []
+    rasterize = placement_engine.rasterize
+    monkeypatch.setattr(placement_engine, 'rasterize', lambda *args: calls.append(args) or rasterize(*args))
+    for phase in ((0.0, 0.0), (0.2, 0.3)):
+        for budget in (float('inf'), 3000):
+            engine.run(180.0, 3, budget, phase=phase)
+    assert len(calls) == len(engine.sections(180.0, 3))
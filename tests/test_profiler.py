@@ -0,0 +1,90 @@
+import pytest
+
+from Profiler import Profiler, profile_attributes, profiled, profiler
+
+
+def test_spans_and_counters():
+    p = Profiler()
+    p.enable()
+    with p.span('outer'):
+        with p.span('inner'):
+            pass
+    p.count('cache.hit', 2)
+    report = p.report()
+    assert report['attributes']['outer']['calls'] == 1
+    assert report['attributes']['inner']['calls'] == 1
+    assert report['counters'] == {'cache.hit': 2}
+    assert 'outer;inner' in p.stacks
+
+
+def test_attribute_evaluations_and_cache_hits():
+    parapy = pytest.importorskip('parapy.core')
+
+    @profile_attributes
+    class Box(parapy.Base):
+        width = parapy.Input(2)
+
+        @parapy.Attribute
+        @profiled
+        def area(self):
+            return self.width ** 2
+
+    profiler.reset()
+    profiler.enable()
+    try:
+        obj = Box()
+        assert obj.area == 4
+        assert obj.area == 4
+        obj.width = 3
+        assert obj.area == 9
+    finally:
+        profiler.enable(False)
+    entry = profiler.report()['attributes']['Box.area']
+    assert entry['calls'] == 2
+    assert entry['cache_hits'] == 1
+
+
+class Cached:
+    """Stand-in for a ParaPy attribute: evaluates once, then serves the cache."""
+
+    def __init__(self, func):
+        self.func = func
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        cache = obj.__dict__.setdefault('cache', {})
+        if self.func.__name__ not in cache:
+            cache[self.func.__name__] = self.func(obj)
+        return cache[self.func.__name__]
+
+
+def test_cache_hits_with_a_stand_in_descriptor():
+    @profile_attributes
+    class Box:
+        @Cached
+        @profiled
+        def area(self):
+            return 4
+
+    profiler.reset()
+    assert '__getattribute__' not in vars(Box)  # no hook while disabled
+    profiler.enable()
+    try:
+        obj = Box()
+        assert obj.area == 4
+        assert obj.area == 4
+        assert obj.area == 4
+    finally:
+        profiler.enable(False)
+    assert '__getattribute__' not in vars(Box)
+    entry = profiler.report()['attributes']['Box.area']
+    assert entry['calls'] == 1
+    assert entry['cache_hits'] == 2
+
+
+def test_class_without_profiled_attributes_is_rejected():
+    with pytest.raises(TypeError, match='no @profiled attributes'):
+        @profile_attributes
+        class Plain:
+            pass
@@ -0,0 +1,72 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import PVGISClient as pvgis_client_module
+from PVGISClient import PVGISClient, PVGISError
+
+
+@pytest.fixture
+def stub_pvgis():
+    # Local PVGIS stand-in answering with the queued (status, headers, body)
+    # responses, one per request
+    responses = []
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            status, headers, body = responses.pop(0)
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/', responses, requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_rate_limit_is_retried_after_retry_after(stub_pvgis, monkeypatch):
+    url, responses, requests = stub_pvgis
+    responses += [(429, {'Retry-After': '2'}, {'message': 'slow down'}),
+                  (200, {}, {'outputs': {'totals': {'fixed': {'E_y': 1000}}}})]
+    delays = []
+    monkeypatch.setattr(pvgis_client_module.time, 'sleep', delays.append)
+    client = PVGISClient(base_url=url, backoff_factor=0.01)
+    result = client.get_json('PVcalc', {'lat': 52.0, 'lon': 4.4})
+    assert result['outputs']['totals']['fixed']['E_y'] == 1000
+    assert len(requests) == 2 and requests[0].startswith('/PVcalc?')
+    assert delays == [2.0]
+
+
+def test_bad_request_raises_without_retry(stub_pvgis, monkeypatch):
+    url, responses, requests = stub_pvgis
+    responses += [(400, {}, {'message': 'Location over the sea'})]
+    monkeypatch.setattr(pvgis_client_module.time, 'sleep', lambda delay: None)
+    client = PVGISClient(base_url=url)
+    with pytest.raises(PVGISError, match='status 400'):
+        client.get_json('PVcalc', {'lat': 52.0, 'lon': -30.0})
+    assert len(requests) == 1
+
+
+def test_gives_up_after_max_retries(stub_pvgis, monkeypatch):
+    url, responses, requests = stub_pvgis
+    responses += [(503, {}, {})] * 3
+    monkeypatch.setattr(pvgis_client_module.time, 'sleep', lambda delay: None)
+    client = PVGISClient(base_url=url, max_retries=2)
+    with pytest.raises(PVGISError, match='gave up after 3 attempts'):
+        client.get_json('seriescalc', {'lat': 52.0, 'lon': 4.4})
+    assert len(requests) == 3